@@ -1,43 +1,177 @@
 #!/usr/bin/env python3
+"""
+Check that directory and file names are snake_case.
+
+By default the paths passed by pre-commit are checked. The paths are put in
+a trie of their components first, so every directory is checked once no
+matter how many files are below it, and offending directories are reported
+with the number of files they contain.
+
+With --walk every file git tracks below the root is checked instead, like
+pre-commit run --all-files does, e.g. to check everything without pre-commit.
+Outside a git checkout the tree is scanned, without entering excluded
+directories or the ones in SKIPPED_DIRS. Either way, paths matching the
+excludes of this hook in .pre-commit-config.yaml are skipped.
+"""
+
 import sys
 import os
 import re
+import argparse
+import subprocess
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 SNAKE_CASE_REGEX = re.compile(r'^[\.a-z0-9_]+$')
+HOOK_ID = 'check-snake-paths'
+# Directories git doesn't track, not entered when walking outside a git checkout
+SKIPPED_DIRS = {'.git', '.godot', '__pycache__', '.venv', 'venv', '.pytest_cache', '.mypy_cache', '.ruff_cache', '.tox', '.nox'}
+
 
 def is_snake_case(name):
     return bool(SNAKE_CASE_REGEX.fullmatch(name))
 
-def main():
-    # Paths passed by pre-commit (filtered by exclude)
-    paths = sys.argv[1:]
-    #print(paths)
-    invalid_dirs = set()
 
+class PathNode:
+    """A path component in the trie, with the number of files at or below it."""
+    __slots__ = ('children', 'files')
+
+    def __init__(self):
+        self.children: Dict[str, 'PathNode'] = {}
+        self.files = 0
+
+
+def build_trie(paths: Iterable[str]) -> PathNode:
+    """Put the components of the paths in a trie, where each directory has a single node."""
+    root = PathNode()
     for path in paths:
-        #print(path)
-        # Get all directory parts in the path
         # Normalize path separators, skip leading './'
-        parts = os.path.normpath(path).split(os.sep)
+        parts = os.path.normpath(path).replace(os.sep, '/').split('/')
+        node = root
+        node.files += 1
+        for part in parts:
+            if part in ('', '.'):
+                continue
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = PathNode()
+            child.files += 1
+            node = child
+    return root
 
-        # Ignore the filename (last part) if it's a file
-        #if os.path.isfile(path) or ('.' in parts[-1]):
-        #    parts = parts[:-1]
 
-        # Check each directory in the path
-        for part in parts:
-            #print(part)
-            if not is_snake_case(part):
-                invalid_dirs.add(part)
+def find_invalid_paths(root: PathNode) -> List[Tuple[str, int, bool]]:
+    """Return (path, number of files, is directory) of every node whose name isn't snake_case."""
+    invalid = []
+    pending = [(root, '')]
+    while pending:
+        node, prefix = pending.pop()
+        for name, child in node.children.items():
+            path = prefix + name
+            if not is_snake_case(name):
+                invalid.append((path, child.files, bool(child.children)))
+            if child.children:
+                pending.append((child, path + '/'))
+    return sorted(invalid)
+
+
+def _unquote_yaml(value: str) -> str:
+    """Unquote a scalar of .pre-commit-config.yaml."""
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1].replace("''", "'")
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].encode().decode('unicode_escape')
+    return value
+
 
-    if invalid_dirs:
+def read_excludes(config_path: str) -> List[re.Pattern]:
+    """
+    Read the top level exclude and the exclude of this hook from the pre-commit config.
+
+    Only the lines this needs are parsed, so the hook doesn't depend on a
+    YAML library.
+    """
+    with open(config_path, encoding='utf-8') as f:
+        lines = f.read().split('\n')
+
+    excludes = []
+    hook_indent: Optional[int] = None
+    for line in lines:
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+        if stripped.startswith('- id:'):
+            hook_id = _unquote_yaml(stripped[len('- id:'):])
+            hook_indent = indent if hook_id == HOOK_ID else None
+        elif stripped.startswith('exclude:'):
+            value = _unquote_yaml(stripped[len('exclude:'):])
+            # The hook's keys are indented below its "- id:"
+            if indent == 0 or (hook_indent is not None and indent > hook_indent):
+                excludes.append(re.compile(value))
+        elif hook_indent is not None and stripped and indent <= hook_indent:
+            hook_indent = None
+    return excludes
+
+
+def git_paths(root: str, excludes: List[re.Pattern]) -> Optional[List[str]]:
+    """Return the files git tracks below root relative to it, without excluded paths, or None outside a git checkout."""
+    try:
+        result = subprocess.run(['git', 'ls-files', '-z'], cwd=root, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    paths = result.stdout.decode('utf-8', errors='surrogateescape').split('\0')
+    return [path for path in paths if path and not any(exclude.search(path) for exclude in excludes)]
+
+
+def walk_paths(root: str, excludes: List[re.Pattern]) -> Iterator[str]:
+    """Yield the files below root relative to it, skipping excluded paths and not entering excluded directories."""
+    pending = [(root, '')]
+    while pending:
+        directory, prefix = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    path = prefix + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        # Everything below a directory matches when its path with the trailing slash does
+                        if entry.name not in SKIPPED_DIRS and not any(exclude.search(path + '/') for exclude in excludes):
+                            pending.append((entry.path, path + '/'))
+                    elif not any(exclude.search(path) for exclude in excludes):
+                        yield path
+        except OSError as e:
+            print(f"Could not scan {directory}: {e}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that directory and file names are snake_case')
+    parser.add_argument('paths', nargs='*', help='Paths to check, as passed by pre-commit (filtered by exclude)')
+    parser.add_argument('--walk', nargs='?', const='.', metavar='ROOT', help='Check every file git tracks below ROOT (default: the current directory) instead')
+    parser.add_argument('--config', default='.pre-commit-config.yaml', help='Pre-commit config with the excludes used by --walk (default: %(default)s, relative to ROOT)')
+    args = parser.parse_args()
+
+    if args.walk is not None:
+        config_path = os.path.join(args.walk, args.config)
+        excludes = read_excludes(config_path) if os.path.exists(config_path) else []
+        paths = git_paths(args.walk, excludes)
+        if paths is None:
+            paths = walk_paths(args.walk, excludes)
+    else:
+        paths = args.paths
+
+    trie = build_trie(paths)
+    invalid = find_invalid_paths(trie)
+    if invalid:
         print("These directory or file names are NOT snake_case:")
-        for d in sorted(invalid_dirs):
-            print(f"  - {d}")
+        for path, files, is_dir in invalid:
+            if is_dir:
+                print(f"  - {path}/ ({files} file{'s' if files != 1 else ''})")
+            else:
+                print(f"  - {path}")
+        print(f"\n{len(invalid)} invalid name(s) in {trie.files} checked path(s)")
         return 1
 
     #print("✅ All checked directory or file names are snake_case.")
     return 0
 
+
 if __name__ == "__main__":
     sys.exit(main())
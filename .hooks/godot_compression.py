@@ -0,0 +1,626 @@
+"""
+Readers for Godot's block-compressed files (FileAccessCompressed, "RSCC").
+
+Compressed binary resources start with the "RSCC" magic, followed by the
+compression mode, the block size, the uncompressed size and the compressed
+size of every block. Each block decompresses on its own, so the start of a
+resource can be read without touching the rest of the file.
+
+Deflate and gzip come from zlib. Zstandard, which Godot uses by default, comes
+from compression.zstd (Python 3.14+) or the zstandard package when available,
+otherwise from the small pure Python decoder below. It is slow, but only has
+to decode the few blocks holding a resource header.
+"""
+
+import zlib
+import struct
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# Compression::Mode
+MODE_FASTLZ = 0
+MODE_DEFLATE = 1
+MODE_ZSTD = 2
+MODE_GZIP = 3
+MODE_BROTLI = 4
+
+MODE_NAMES = {
+    MODE_FASTLZ: 'FastLZ',
+    MODE_DEFLATE: 'Deflate',
+    MODE_ZSTD: 'Zstandard',
+    MODE_GZIP: 'gzip',
+    MODE_BROTLI: 'Brotli',
+}
+
+
+class CompressedFile:
+    """
+    Reads the decompressed content of a Godot compressed file.
+
+    Blocks are decompressed lazily, only when read() reaches them.
+    """
+
+    def __init__(self, f: BinaryIO, magic: bytes = b"RSCC"):
+        self.f = f
+        if f.read(4) != magic:
+            raise ValueError(f"Not a compressed Godot file (expected {magic!r} magic).")
+
+        self.mode, self.block_size, self.total_size = struct.unpack("<III", self._read_exact(12))
+        if self.block_size == 0:
+            raise ValueError("Compressed file has a block size of 0.")
+        if self.mode not in MODE_NAMES:
+            raise ValueError(f"Unknown compression mode {self.mode}.")
+
+        block_count = self.total_size // self.block_size + 1
+        sizes = struct.unpack(f"<{block_count}I", self._read_exact(4 * block_count))
+
+        # (offset, compressed size) of every block
+        self.blocks: List[Tuple[int, int]] = []
+        offset = f.tell()
+        for size in sizes:
+            self.blocks.append((offset, size))
+            offset += size
+
+        self.position = 0
+        self._block_index = -1
+        self._block_data = b""
+
+    def read(self, size: int) -> bytes:
+        """Read up to size decompressed bytes."""
+        chunks = []
+        while size > 0 and self.position < self.total_size:
+            index, block_offset = divmod(self.position, self.block_size)
+            data = self._load_block(index)[block_offset:block_offset + size]
+            if not data:
+                break
+            chunks.append(data)
+            self.position += len(data)
+            size -= len(data)
+        return b"".join(chunks)
+
+    def _load_block(self, index: int) -> bytes:
+        if index != self._block_index:
+            offset, compressed_size = self.blocks[index]
+            self.f.seek(offset)
+            # The last block only holds what's left
+            size = min(self.block_size, self.total_size - index * self.block_size)
+            self._block_data = decompress_block(self.mode, self._read_exact(compressed_size), size)
+            self._block_index = index
+        return self._block_data
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self.f.read(size)
+        if len(data) != size:
+            raise ValueError("Unexpected end of compressed file.")
+        return data
+
+
+def decompress_block(mode: int, data: bytes, size: int) -> bytes:
+    """Decompress a single block into at most size bytes."""
+    if mode == MODE_DEFLATE:
+        result = zlib.decompress(data)
+    elif mode == MODE_GZIP:
+        result = zlib.decompress(data, 16 + zlib.MAX_WBITS)
+    elif mode == MODE_ZSTD:
+        result = _zstd_decompress(data, size)
+    elif mode == MODE_BROTLI:
+        try:
+            import brotli
+        except ImportError:
+            raise ValueError("Brotli compressed files need the brotli package.") from None
+        result = brotli.decompress(data)
+    else:
+        raise ValueError(f"{MODE_NAMES.get(mode, mode)} compressed files aren't supported.")
+
+    return result[:size]
+
+
+def _zstd_decompress(data: bytes, size: int) -> bytes:
+    try:
+        from compression import zstd
+        return zstd.decompress(data)
+    except ImportError:
+        pass
+
+    try:
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=size)
+    except ImportError:
+        pass
+
+    return zstd_decompress(data)
+
+
+# Pure Python Zstandard decoder, following RFC 8878 and the reference
+# educational decoder. Dictionaries aren't supported, Godot doesn't use them.
+
+ZSTD_MAGIC = 0xFD2FB528
+
+LL_BASE = list(range(16)) + [16, 18, 20, 22, 24, 28, 32, 40, 48, 64, 128, 256, 512, 1024, 2048, 4096,
+                             8192, 16384, 32768, 65536]
+LL_BITS = [0] * 16 + [1, 1, 1, 1, 2, 2, 3, 3, 4, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16]
+ML_BASE = list(range(3, 35)) + [35, 37, 39, 41, 43, 47, 51, 59, 67, 83, 99, 131, 259, 515, 1027, 2051,
+                                4099, 8195, 16387, 32771, 65539]
+ML_BITS = [0] * 32 + [1, 1, 1, 1, 2, 2, 3, 3, 4, 4, 5, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16]
+
+LL_DEFAULT = ([4, 3, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 1, 1, 1, 2, 2, 2, 2, 2, 2, 2, 2, 2, 3, 2, 1, 1, 1, 1, 1]
+              + [-1] * 4, 6)
+ML_DEFAULT = ([1, 4, 3, 2, 2, 2, 2, 2, 2] + [1] * 37 + [-1] * 7, 6)
+OF_DEFAULT = ([1, 1, 1, 1, 1, 1, 2, 2, 2] + [1] * 15 + [-1] * 5, 5)
+
+LL_MAX_ACCURACY_LOG = 9
+ML_MAX_ACCURACY_LOG = 9
+OF_MAX_ACCURACY_LOG = 8
+HUF_MAX_ACCURACY_LOG = 6
+
+
+class _ForwardBits:
+    """Reads little-endian bits from the start of a buffer, as in FSE table descriptions."""
+
+    def __init__(self, data: bytes, offset: int):
+        self.data = data
+        self.bit_offset = offset * 8
+
+    def read(self, count: int) -> int:
+        value = 0
+        for i in range(count):
+            byte_index, bit = divmod(self.bit_offset + i, 8)
+            if byte_index >= len(self.data):
+                raise ValueError("Zstandard table description is truncated.")
+            value |= ((self.data[byte_index] >> bit) & 1) << i
+        self.bit_offset += count
+        return value
+
+    def rewind(self, count: int):
+        self.bit_offset -= count
+
+    def byte_offset(self) -> int:
+        """Offset of the first byte after the bits read so far."""
+        return (self.bit_offset + 7) // 8
+
+
+class _BackwardBits:
+    """Reads bits from the end of a stream towards its start, after the padding marker."""
+
+    def __init__(self, data: bytes):
+        if not data or data[-1] == 0:
+            raise ValueError("Zstandard bitstream has no end marker.")
+        self.value = int.from_bytes(data, 'little')
+        self.offset = self.value.bit_length() - 1
+
+    def read(self, count: int) -> int:
+        if count == 0:
+            return 0
+        self.offset -= count
+        mask = (1 << count) - 1
+        if self.offset >= 0:
+            return (self.value >> self.offset) & mask
+        # Reading past the start yields zeros
+        return (self.value << -self.offset) & mask
+
+
+class _FSETable:
+    """A Finite State Entropy decoding table."""
+
+    def __init__(self, accuracy_log: int, symbols: List[int], num_bits: List[int], new_state_base: List[int]):
+        self.accuracy_log = accuracy_log
+        self.symbols = symbols
+        self.num_bits = num_bits
+        self.new_state_base = new_state_base
+
+    @classmethod
+    def from_frequencies(cls, frequencies: List[int], accuracy_log: int) -> '_FSETable':
+        size = 1 << accuracy_log
+        symbols = [0] * size
+        state_desc = [0] * len(frequencies)
+
+        # "Less than 1" probabilities go to the end of the table
+        high_threshold = size
+        for symbol, frequency in enumerate(frequencies):
+            if frequency == -1:
+                high_threshold -= 1
+                symbols[high_threshold] = symbol
+                state_desc[symbol] = 1
+
+        position = 0
+        step = (size >> 1) + (size >> 3) + 3
+        mask = size - 1
+        for symbol, frequency in enumerate(frequencies):
+            if frequency <= 0:
+                continue
+            state_desc[symbol] = frequency
+            for _ in range(frequency):
+                symbols[position] = symbol
+                position = (position + step) & mask
+                while position >= high_threshold:
+                    position = (position + step) & mask
+        if position != 0:
+            raise ValueError("Invalid Zstandard FSE distribution.")
+
+        num_bits = [0] * size
+        new_state_base = [0] * size
+        for state in range(size):
+            symbol = symbols[state]
+            next_state_desc = state_desc[symbol]
+            state_desc[symbol] += 1
+            num_bits[state] = accuracy_log - (next_state_desc.bit_length() - 1)
+            new_state_base[state] = (next_state_desc << num_bits[state]) - size
+
+        return cls(accuracy_log, symbols, num_bits, new_state_base)
+
+    @classmethod
+    def rle(cls, symbol: int) -> '_FSETable':
+        return cls(0, [symbol], [0], [0])
+
+    @classmethod
+    def read(cls, data: bytes, offset: int, max_accuracy_log: int) -> Tuple['_FSETable', int]:
+        """Read a table description, returning the table and the offset after it."""
+        bits = _ForwardBits(data, offset)
+        accuracy_log = bits.read(4) + 5
+        if accuracy_log > max_accuracy_log:
+            raise ValueError("Zstandard FSE accuracy log is too large.")
+
+        remaining = 1 << accuracy_log
+        frequencies = []
+        while remaining > 0 and len(frequencies) < 256:
+            bit_count = (remaining + 1).bit_length()
+            value = bits.read(bit_count)
+            lower_mask = (1 << (bit_count - 1)) - 1
+            threshold = (1 << bit_count) - 1 - (remaining + 1)
+            if (value & lower_mask) < threshold:
+                bits.rewind(1)
+                value &= lower_mask
+            elif value > lower_mask:
+                value -= threshold
+
+            probability = value - 1
+            remaining -= abs(probability)
+            frequencies.append(probability)
+
+            if probability == 0:
+                # Runs of zero probabilities are stored as 2 bit repeat flags
+                repeat = bits.read(2)
+                while True:
+                    frequencies.extend([0] * repeat)
+                    if repeat != 3:
+                        break
+                    repeat = bits.read(2)
+
+        if remaining != 0:
+            raise ValueError("Invalid Zstandard FSE table description.")
+
+        return cls.from_frequencies(frequencies, accuracy_log), bits.byte_offset()
+
+    def init_state(self, bits: _BackwardBits) -> int:
+        return bits.read(self.accuracy_log)
+
+    def update_state(self, state: int, bits: _BackwardBits) -> int:
+        return self.new_state_base[state] + bits.read(self.num_bits[state])
+
+
+class _HuffmanTable:
+    """A Huffman decoding table for literals."""
+
+    def __init__(self, weights: List[int]):
+        total = sum(1 << (weight - 1) for weight in weights if weight > 0)
+        if total == 0:
+            raise ValueError("Invalid Zstandard Huffman weights.")
+
+        # The last weight is implied, it completes the total to a power of 2
+        max_bits = total.bit_length()
+        left_over = (1 << max_bits) - total
+        if left_over & (left_over - 1):
+            raise ValueError("Invalid Zstandard Huffman weights.")
+        weights = weights + [left_over.bit_length()]
+
+        bits = [max_bits + 1 - weight if weight > 0 else 0 for weight in weights]
+        size = 1 << max_bits
+        rank_count = [0] * (max_bits + 2)
+        for bit_count in bits:
+            rank_count[bit_count] += 1
+
+        self.max_bits = max_bits
+        self.symbols = [0] * size
+        self.num_bits = [0] * size
+
+        # Longest codes come first in the table
+        rank_index = [0] * (max_bits + 2)
+        for bit_count in range(max_bits, 0, -1):
+            rank_index[bit_count - 1] = rank_index[bit_count] + rank_count[bit_count] * (1 << (max_bits - bit_count))
+            for i in range(rank_index[bit_count], rank_index[bit_count - 1]):
+                self.num_bits[i] = bit_count
+
+        for symbol, bit_count in enumerate(bits):
+            if bit_count:
+                code = rank_index[bit_count]
+                length = 1 << (max_bits - bit_count)
+                self.symbols[code:code + length] = [symbol] * length
+                rank_index[bit_count] += length
+
+    @classmethod
+    def read(cls, data: bytes, offset: int) -> Tuple['_HuffmanTable', int]:
+        """Read a Huffman tree description, returning the table and the offset after it."""
+        header = data[offset]
+        offset += 1
+
+        if header >= 128:
+            # Weights stored directly, 4 bits each
+            count = header - 127
+            packed = data[offset:offset + (count + 1) // 2]
+            weights = [(packed[i // 2] >> 4) if i % 2 == 0 else (packed[i // 2] & 15) for i in range(count)]
+            return cls(weights), offset + (count + 1) // 2
+
+        # Weights compressed with FSE, decoded with two interleaved states
+        end = offset + header
+        table, stream_start = _FSETable.read(data[:end], offset, HUF_MAX_ACCURACY_LOG)
+        bits = _BackwardBits(data[stream_start:end])
+        weights = []
+        state1 = table.init_state(bits)
+        state2 = table.init_state(bits)
+        while len(weights) < 255:
+            weights.append(table.symbols[state1])
+            state1 = table.update_state(state1, bits)
+            if bits.offset < 0:
+                weights.append(table.symbols[state2])
+                break
+            weights.append(table.symbols[state2])
+            state2 = table.update_state(state2, bits)
+            if bits.offset < 0:
+                weights.append(table.symbols[state1])
+                break
+        return cls(weights), end
+
+    def decode_stream(self, data: bytes, output: bytearray):
+        bits = _BackwardBits(data)
+        mask = (1 << self.max_bits) - 1
+        state = bits.read(self.max_bits)
+        while bits.offset > -self.max_bits:
+            output.append(self.symbols[state])
+            bit_count = self.num_bits[state]
+            state = ((state << bit_count) + bits.read(bit_count)) & mask
+        if bits.offset != -self.max_bits:
+            raise ValueError("Zstandard Huffman stream is corrupted.")
+
+
+class _FrameState:
+    """Tables and repeat offsets carried between the blocks of a frame."""
+
+    def __init__(self):
+        self.huffman: Optional[_HuffmanTable] = None
+        self.ll_table: Optional[_FSETable] = None
+        self.of_table: Optional[_FSETable] = None
+        self.ml_table: Optional[_FSETable] = None
+        self.offsets = [1, 4, 8]
+
+
+def zstd_decompress(data: bytes) -> bytes:
+    """Decompress all Zstandard frames in data."""
+    output = bytearray()
+    offset = 0
+    while offset < len(data):
+        magic = struct.unpack_from("<I", data, offset)[0]
+        if magic & 0xFFFFFFF0 == 0x184D2A50:
+            # Skippable frame
+            size = struct.unpack_from("<I", data, offset + 4)[0]
+            offset += 8 + size
+            continue
+        if magic != ZSTD_MAGIC:
+            raise ValueError("Not Zstandard compressed data.")
+        offset = _decompress_frame(data, offset + 4, output)
+    return bytes(output)
+
+
+def _decompress_frame(data: bytes, offset: int, output: bytearray) -> int:
+    descriptor = data[offset]
+    offset += 1
+    content_size_flag = descriptor >> 6
+    single_segment = (descriptor >> 5) & 1
+    has_checksum = (descriptor >> 2) & 1
+    dictionary_id_flag = descriptor & 3
+
+    if not single_segment:
+        offset += 1  # Window descriptor
+    dictionary_id_size = (0, 1, 2, 4)[dictionary_id_flag]
+    if dictionary_id_size and int.from_bytes(data[offset:offset + dictionary_id_size], 'little'):
+        raise ValueError("Zstandard dictionaries aren't supported.")
+    offset += dictionary_id_size
+    offset += (1 if single_segment else 0, 2, 4, 8)[content_size_flag]
+
+    frame_start = len(output)
+    state = _FrameState()
+    while True:
+        header = int.from_bytes(data[offset:offset + 3], 'little')
+        offset += 3
+        last_block = header & 1
+        block_type = (header >> 1) & 3
+        block_size = header >> 3
+
+        if block_type == 0:
+            output += data[offset:offset + block_size]
+            offset += block_size
+        elif block_type == 1:
+            output += data[offset:offset + 1] * block_size
+            offset += 1
+        elif block_type == 2:
+            _decompress_block(data[offset:offset + block_size], state, output, frame_start)
+            offset += block_size
+        else:
+            raise ValueError("Reserved Zstandard block type.")
+
+        if last_block:
+            break
+
+    if has_checksum:
+        offset += 4
+    return offset
+
+
+def _decompress_block(block: bytes, state: _FrameState, output: bytearray, frame_start: int):
+    literals, offset = _decode_literals(block, state)
+    sequences = _decode_sequences(block, offset, state)
+
+    literal_position = 0
+    offsets = state.offsets
+    for literal_length, offset_value, match_length in sequences:
+        output += literals[literal_position:literal_position + literal_length]
+        literal_position += literal_length
+
+        if offset_value > 3:
+            match_offset = offset_value - 3
+            offsets[2], offsets[1], offsets[0] = offsets[1], offsets[0], match_offset
+        else:
+            # Repeat offsets, shifted by one when there are no literals
+            index = offset_value - 1 + (literal_length == 0)
+            if index == 0:
+                match_offset = offsets[0]
+            else:
+                match_offset = offsets[index] if index < 3 else offsets[0] - 1
+                if index > 1:
+                    offsets[2] = offsets[1]
+                offsets[1] = offsets[0]
+                offsets[0] = match_offset
+
+        start = len(output) - match_offset
+        if match_offset <= 0 or start < frame_start:
+            raise ValueError("Zstandard match offset is out of range.")
+        if match_offset >= match_length:
+            output += output[start:start + match_length]
+        else:
+            # Overlapping match, repeats the last match_offset bytes
+            for i in range(match_length):
+                output.append(output[start + i])
+
+    output += literals[literal_position:]
+
+
+def _decode_literals(block: bytes, state: _FrameState) -> Tuple[bytes, int]:
+    """Decode the literals section, returning the literals and the offset after it."""
+    header = block[0]
+    block_type = header & 3
+    size_format = (header >> 2) & 3
+
+    if block_type in (0, 1):
+        # Raw or RLE
+        if size_format in (0, 2):
+            regenerated_size = header >> 3
+            offset = 1
+        elif size_format == 1:
+            regenerated_size = (header >> 4) + (block[1] << 4)
+            offset = 2
+        else:
+            regenerated_size = (header >> 4) + (block[1] << 4) + (block[2] << 12)
+            offset = 3
+
+        if block_type == 0:
+            return block[offset:offset + regenerated_size], offset + regenerated_size
+        return block[offset:offset + 1] * regenerated_size, offset + 1
+
+    # Huffman compressed, with a new tree or the previous one
+    if size_format in (0, 1):
+        value = int.from_bytes(block[0:3], 'little')
+        regenerated_size = (value >> 4) & 0x3FF
+        compressed_size = (value >> 14) & 0x3FF
+        offset = 3
+    elif size_format == 2:
+        value = int.from_bytes(block[0:4], 'little')
+        regenerated_size = (value >> 4) & 0x3FFF
+        compressed_size = (value >> 18) & 0x3FFF
+        offset = 4
+    else:
+        value = int.from_bytes(block[0:5], 'little')
+        regenerated_size = (value >> 4) & 0x3FFFF
+        compressed_size = (value >> 22) & 0x3FFFF
+        offset = 5
+    end = offset + compressed_size
+
+    if block_type == 2:
+        state.huffman, offset = _HuffmanTable.read(block[:end], offset)
+    elif state.huffman is None:
+        raise ValueError("Zstandard block reuses a Huffman table that doesn't exist.")
+
+    literals = bytearray()
+    if size_format == 0:
+        state.huffman.decode_stream(block[offset:end], literals)
+    else:
+        sizes = struct.unpack_from("<HHH", block, offset)
+        offset += 6
+        for size in sizes:
+            state.huffman.decode_stream(block[offset:offset + size], literals)
+            offset += size
+        state.huffman.decode_stream(block[offset:end], literals)
+
+    if len(literals) != regenerated_size:
+        raise ValueError("Zstandard literals have the wrong size.")
+    return bytes(literals), end
+
+
+def _decode_sequences(block: bytes, offset: int, state: _FrameState) -> List[Tuple[int, int, int]]:
+    """Decode the sequences section into (literal length, offset value, match length) triples."""
+    count = block[offset]
+    if count == 0:
+        return []
+    if count < 128:
+        offset += 1
+    elif count < 255:
+        count = ((count - 128) << 8) + block[offset + 1]
+        offset += 2
+    else:
+        count = block[offset + 1] + (block[offset + 2] << 8) + 0x7F00
+        offset += 3
+
+    modes = block[offset]
+    offset += 1
+    state.ll_table, offset = _read_sequence_table(block, offset, modes >> 6, state.ll_table, LL_DEFAULT,
+                                                  LL_MAX_ACCURACY_LOG)
+    state.of_table, offset = _read_sequence_table(block, offset, (modes >> 4) & 3, state.of_table, OF_DEFAULT,
+                                                  OF_MAX_ACCURACY_LOG)
+    state.ml_table, offset = _read_sequence_table(block, offset, (modes >> 2) & 3, state.ml_table, ML_DEFAULT,
+                                                  ML_MAX_ACCURACY_LOG)
+
+    ll_table, of_table, ml_table = state.ll_table, state.of_table, state.ml_table
+    bits = _BackwardBits(block[offset:])
+    ll_state = ll_table.init_state(bits)
+    of_state = of_table.init_state(bits)
+    ml_state = ml_table.init_state(bits)
+
+    sequences = []
+    for i in range(count):
+        of_code = of_table.symbols[of_state]
+        ll_code = ll_table.symbols[ll_state]
+        ml_code = ml_table.symbols[ml_state]
+
+        offset_value = (1 << of_code) + bits.read(of_code)
+        match_length = ML_BASE[ml_code] + bits.read(ML_BITS[ml_code])
+        literal_length = LL_BASE[ll_code] + bits.read(LL_BITS[ll_code])
+        sequences.append((literal_length, offset_value, match_length))
+
+        if i != count - 1:
+            ll_state = ll_table.update_state(ll_state, bits)
+            ml_state = ml_table.update_state(ml_state, bits)
+            of_state = of_table.update_state(of_state, bits)
+
+    if bits.offset != 0:
+        raise ValueError("Zstandard sequence stream is corrupted.")
+    return sequences
+
+
+def _read_sequence_table(block: bytes, offset: int, mode: int, previous: Optional[_FSETable],
+                         default: Tuple[List[int], int], max_accuracy_log: int) -> Tuple[_FSETable, int]:
+    if mode == 0:
+        return _default_table(default), offset
+    if mode == 1:
+        return _FSETable.rle(block[offset]), offset + 1
+    if mode == 2:
+        return _FSETable.read(block, offset, max_accuracy_log)
+    if previous is None:
+        raise ValueError("Zstandard block repeats a sequence table that doesn't exist.")
+    return previous, offset
+
+
+_default_tables: Dict[int, _FSETable] = {}
+
+
+def _default_table(default: Tuple[List[int], int]) -> _FSETable:
+    key = id(default)
+    if key not in _default_tables:
+        _default_tables[key] = _FSETable.from_frequencies(*default)
+    return _default_tables[key]
@@ -0,0 +1,216 @@
+"""
+Repairs of UID errors for the Godot project validator (--fix).
+
+After a merge, several files can define the same UID and ext_resources can
+name a UID that belongs to another path, or that no longer exists. Instead
+of fixing them by hand or letting the editor reimport the project, the
+repairs are planned from the validator's results:
+
+- Of the paths sharing a UID, the one most ext_resources expect keeps it,
+  the others get a new UID, written where they define it (the header of a
+  .tscn/.tres, the .import or the .uid file). The ext_resources naming a
+  renamed path get its new UID.
+- An ext_resource whose UID belongs to another path gets that path, as
+  Godot loads by UID and the editor does the same when it saves the file.
+- An ext_resource with an unknown UID gets the UID of its path, which is
+  what Godot falls back to.
+
+Only the files referencing the affected UIDs are looked at, found through
+the validator's reverse reference map. All edits of a file are applied at
+once and it's replaced atomically, so every affected file is written once.
+"""
+
+import os
+import re
+import secrets
+import tempfile
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from validate_godot_project import BINARY_EXTENSIONS, RESOURCE_TEXT_EXTENSIONS, GodotValidator, parse_header_attributes
+
+HEADER_UID_PATTERN = re.compile(r'\buid="[^"]*"')
+HEADER_PATH_PATTERN = re.compile(r'\bpath="[^"]*"')
+
+
+class TextEdit(NamedTuple):
+    """Replace old with new on a line of a file, or where it first occurs if line is None."""
+    line: Optional[int]
+    old: str
+    new: str
+
+
+class FixPlan:
+    """The edits of every affected file (relative to the project root), and what they do."""
+
+    def __init__(self):
+        self.edits: Dict[str, List[TextEdit]] = defaultdict(list)
+        self.changes: List[str] = []
+        # Problems that can't be fixed by editing text files
+        self.unfixable: List[str] = []
+
+    def add(self, rel_path: str, edit: TextEdit, change: str):
+        self.edits[rel_path].append(edit)
+        self.changes.append(change)
+
+
+def generate_uid(taken: Set[str]) -> str:
+    """A random UID that isn't taken yet, in the text form Godot uses (see GodotValidator._iuid_to_string)."""
+    while True:
+        # Like ResourceUID::create_id, a random non-negative int64 that isn't 0
+        uid = GodotValidator._iuid_to_string(secrets.randbits(63))
+        if uid != "uid://<invalid>" and uid not in taken:
+            taken.add(uid)
+            return uid
+
+
+def _definition_files(validator: GodotValidator, res_path: str, uid: str) -> List[str]:
+    """The text files that define a path's UID, i.e. the resource itself or its .import or .uid file."""
+    rel_path = res_path[6:]
+    candidates = [rel_path] if rel_path.endswith(RESOURCE_TEXT_EXTENSIONS) else []
+    candidates += [rel_path + suffix for suffix in ('.import', '.uid')]
+    definitions = []
+    for candidate in candidates:
+        facts = validator.facts.get(candidate)
+        if facts is not None and facts.uid == uid:
+            definitions.append(candidate)
+    return definitions
+
+
+def _definition_edit(rel_path: str, uid: str, new_uid: str) -> TextEdit:
+    if rel_path.endswith('.uid'):
+        return TextEdit(None, uid, new_uid)
+    if rel_path.endswith('.import'):
+        return TextEdit(None, f'uid="{uid}"', f'uid="{new_uid}"')
+    # The gd_scene or gd_resource header is the first line
+    return TextEdit(1, f'uid="{uid}"', f'uid="{new_uid}"')
+
+
+def _expected_paths(validator: GodotValidator, uid: str, paths: List[str]) -> Counter:
+    """How many ext_resources name each of the paths together with the UID."""
+    counts = Counter()
+    for rel_path in validator.referrers(uid):
+        facts = validator.facts.get(rel_path)
+        for _, _, _, ext_uid, ext_path in facts.ext_resources if facts else ():
+            if ext_uid == uid and ext_path in paths:
+                counts[ext_path] += 1
+    return counts
+
+
+def plan_fixes(validator: GodotValidator) -> FixPlan:
+    """Plan the repairs of the UID errors found by validator.scan_project()."""
+    plan = FixPlan()
+    taken = set(validator.uid_to_path)
+    uid_to_path = dict(validator.uid_to_path)
+    path_to_uid = dict(validator.path_to_uid)
+    # (UID, path) of the paths that got a new UID, to the new UID
+    renamed: Dict[Tuple[str, str], str] = {}
+
+    for uid, paths in sorted(validator.duplicate_uids.items()):
+        paths = sorted(set(paths))
+        if len(paths) < 2:
+            continue
+        counts = _expected_paths(validator, uid, paths)
+        definitions = {path: _definition_files(validator, path, uid) for path in paths}
+        # Binary resources can't be edited, so one of them has to keep the UID
+        binary = [path for path in paths if os.path.splitext(path)[1] in BINARY_EXTENSIONS]
+        candidates = binary or [path for path in paths if definitions[path]] or paths
+        keeper = max(candidates, key=lambda path: (counts[path], path == validator.uid_to_path.get(uid), path))
+        uid_to_path[uid] = keeper
+
+        for path in paths:
+            if path == keeper:
+                continue
+            if not definitions[path]:
+                plan.unfixable.append(f"{path} shares {uid} with {keeper}, but doesn't define it in a text file")
+                continue
+            new_uid = renamed[uid, path] = generate_uid(taken)
+            uid_to_path[new_uid] = path
+            path_to_uid[path] = new_uid
+            for rel_path in definitions[path]:
+                plan.add(rel_path, _definition_edit(rel_path, uid, new_uid),
+                         f"{rel_path}: {path} now has {new_uid}, {uid} stays with {keeper}")
+
+    # The files with an ext_resource that names a renamed, mismatched or unknown UID
+    uids = {uid for uid, _ in renamed}
+    uids.update(error.uid for error in validator.errors if error.code in ('ext-resource-uid-mismatch', 'missing-uid') and error.uid)
+    files = set()
+    for uid in uids:
+        files.update(validator.referrers(uid))
+
+    for rel_path in sorted(files):
+        facts = validator.facts.get(rel_path)
+        for line_number, block, _, uid, path in facts.ext_resources if facts else ():
+            if not uid or not path:
+                continue
+            if (uid, path) in renamed:
+                new_block = HEADER_UID_PATTERN.sub(f'uid="{renamed[uid, path]}"', block, count=1)
+                change = f"{rel_path}:{line_number}: {path} is loaded by {renamed[uid, path]} instead of {uid}"
+            elif uid in uid_to_path and uid_to_path[uid] != path:
+                new_block = HEADER_PATH_PATTERN.sub(f'path="{uid_to_path[uid]}"', block, count=1)
+                change = f"{rel_path}:{line_number}: {uid} is {uid_to_path[uid]}, not {path}"
+            elif uid not in uid_to_path and path in path_to_uid:
+                new_block = HEADER_UID_PATTERN.sub(f'uid="{path_to_uid[path]}"', block, count=1)
+                change = f"{rel_path}:{line_number}: {path} is loaded by {path_to_uid[path]} instead of the unknown {uid}"
+            else:
+                continue
+            if parse_header_attributes(new_block) != parse_header_attributes(block):
+                plan.add(rel_path, TextEdit(line_number, block, new_block), change)
+
+    return plan
+
+
+def rewrite_file(file_path: Path, edits: List[TextEdit]):
+    """
+    Apply all edits to a file and replace it atomically.
+
+    Raises ValueError, without touching the file, when the text to replace
+    isn't there, e.g. because the file changed since it was validated.
+    """
+    # Split on '\n' only, like the tokenizers count lines. splitlines() would also split on \v, \f,
+    # \x85 or \u2028 inside strings. Without newline translation a '\r' stays at the end of its line.
+    with open(file_path, encoding='utf-8', newline='') as f:
+        lines = f.read().split('\n')
+
+    for edit in edits:
+        if edit.line is not None:
+            index = edit.line - 1
+        else:
+            index = next((i for i, line in enumerate(lines) if edit.old in line), -1)
+        if not 0 <= index < len(lines) or edit.old not in lines[index]:
+            raise ValueError(f"'{edit.old}' not found{f' on line {edit.line}' if edit.line else ''}, the file changed since it was validated")
+        lines[index] = lines[index].replace(edit.old, edit.new, 1)
+
+    # Write next to the file, so the replace doesn't cross file systems
+    fd, temp_path = tempfile.mkstemp(prefix=f".{file_path.name}.", suffix='.tmp', dir=file_path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write('\n'.join(lines))
+        os.chmod(temp_path, file_path.stat().st_mode & 0o7777)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def apply_fixes(plan: FixPlan, project_root: Path) -> List[str]:
+    """Rewrite every file of the plan once, and return the errors of the files that couldn't be rewritten."""
+    errors = []
+    for rel_path, edits in sorted(plan.edits.items()):
+        try:
+            rewrite_file(project_root / rel_path, edits)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            errors.append(f"Could not fix {rel_path}: {e}")
+    return errors
+
+
+def print_plan(plan: FixPlan):
+    if plan.changes:
+        print(f"\nFixes in {len(plan.edits)} file(s):")
+        for change in plan.changes:
+            print(f"  {change}")
+    else:
+        print("\nNothing to fix")
+    for problem in plan.unfixable:
+        print(f"  Can't fix: {problem}")
@@ -0,0 +1,163 @@
+"""
+Error records of the Godot project validator and the formats they're reported in.
+
+Errors are kept as small records and only formatted into messages when
+they're printed. Every reporter writes each error as soon as it's found,
+so CI shows the first failures before the scan is done.
+"""
+
+import json
+import posixpath
+from urllib.parse import quote
+from pathlib import Path
+from typing import Dict, List, Optional, NamedTuple, TextIO
+
+# Error codes, with a description and the message template of each.
+# Messages without a {file} are prefixed with the file and line.
+ERROR_CODES: Dict[str, tuple] = {
+    'read-error': ("A file could not be read", "Error reading {file}: {detail}"),
+    'validate-error': ("A file could not be validated", "Error validating {file}: {detail}"),
+    'invalid-uid-file': (".uid file doesn't contain a UID", "Invalid UID file format: {file} (content: '{detail}')"),
+    'uid-file-without-resource': (".uid file without the file it belongs to", "UID file {file} has no corresponding resource file"),
+    'import-file-without-asset': (".import file without the asset it belongs to", ".import file {file} has no corresponding asset file"),
+    'resource-without-uid': ("Scene or resource without a UID in its header", "{suffix} file {file} has no UID"),
+    'binary-uid-unreadable': ("UID of a binary resource is invalid", "Error reading UID from binary file {file}"),
+    'ext-resource-missing-type': ("ext_resource without a type", "Missing type for ext_resource '{detail}'"),
+    'ext-resource-missing-path': ("ext_resource without a path", "Missing path for ext_resource '{detail}'"),
+    'ext-resource-missing-uid': ("ext_resource without a UID", "Missing UID for ext_resource '{detail}'"),
+    'ext-resource-uid-mismatch': ("ext_resource UID belongs to another path", "UID '{uid}' represents '{detail}', but the ext_resource thinks it's '{path}'"),
+    'missing-file': ("Reference to a res:// path that doesn't exist", "The file '{path}' does not exist"),
+    'missing-uid': ("Reference to a uid:// that doesn't exist", "The UID '{uid}' does not exist"),
+    'file-without-uid': ("Scene or resource without any UID", "The file has no UID defined"),
+    'lfs-pointer': ("Git LFS object that wasn't pulled", "{file} is a Git LFS pointer, its content wasn't pulled (run git lfs pull)"),
+    'duplicate-uid': ("UID used by more than one path", "Duplicate UID {uid} found in: {detail}"),
+    'uid-count-mismatch': ("Number of paths and UIDs differ", "{detail}"),
+}
+
+
+class ValidationError(NamedTuple):
+    """
+    A single validation error.
+
+    file is relative to the project root, uid and path are the UID and the
+    res:// path the error is about, and detail is whatever else the message
+    of the code needs. For references in scripts, detail is the kind of call
+    they're passed to (e.g. preload).
+    """
+    code: str
+    file: Optional[str] = None
+    line: Optional[int] = None
+    uid: Optional[str] = None
+    path: Optional[str] = None
+    detail: Optional[str] = None
+
+    def message(self) -> str:
+        template = ERROR_CODES[self.code][1]
+        return template.format(suffix=posixpath.splitext(self.file or '')[1], **self._asdict())
+
+    def __str__(self) -> str:
+        message = self.message()
+        if self.file is None or '{file}' in ERROR_CODES[self.code][1]:
+            return message
+        if self.line is None:
+            return f"{self.file}: {message}"
+        return f"{self.file}:{self.line}: {message}"
+
+
+def print_results(errors: List[ValidationError], uid_count: int):
+    """Print validation results, as the watching validator does after each update."""
+    if errors:
+        print("\nErrors:")
+        for error in errors:
+            print(f"  {error}")
+    print_summary(errors, uid_count)
+
+
+def print_summary(errors: List[ValidationError], uid_count: int, output: Optional[TextIO] = None):
+    """Print the counts that follow the errors."""
+    if errors:
+        print(f"\nFound {len(errors)} error(s)", file=output)
+    else:
+        print("\nAll UID and path validations passed!", file=output)
+
+    print(f"Found {uid_count} unique UIDs", file=output)
+
+
+class TextReporter:
+    """The human readable report: each error as it's found, then a summary."""
+
+    def __init__(self, output: TextIO):
+        self.output = output
+        self._errors = 0
+
+    def error(self, error: ValidationError):
+        if not self._errors:
+            self.output.write("\nErrors:\n")
+        self.output.write(f"  {error}\n")
+        self.output.flush()
+        self._errors += 1
+
+    def finish(self, errors: List[ValidationError], uid_count: int):
+        print_summary(errors, uid_count, self.output)
+
+
+class JsonReporter:
+    """JSON Lines: an object per error as it's found, then a summary object."""
+
+    def __init__(self, output: TextIO):
+        self.output = output
+
+    def error(self, error: ValidationError):
+        record = error._asdict()
+        record['message'] = str(error)
+        self.output.write(json.dumps(record) + '\n')
+        self.output.flush()
+
+    def finish(self, errors: List[ValidationError], uid_count: int):
+        self.output.write(json.dumps({'summary': {'errors': len(errors), 'unique_uids': uid_count}}) + '\n')
+        self.output.flush()
+
+
+class SarifReporter:
+    """
+    SARIF 2.1.0 for code scanning tools, e.g. GitHub's.
+
+    The document is written in pieces: the header right away, a result per
+    error as it's found and the end once validation is done.
+    """
+
+    def __init__(self, output: TextIO, project_root: Path):
+        self.output = output
+        self._results = 0
+        rules = [
+            {'id': code, 'shortDescription': {'text': description}}
+            for code, (description, _) in ERROR_CODES.items()
+        ]
+        header = json.dumps({
+            'version': '2.1.0',
+            '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+            'runs': [{
+                'tool': {'driver': {'name': 'validate_godot_project', 'rules': rules}},
+                'originalUriBaseIds': {'PROJECTROOT': {'uri': project_root.resolve().as_uri() + '/'}},
+                'results': [],
+            }],
+        })
+        # Leave the results array open
+        self.output.write(header[:header.rindex('[]')] + '[\n')
+        self.output.flush()
+
+    def error(self, error: ValidationError):
+        result = {'ruleId': error.code, 'level': 'error', 'message': {'text': error.message()}}
+        if error.file is not None:
+            location = {'artifactLocation': {'uri': quote(error.file), 'uriBaseId': 'PROJECTROOT'}}
+            if error.line is not None:
+                location['region'] = {'startLine': error.line}
+            result['locations'] = [{'physicalLocation': location}]
+
+        self.output.write((',\n' if self._results else '') + json.dumps(result))
+        self.output.flush()
+        self._results += 1
+
+    def finish(self, errors: List[ValidationError], uid_count: int):
+        self.output.write('\n]}]}\n')
+        self.output.flush()
@@ -0,0 +1,409 @@
+"""
+Watch mode for the Godot project validator.
+
+A long-running validator keeps the UID mappings and the facts of every file
+in memory, follows changes on disk (inotify on Linux, polling elsewhere) and
+only validates the changed files and the files that reference them again.
+Other processes, like the pre-commit hook, ask it for the current results
+over a local socket instead of scanning the whole project themselves.
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import socket
+import struct
+import selectors
+from pathlib import Path
+from typing import Dict, Set, List, Tuple, Optional, Callable
+
+# Changes that arrive within this many seconds are validated together,
+# editors and git tend to write several files in a row
+SETTLE_DELAY = 0.1
+QUERY_TIMEOUT = 10.0
+MAX_REQUEST_SIZE = 64 * 1024
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+INOTIFY_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                      | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    """
+    Finds changed paths by walking the project again and comparing size and mtime.
+
+    Works everywhere, at the cost of a stat per file and directory on every poll.
+    """
+
+    def __init__(self, project_root: Path, excluded_dirs: Set[str], interval: float):
+        self.project_root = project_root
+        self.excluded_dirs = excluded_dirs
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+        self._last_poll = time.monotonic()
+
+    def fileno(self) -> Optional[int]:
+        return None
+
+    def timeout(self) -> float:
+        return max(0.0, self._last_poll + self.interval - time.monotonic())
+
+    def read_changes(self, force: bool = False) -> Optional[Set[str]]:
+        """Return the paths that changed since the last poll, once the interval passed."""
+        if not force and self.timeout() > 0:
+            return set()
+
+        snapshot = self._take_snapshot()
+        self._last_poll = time.monotonic()
+        old_snapshot, self._snapshot = self._snapshot, snapshot
+        return {rel_path for rel_path, _ in old_snapshot.items() ^ snapshot.items()}
+
+    def close(self):
+        pass
+
+    def _take_snapshot(self) -> Dict[str, Tuple[bool, int, int]]:
+        snapshot = {}
+        pending = [(str(self.project_root), '')]
+        while pending:
+            directory, rel_directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        rel_path = rel_directory + entry.name
+                        try:
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        # A directory's mtime changes with its entries, which are compared on their own
+                        snapshot[rel_path] = (is_dir, 0 if is_dir else stat.st_size, 0 if is_dir else stat.st_mtime_ns)
+                        if is_dir and entry.name not in self.excluded_dirs:
+                            pending.append((entry.path, rel_path + '/'))
+            except OSError:
+                continue
+        return snapshot
+
+
+class InotifyWatcher:
+    """
+    Follows changes with Linux inotify, through ctypes so no extra package is needed.
+
+    inotify isn't recursive, so every directory gets its own watch, and
+    directories that are created or moved in later are added as they appear.
+    """
+
+    def __init__(self, project_root: Path, excluded_dirs: Set[str]):
+        import ctypes
+        import ctypes.util
+
+        self.project_root = project_root
+        self.excluded_dirs = excluded_dirs
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        self._directories: Dict[int, str] = {}
+        self._add_tree(str(project_root), '')
+
+    def fileno(self) -> Optional[int]:
+        return self._fd
+
+    def timeout(self) -> Optional[float]:
+        return None
+
+    def read_changes(self, force: bool = False) -> Optional[Set[str]]:
+        """
+        Return the paths of all queued events.
+
+        Returns None when the kernel dropped events, in which case the
+        project has to be scanned again.
+        """
+        changes = set()
+        while True:
+            try:
+                data = os.read(self._fd, 256 * 1024)
+            except BlockingIOError:
+                return changes
+            if not data:
+                return changes
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if mask & IN_IGNORED:
+                    self._directories.pop(wd, None)
+                    continue
+
+                rel_directory = self._directories.get(wd)
+                if rel_directory is None:
+                    continue
+                if not name:
+                    # The watched directory itself was deleted or moved
+                    if rel_directory:
+                        changes.add(rel_directory.rstrip('/'))
+                    continue
+
+                rel_path = rel_directory + os.fsdecode(name)
+                changes.add(rel_path)
+                if mask & IN_ISDIR and mask & IN_MOVED_FROM:
+                    # The watches follow the directory, wherever it went they'd report the wrong paths
+                    self._remove_tree(rel_path + '/')
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and os.path.basename(rel_path) not in self.excluded_dirs:
+                    # Anything created in the directory before the watch was added is covered by its walk in refresh()
+                    self._add_tree(str(self.project_root / rel_path), rel_path + '/')
+
+    def close(self):
+        os.close(self._fd)
+
+    def _remove_tree(self, rel_directory: str):
+        for wd, watched in list(self._directories.items()):
+            if watched.startswith(rel_directory):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._directories[wd]
+
+    def _add_tree(self, directory: str, rel_directory: str):
+        pending = [(directory, rel_directory)]
+        while pending:
+            directory, rel_directory = pending.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), INOTIFY_WATCH_MASK)
+            if wd < 0:
+                # Gone already, or out of watches (fs.inotify.max_user_watches)
+                continue
+            self._directories[wd] = rel_directory
+
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and entry.name not in self.excluded_dirs:
+                            pending.append((entry.path, rel_directory + entry.name + '/'))
+            except OSError:
+                continue
+
+
+def create_watcher(project_root: Path, excluded_dirs: Set[str], poll_interval: float, use_polling: bool = False):
+    """Use inotify where it's available and fall back to polling."""
+    if not use_polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(project_root, excluded_dirs)
+        except (OSError, AttributeError) as e:
+            print(f"inotify is not available ({e}), polling every {poll_interval} seconds")
+    return PollingWatcher(project_root, excluded_dirs, poll_interval)
+
+
+class ValidationServer:
+    """
+    Keeps a validator up to date with the project and answers queries about it.
+
+    Queries are a single line of JSON, e.g. {"command": "status"}, and are
+    answered with a single line of JSON. Pending changes are always applied
+    before answering, so a query never sees results older than the files.
+    """
+
+    def __init__(self, make_validator: Callable, socket_path: Path, poll_interval: float = 1.0, use_polling: bool = False):
+        self.make_validator = make_validator
+        self.socket_path = socket_path
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling
+        self.validator = None
+        self.watcher = None
+        self.selector = selectors.DefaultSelector()
+        self.listener = None
+        self._running = False
+
+    def serve_forever(self):
+        self.listener = self._listen()
+        try:
+            self._scan()
+            self.selector.register(self.listener, selectors.EVENT_READ, 'query')
+            print(f"\nWatching {self.validator.project_root.as_posix()}, queries on {self.socket_path.as_posix()}")
+
+            self._running = True
+            while self._running:
+                timeout = self.watcher.timeout()
+                for key, _ in self.selector.select(timeout):
+                    if key.data == 'query':
+                        self._answer(self.listener.accept()[0])
+                    elif key.data == 'changes':
+                        time.sleep(SETTLE_DELAY)
+                        self._sync()
+
+                if self.watcher.fileno() is None:
+                    self._sync()
+        finally:
+            self.close()
+
+    def close(self):
+        self._running = False
+        if self.watcher is not None:
+            self.watcher.close()
+        if self.listener is not None:
+            self.listener.close()
+            if hasattr(socket, 'AF_UNIX'):
+                try:
+                    self.socket_path.unlink()
+                except OSError:
+                    pass
+        self.selector.close()
+
+    def _scan(self):
+        """Scan the whole project, e.g. on start or after inotify dropped events."""
+        if self.watcher is not None:
+            if self.watcher.fileno() is not None:
+                self.selector.unregister(self.watcher.fileno())
+            self.watcher.close()
+
+        self.validator = self.make_validator()
+        # Start watching before the scan, so nothing changes unnoticed in between
+        self.watcher = create_watcher(self.validator.project_root, self.validator.excluded_dirs,
+                                      self.poll_interval, self.use_polling)
+        if self.watcher.fileno() is not None:
+            self.selector.register(self.watcher.fileno(), selectors.EVENT_READ, 'changes')
+
+        self.validator.scan_project()
+        self.validator.print_results()
+
+    def _sync(self, force: bool = False):
+        """Apply the pending changes to the validator."""
+        changes = self.watcher.read_changes(force)
+        if changes is None:
+            print("\nMissed file changes, scanning the project again")
+            self._scan()
+            return
+        if not changes:
+            return
+
+        t0 = time.time()
+        revalidated = self.validator.refresh(changes)
+        print(f"\n{len(changes)} path(s) changed, validated {len(revalidated)} file(s) again in {time.time() - t0} seconds")
+        self.validator.print_results()
+
+    def _answer(self, connection: socket.socket):
+        with connection:
+            connection.settimeout(QUERY_TIMEOUT)
+            try:
+                request = json.loads(_read_line(connection, MAX_REQUEST_SIZE) or '{}')
+                self._sync(force=True)
+                response = self._handle(request)
+            except (OSError, ValueError) as e:
+                response = {'error': str(e)}
+
+            try:
+                connection.sendall(json.dumps(response).encode('utf-8') + b'\n')
+            except OSError:
+                pass
+
+    def _handle(self, request: dict) -> dict:
+        command = request.get('command', 'status')
+        if command == 'status':
+            return {
+                'errors': [error._asdict() for error in self.validator.errors],
+                'warnings': self.validator.warning_messages(),
+                'uid_count': len(self.validator.uid_to_path),
+            }
+        if command == 'stop':
+            self._running = False
+            return {'stopped': True}
+        return {'error': f"Unknown command '{command}'"}
+
+    def _listen(self) -> socket.socket:
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if hasattr(socket, 'AF_UNIX'):
+            if self.socket_path.exists():
+                if _connect(self.socket_path) is not None:
+                    raise RuntimeError(f"Another validator is already watching, see {self.socket_path.as_posix()}")
+                # Left over from a validator that didn't shut down cleanly
+                self.socket_path.unlink()
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(str(self.socket_path))
+        else:
+            # No unix sockets, listen on a local port and leave the port number where the socket would be
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.bind(('127.0.0.1', 0))
+            self.socket_path.write_text(str(listener.getsockname()[1]), encoding='utf-8')
+
+        listener.listen()
+        return listener
+
+
+def query(socket_path: Path, command: str = 'status') -> Optional[dict]:
+    """Ask a running validator for its results, or return None if none is running."""
+    connection = _connect(socket_path)
+    if connection is None:
+        return None
+
+    with connection:
+        try:
+            connection.settimeout(QUERY_TIMEOUT)
+            connection.sendall(json.dumps({'command': command}).encode('utf-8') + b'\n')
+            response = json.loads(_read_line(connection))
+        except (OSError, ValueError):
+            return None
+
+    if 'error' in response:
+        return None
+    return response
+
+
+def _connect(socket_path: Path) -> Optional[socket.socket]:
+    try:
+        if hasattr(socket, 'AF_UNIX'):
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address = str(socket_path)
+        else:
+            connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = ('127.0.0.1', int(socket_path.read_text(encoding='utf-8')))
+    except (OSError, ValueError):
+        return None
+
+    try:
+        connection.settimeout(QUERY_TIMEOUT)
+        connection.connect(address)
+    except OSError as e:
+        connection.close()
+        if e.errno not in (None, errno.ENOENT, errno.ECONNREFUSED):
+            print(f"Could not reach the watching validator: {e}")
+        return None
+    return connection
+
+
+def _read_line(connection: socket.socket, limit: Optional[int] = None) -> str:
+    """Read a line of the protocol, raising ValueError if it's longer than the limit."""
+    chunks: List[bytes] = []
+    size = 0
+    while True:
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        if b'\n' in chunk:
+            break
+        if limit is not None and size > limit:
+            raise ValueError("Request is too long")
+    return b''.join(chunks).split(b'\n', 1)[0].decode('utf-8')
@@ -13,223 +13,1632 @@ PLS BLAME CLAUDE, I ONLY MADE IT WORK 😭
 
 import os
 import re
+import mmap
 import sys
 import time
+import marshal
+import gc
 import struct
+import tempfile
+import bisect
+import hashlib
+import posixpath
+import functools
+import contextlib
+from itertools import accumulate, chain, repeat
+from operator import add
 from pathlib import Path
-from typing import Dict, Set, List, Tuple, Optional
+from typing import Dict, Set, List, Tuple, Optional, NamedTuple, Iterator, Iterable, Callable, Sequence
 from collections import defaultdict
 
+from godot_compression import CompressedFile
+from godot_reports import ValidationError, TextReporter, JsonReporter, SarifReporter, print_results
+
+
+# File types that can contain UIDs and resource references
+GODOT_FILE_EXTENSIONS = ('.tscn', '.tres', '.gd', '.cs', '.uid', '.json', '.cfg', '.import', '.godot', '.mesh', '.res', '.scn')
+# File types whose UID is collected in the first pass
+UID_SOURCE_EXTENSIONS = ('.mesh', '.res', '.scn', '.uid', '.tscn', '.tres', '.import')
+# Binary resources, which can't be read as text and have their UID in the header
+BINARY_EXTENSIONS = ('.mesh', '.res', '.scn')
+# How much of a binary resource is read to find its UID, the header is well within this
+BINARY_HEADER_READ_SIZE = 4096
+# ResourceFormatSaverBinary's FORMAT_FLAG_UIDS
+BINARY_FLAG_UIDS = 2
+# Files tracked by Git LFS are checked out as pointers until their objects are pulled.
+# Pointers start with this line and are smaller than LFS_POINTER_MAX_SIZE (see the Git LFS spec).
+LFS_POINTER_SIGNATURE = b'version https://git-lfs.github.com/spec/v1'
+LFS_POINTER_MAX_SIZE = 1024
+# UID kept for binary resources that are Git LFS pointers, like "uid://<invalid>" for unreadable ones
+LFS_POINTER_UID = "uid://<lfs-pointer>"
+# Godot text resources, parsed with tokenize_resource()
+RESOURCE_TEXT_EXTENSIONS = ('.tscn', '.tres')
+# Scripts, parsed with tokenize_script()
+SCRIPT_EXTENSIONS = ('.gd', '.cs')
+# Files that make Godot skip the directory they're in, and everything below it
+DIRECTORY_IGNORE_MARKERS = ('.gdignore', 'project.godot')
+# Kinds of the references in these sections of project.godot
+PROJECT_REFERENCE_KINDS = {'autoload': 'autoload', 'editor_plugins': 'editor_plugin'}
+# Sections that Godot writes before any sub_resource, node or resource section
+PREAMBLE_SECTIONS = ('gd_scene', 'gd_resource', 'ext_resource')
+# Sections of a text resource whose headers the validator needs
+VALIDATED_SECTIONS = PREAMBLE_SECTIONS
+# Where the facts cache is kept, relative to the project root
+DEFAULT_CACHE_FILE = '.godot/validate_godot_project.cache'
+# Help of the --cache-file option of the validator and the scripts built on it
+CACHE_FILE_HELP = f'Where the validator keeps parsed file facts between runs (default: <project-root>/{DEFAULT_CACHE_FILE})'
+# Below this many files per worker, starting a process pool costs more than it saves
+MIN_FILES_PER_JOB = 32
+
+
+def _is_lfs_pointer_size(file) -> bool:
+    """Check whether a file (a path or an os.DirEntry, whose stat the walk may have already) is small enough to be a Git LFS pointer."""
+    try:
+        return file.stat().st_size < LFS_POINTER_MAX_SIZE
+    except OSError:
+        return False
+
+
+def is_lfs_pointer(file_path: str) -> bool:
+    """Check whether a file is a Git LFS pointer, from its size and its first bytes."""
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size >= LFS_POINTER_MAX_SIZE:
+                return False
+            return f.read(len(LFS_POINTER_SIGNATURE)) == LFS_POINTER_SIGNATURE
+    except OSError:
+        return False
+
+
+class FileContentReader:
+    """Reads and decodes text files, hashing the raw bytes on the way."""
+
+    def __init__(self, mmap_threshold: int = 1024 * 1024):
+        self.mmap_threshold = mmap_threshold
+        self.reads = 0
+        self.bytes_read = 0
+
+    def read(self, file_path: str) -> Tuple[str, str]:
+        """Return the text of a file and the digest of its bytes."""
+        self.reads += 1
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size and size >= self.mmap_threshold:
+                # Decode straight from the mapping, without an intermediate bytes copy
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    with memoryview(mapped) as view:
+                        digest = hashlib.sha1(view).hexdigest()
+                        content = str(view, 'utf-8-sig')
+            else:
+                data = f.read()
+                digest = hashlib.sha1(data).hexdigest()
+                content = data.decode('utf-8-sig')
+        self.bytes_read += size
+
+        # Match the universal newline handling of text mode reads
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content, digest
+
+
+class LineIndex:
+    """
+    Maps character offsets in a text to 1-based line numbers.
+
+    The newline offsets are collected once, on the first lookup, so resolving
+    a line is a bisect instead of counting newlines in the prefix every time.
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        self._line_starts: Optional[List[int]] = None
+
+    @property
+    def line_starts(self) -> List[int]:
+        if self._line_starts is None:
+            # Each line starts one past the end of the previous one, summed without a Python level loop
+            lengths = map(add, map(len, self.content.split('\n')), repeat(1))
+            self._line_starts = [0, *accumulate(lengths)][:-1]
+        return self._line_starts
+
+    def line_number(self, offset: int) -> int:
+        """Return the line number of the character at offset."""
+        return bisect.bisect_right(self.line_starts, offset)
+
+    def line(self, line_number: int) -> str:
+        """Return the text of a line, without its newline."""
+        starts = self.line_starts
+        start = starts[line_number - 1]
+        end = starts[line_number] - 1 if line_number < len(starts) else len(self.content)
+        return self.content[start:end]
+
+
+class PathIndex:
+    """
+    Answers existence checks for project paths from the initial walk.
+
+    Paths are relative to the project root in posix form, like res:// paths
+    without the prefix. A path that is missing from a directory the walk
+    listed doesn't exist; anything else the walk didn't see (e.g. inside an
+    excluded directory) falls back to a stat, which is memoized as well.
+    Paths left out of the export that is validated don't exist either.
+    """
+
+    def __init__(self, project_root: Path, export_filter: Optional['ExportFilter'] = None):
+        self.project_root = project_root
+        self.export_filter = export_filter
+        self.paths: Set[str] = {''}
+        self.listed_dirs: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self._stat_results: Dict[str, bool] = {}
+
+    def add(self, rel_path: str):
+        self.paths.add(rel_path)
+
+    def update(self, rel_paths: Iterable[str]):
+        self.paths.update(rel_paths)
+
+    def add_listed_dir(self, rel_path: str):
+        self.listed_dirs.add(rel_path)
+
+    def remove(self, rel_path: str) -> List[str]:
+        """Forget a path and, for a listed directory, everything below it. Returns the removed paths."""
+        if rel_path not in self.paths:
+            return []
+
+        self.paths.discard(rel_path)
+        removed = [rel_path]
+        if rel_path in self.listed_dirs:
+            prefix = rel_path + '/'
+            children = [path for path in self.paths if path.startswith(prefix)]
+            self.paths.difference_update(children)
+            self.listed_dirs = {path for path in self.listed_dirs if path != rel_path and not path.startswith(prefix)}
+            removed.extend(children)
+        return removed
+
+    def forget_stats(self):
+        """Drop memoized stat results, e.g. after files changed on disk."""
+        self._stat_results.clear()
+
+    def exists(self, rel_path: str) -> bool:
+        """Check whether a path relative to the project root exists."""
+        if rel_path in self.paths:
+            self.hits += 1
+            return True
+
+        normalized = posixpath.normpath(rel_path) if rel_path else ''
+        if normalized in self.paths:
+            self.hits += 1
+            return True
+
+        if posixpath.dirname(normalized) in self.listed_dirs:
+            self.hits += 1
+            return False
+
+        if self.export_filter is not None and self.export_filter.excludes(normalized):
+            self.hits += 1
+            return False
+
+        if normalized in self._stat_results:
+            self.hits += 1
+            return self._stat_results[normalized]
+
+        self.misses += 1
+        exists = (self.project_root / normalized).exists()
+        self._stat_results[normalized] = exists
+        return exists
+
+
+# String literals that reference a resource, with escaped quotes
+RESOURCE_STRING_PATTERN = re.compile(r'"((?:res|uid)://[^"\\]*(?:\\.[^"\\]*)*)"')
+# Attributes of a section header, like path="res://..."
+HEADER_ATTRIBUTE_PATTERN = re.compile(r'(\w+)="([^"\\]*(?:\\.[^"\\]*)*)"')
+# The first header after the preamble
+BODY_START_PATTERN = re.compile(r'\n\[(?!(?:' + '|'.join(PREAMBLE_SECTIONS) + r')\b)')
+# Packed arrays of numbers, which hold most of a large scene (mesh, animation and collision data) and can't contain strings
+NUMERIC_ARRAY_TYPES = (
+    'PackedByteArray', 'PackedInt32Array', 'PackedInt64Array', 'PackedFloat32Array', 'PackedFloat64Array',
+    'PackedVector2Array', 'PackedVector3Array', 'PackedVector4Array', 'PackedColorArray',
+)
+
+
+def _outside_numeric_arrays(content: str) -> Iterator[Tuple[int, int]]:
+    """
+    The (start, end) spans of a resource around the values of numeric packed arrays.
+
+    Finding the closing parenthesis of an array with str.find() is several
+    times faster than scanning its values for strings with a regex.
+    """
+    find = content.find
+    start = search = 0
+    while True:
+        array = find('Array(', search)
+        if array < 0:
+            break
+        search = array + len('Array(')
+        if not content.endswith(NUMERIC_ARRAY_TYPES, 0, search - 1):
+            continue
+        close = find(')', search)
+        if close < 0:
+            break
+        # Array values have no quotes, unlike a string that happens to contain the type name
+        if find('"', search, close) >= 0:
+            continue
+        yield start, array
+        start = search = close + 1
+    yield start, len(content)
+
+
+@functools.lru_cache(maxsize=None)
+def _section_header_patterns(sections: Tuple[str, ...]):
+    """Patterns for the headers of the given sections, at the start of the file and after a newline."""
+    body = (
+        r'\[(' + '|'.join(sections) + r')\b'
+        # Attributes, where quoted values may contain "]"
+        r'[^\]"\n]*(?:"[^"\\\n]*(?:\\.[^"\\\n]*)*"[^\]"\n]*)*\]'
+    )
+    # The newline gives the search a literal prefix, which is much faster than anchoring with ^
+    return re.compile(body), re.compile(r'\n' + body)
+
+
+class ResourceToken(NamedTuple):
+    """A section header or resource string literal of a Godot text resource."""
+    # Section name (e.g. "ext_resource"), or "string" for string literals
+    kind: str
+    # The full header including brackets, or the value of the string literal
+    text: str
+    line: int
+
+
+def tokenize_resource(content: str, sections: Tuple[str, ...] = VALIDATED_SECTIONS) -> Iterator[ResourceToken]:
+    """
+    Tokenize a .tscn/.tres file in a single pass, in document order.
+
+    Yields the headers of the given sections and every quoted res:// or uid://
+    string, including those inside headers. Line numbers are counted as the
+    tokens are produced, so no line index has to be built. Only reference
+    strings are tokenized, as scanning every literal is several times slower
+    and the validator doesn't need the others.
+
+    When only preamble sections are asked for, headers are only searched for
+    up to the first sub_resource/node/resource section, which for large
+    scenes is a small fraction of the file. The values of numeric packed
+    arrays, which can't hold strings, are skipped over without a regex.
+    """
+    first_header_pattern, header_pattern = _section_header_patterns(sections)
+    header_end = len(content)
+    if set(sections) <= set(PREAMBLE_SECTIONS):
+        body_start = BODY_START_PATTERN.search(content)
+        if body_start:
+            header_end = body_start.start()
+
+    headers = header_pattern.finditer(content, 0, header_end)
+    # The values of numeric arrays are skipped, they are the bulk of large scenes
+    strings = chain.from_iterable(
+        RESOURCE_STRING_PATTERN.finditer(content, start, end) for start, end in _outside_numeric_arrays(content)
+    )
+    count = content.count
+    # ResourceToken() without the Python level __new__, which costs more than finding a token
+    token = functools.partial(tuple.__new__, ResourceToken)
+    line = 1
+    last = 0
+
+    first_header = first_header_pattern.match(content)
+    if first_header:
+        yield token((first_header.group(1), first_header.group(), 1))
+
+    header = next(headers, None)
+    # None marks the end, after which the remaining headers are yielded
+    for string in chain(strings, (None,)):
+        string_start = string.start() if string is not None else len(content) + 1
+        while header is not None and header.start() < string_start:
+            start = header.start() + 1  # Skip the newline
+            line += count('\n', last, start)
+            last = start
+            yield token((header.group(1), header.group()[1:], line))
+            header = next(headers, None)
+        if string is None:
+            break
+        line += count('\n', last, string_start)
+        last = string_start
+        yield token(('string', string.group(1), line))
+
+
+def parse_header_attributes(header: str) -> Dict[str, str]:
+    """Parse the quoted attributes of a section header."""
+    return dict(HEADER_ATTRIBUTE_PATTERN.findall(header))
+
+
+# Lookaheads for the start of a reference string literal
+_REFERENCE = r'(?=(?:res|uid)://)'
+_NOT_REFERENCE = r'(?!(?:res|uid)://)'
+# GDScript, matching everything up to and including the next res:// or uid://
+# string literal. Comments and other literals are skipped inside the regex
+# engine, so there's only a Python level step per reference. Unterminated
+# quotes are skipped on their own, so the match can't fail and backtrack.
+# StringName (&"..."), NodePath (^"...") and raw (r"...") prefixes don't change
+# where a literal ends, so they're left to the skipped code around it.
+GDSCRIPT_REFERENCE_PATTERN = re.compile(rf'''
+    (?:
+        [^#"']+
+      | \#[^\n]*
+      | """{_NOT_REFERENCE}(?:[^"\\]|\\.|"(?!""))*"""
+      | \'\'\'{_NOT_REFERENCE}(?:[^'\\]|\\.|'(?!\'\'))*\'\'\'
+      | "(?!""){_NOT_REFERENCE}(?:[^"\\\n]|\\.)*"
+      | '(?!\'\'){_NOT_REFERENCE}(?:[^'\\\n]|\\.)*'
+      | ["'](?!["']{{0,2}}(?:res|uid)://)
+    )*
+    (?:
+        (?P<literal>
+            """{_REFERENCE}(?:[^"\\]|\\.|"(?!""))*"""
+          | \'\'\'{_REFERENCE}(?:[^'\\]|\\.|'(?!\'\'))*\'\'\'
+          | "{_REFERENCE}(?:[^"\\\n]|\\.)*"
+          | '{_REFERENCE}(?:[^'\\\n]|\\.)*'
+        )
+      | ["']
+      | \Z
+    )
+''', re.VERBOSE | re.DOTALL)
+# The same for C#, with character literals, verbatim (@"...") and raw ("""...""")
+# strings. Strings inside the holes of interpolated strings aren't tracked.
+CSHARP_REFERENCE_PATTERN = re.compile(rf'''
+    (?:
+        [^/'"@$]+
+      | //[^\n]*
+      | /\*.*?\*/
+      | '(?:[^'\\\n]|\\.)*'
+      | \$*(?P<skipped_quotes>"{{3,16}}){_NOT_REFERENCE}.*?(?P=skipped_quotes)
+      | (?:\$@|@\$?)"{_NOT_REFERENCE}(?:[^"]|"")*"
+      | \$?"(?!""){_NOT_REFERENCE}(?:[^"\\\n]|\\.)*"
+      | /
+      | [@$](?!")
+      | ['"](?!"*(?:res|uid)://)
+    )*
+    (?:
+        (?P<literal>
+            \$*(?P<quotes>"{{3,16}}){_REFERENCE}.*?(?P=quotes)
+          | (?:\$@|@\$?)"{_REFERENCE}(?:[^"]|"")*"
+          | \$?"{_REFERENCE}(?:[^"\\\n]|\\.)*"
+        )
+      | [@$'"]
+      | \Z
+    )
+''', re.VERBOSE | re.DOTALL)
+# The call a string literal is the first argument of, e.g. "ResourceLoader.load" or "GD.Load<PackedScene>"
+SCRIPT_CALL_PATTERN = re.compile(r'([\w.]+)\s*(?:<[\w.<>, ]*>)?\s*\(\s*[&^@$]?[rR]?$')
+# How far back from a string literal the call is looked for
+SCRIPT_CALL_CONTEXT = 120
+# Methods whose argument is allowed to not exist, normalized to lower case without underscores
+EXISTENCE_CHECK_METHODS = frozenset(('exists', 'fileexists', 'direxists', 'direxistsabsolute'))
+
+
+class ScriptString(NamedTuple):
+    """A res:// or uid:// string literal in the code of a script."""
+    # "preload", "load" or "ResourceLoader" for the call the string is passed to, else "other"
+    kind: str
+    text: str
+    line: int
+
+
+def _script_call_kind(content: str, start: int) -> Optional[str]:
+    """Classify the string literal at start by the call it's passed to, None for existence checks."""
+    call = SCRIPT_CALL_PATTERN.search(content, max(0, start - SCRIPT_CALL_CONTEXT), start)
+    if call is None:
+        return 'other'
+
+    name = call.group(1)
+    method = name.rpartition('.')[2].replace('_', '').lower()
+    if method in EXISTENCE_CHECK_METHODS:
+        return None
+    if name == 'preload':
+        return 'preload'
+    if name.startswith('ResourceLoader.'):
+        return 'ResourceLoader'
+    if method == 'load':
+        return 'load'
+    return 'other'
+
+
+def tokenize_script(content: str, suffix: str) -> Iterator[ScriptString]:
+    """
+    Yield the res:// and uid:// string literals in the code of a .gd or .cs file.
+
+    A single pass over the file skips comments and every other literal, so
+    paths in comments or inside other literals aren't references, and multi-line
+    strings keep the line numbers of everything after them right. Strings
+    passed to an existence check (FileAccess.file_exists, DirAccess.dir_exists,
+    ResourceLoader.exists) are left out, as they may name files that are
+    expected to be missing.
+    """
+    # Most scripts don't reference anything, which a substring search finds out much faster than the lexer.
+    # Otherwise lexing stops after the line of the last reference, as paths don't span lines.
+    end = max(content.rfind('res://'), content.rfind('uid://'))
+    if end < 0:
+        return
+    end = content.find('\n', end)
+    if end < 0:
+        end = len(content)
+
+    pattern = CSHARP_REFERENCE_PATTERN if suffix == '.cs' else GDSCRIPT_REFERENCE_PATTERN
+    count = content.count
+    line = 1
+    last = 0
+    for match in pattern.finditer(content, 0, end):
+        literal = match.group('literal')
+        if literal is None:
+            continue
+
+        start = match.start('literal')
+        kind = _script_call_kind(content, start)
+        if kind is None:
+            continue
+        # Strip the prefix and the quotes, of which triple-quoted and raw strings have several
+        body = literal.lstrip('$@')
+        quotes = len(body) - len(body.lstrip(body[0]))
+        text = body[quotes:-quotes]
+        line += count('\n', last, start)
+        last = start
+        yield ScriptString(kind, text, line)
+
+
+# A key=value line of a Godot config file like project.godot or export_presets.cfg
+CONFIG_KEY_PATTERN = re.compile(r'([A-Za-z_][\w/.\-]*)\s*=\s*(.*)')
+CONFIG_SECTION_PATTERN = re.compile(r'\[([^\]]+)\]\s*')
+# Quoted strings in a config value, e.g. the items of a PackedStringArray
+CONFIG_STRING_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+
+class ConfigValue(NamedTuple):
+    """A value of a Godot config file, as written, and the line its key is on."""
+    text: str
+    line: int
+
+    def string(self) -> Optional[str]:
+        """The value of a quoted string, None for other values."""
+        match = CONFIG_STRING_PATTERN.fullmatch(self.text.strip())
+        return match.group(1).replace('\\"', '"').replace('\\\\', '\\') if match else None
+
+    def strings(self) -> List[str]:
+        """Every quoted string in the value, e.g. the items of a PackedStringArray."""
+        return [text.replace('\\"', '"').replace('\\\\', '\\') for text in CONFIG_STRING_PATTERN.findall(self.text)]
+
+
+def _is_unfinished_value(text: str) -> bool:
+    """Check whether a config value continues on the next line, i.e. has an open string or bracket."""
+    text = CONFIG_STRING_PATTERN.sub('', text)
+    return '"' in text or sum(map(text.count, '([{')) > sum(map(text.count, ')]}'))
+
+
+def parse_config_file(content: str) -> Dict[str, Dict[str, ConfigValue]]:
+    """
+    Parse the sections of a Godot config file, like ConfigFile does.
+
+    Values are kept as written; values that span several lines (like the
+    dictionaries of input actions) are joined. Keys before the first
+    section are in the "" section.
+    """
+    sections: Dict[str, Dict[str, ConfigValue]] = {'': {}}
+    section = sections['']
+    key = None
+    for line_number, line in enumerate(content.split('\n'), 1):
+        if key is not None:
+            value = section[key]
+            if _is_unfinished_value(value.text):
+                section[key] = ConfigValue(value.text + '\n' + line, value.line)
+                continue
+            key = None
+
+        stripped = line.strip()
+        if not stripped or stripped.startswith(';'):
+            continue
+
+        header = CONFIG_SECTION_PATTERN.fullmatch(stripped)
+        if header:
+            section = sections.setdefault(header.group(1), {})
+            key = None
+            continue
+
+        match = CONFIG_KEY_PATTERN.fullmatch(stripped)
+        if match:
+            key = match.group(1)
+            section[key] = ConfigValue(match.group(2), line_number)
+
+    return sections
+
+
+class ExportFilter:
+    """
+    The paths an export preset leaves out, from its exclude_filter.
+
+    Filters are matched like Godot does: case-insensitively against the path
+    with and without res://, where * also matches slashes. A filter like
+    "addons/tool/*" excludes the whole directory, so it can be pruned from
+    walks instead of matching every file below it.
+
+    export_mode is the preset's export_filter: "all_resources", "exclude"
+    (all except export_files, which are excluded like the filters are),
+    "scenes" or "resources" (export_files and their dependencies).
+    """
+
+    def __init__(self, filters: List[str], export_mode: str = 'all_resources', export_files: List[str] = ()):
+        self.filters = filters
+        self.export_mode = export_mode
+        self.export_files = list(export_files)
+        if export_mode == 'exclude':
+            filters = filters + self.export_files
+        patterns = []
+        self._dir_prefixes = []
+        for pattern in filters:
+            pattern = pattern.lower()
+            if pattern.startswith('res://'):
+                pattern = pattern[6:]
+            patterns.append(re.escape(pattern).replace(r'\*', '.*').replace(r'\?', '.'))
+            if pattern.endswith('*') and '*' not in pattern[:-1] and '?' not in pattern:
+                self._dir_prefixes.append(pattern[:-1])
+        self._dir_prefixes = tuple(self._dir_prefixes)
+        self._pattern = re.compile('|'.join(patterns)) if patterns else None
+
+    @classmethod
+    def from_presets(cls, project_root: Path, preset_name: str) -> 'ExportFilter':
+        """Read the filter of the preset with the given name from export_presets.cfg."""
+        presets_path = project_root / 'export_presets.cfg'
+        try:
+            content = presets_path.read_text(encoding='utf-8')
+        except OSError as e:
+            raise ValueError(f"Could not read {presets_path}: {e}")
+
+        names = []
+        for section, values in parse_config_file(content).items():
+            if not re.fullmatch(r'preset\.\d+', section) or 'name' not in values:
+                continue
+            name = values['name'].string()
+            names.append(name)
+            if name == preset_name:
+                exclude_filter = values['exclude_filter'].string() if 'exclude_filter' in values else None
+                export_mode = values['export_filter'].string() if 'export_filter' in values else None
+                export_files = values['export_files'].strings() if 'export_files' in values else []
+                return cls(
+                    [item.strip() for item in (exclude_filter or '').split(',') if item.strip()],
+                    export_mode or 'all_resources',
+                    export_files,
+                )
+
+        raise ValueError(f"No export preset named '{preset_name}' in {presets_path} (presets: {', '.join(map(str, names)) or 'none'})")
+
+    def excludes(self, rel_path: str) -> bool:
+        """Check whether a path relative to the project root is left out of the export, with the sidecars of such files."""
+        if self._pattern is None:
+            return False
+        rel_path = rel_path.lower()
+        if rel_path.startswith(self._dir_prefixes) or self._pattern.fullmatch(rel_path) is not None:
+            return True
+        owner, suffix = posixpath.splitext(rel_path)
+        return suffix in ('.import', '.uid') and self._pattern.fullmatch(owner) is not None
+
+    def excludes_dir(self, rel_path: str) -> bool:
+        """Check whether everything below a directory is left out of the export."""
+        return (rel_path.lower() + '/').startswith(self._dir_prefixes)
+
+
+class FileFacts(NamedTuple):
+    """
+    Everything the validator needs from a single file's content.
+
+    Facts only depend on the file itself, so they can be cached between runs
+    and checked against the rest of the project without re-reading the file.
+    """
+    # UID defined by the file (inline, .uid, .import or binary header)
+    uid: Optional[str]
+    # First line of a .uid file, for error messages
+    uid_line: str
+    # Whether a .tscn/.tres defines its UID in its header
+    has_inline_uid: bool
+    # (line number, block, type, uid, path) of every ext_resource
+    ext_resources: Sequence[Tuple[int, str, Optional[str], Optional[str], Optional[str]]]
+    # (path, line number, kind) of static res:// paths that aren't commented out or guarded by an existence check.
+    # The kind is what a script passes the path to (see ScriptString), "autoload" or "editor_plugin"
+    # in project.godot, and None otherwise.
+    res_paths: Sequence[Tuple[str, int, Optional[str]]]
+    # (uid, line number, kind) of quoted uid:// references
+    uid_paths: Sequence[Tuple[str, int, Optional[str]]]
+
+
+def _intern_optional(text: Optional[str]) -> Optional[str]:
+    return sys.intern(text) if text else text
+
+
+class FactsCache:
+    """
+    On-disk cache of FileFacts between validator runs.
+
+    Entries are keyed by the path relative to the project root and reused when
+    size and mtime_ns match. When only the mtime changed, the content hash
+    decides, so touched but unchanged files are not parsed again.
+
+    The cache is written with marshal, as tuples with the paths and UIDs
+    interned, so every string shared by several files is stored and loaded
+    once. Loading it is a large part of a run without changes, and this loads several
+    times faster than JSON. The file is only ever written by the validator,
+    one written by another Python version just fails to load.
+    """
+
+    VERSION = 9
+
+    def __init__(self, cache_file: Optional[Path]):
+        self.cache_file = cache_file
+        self.hits = 0
+        self._entries: Dict[str, list] = {}
+        self._used: Dict[str, list] = {}
+        self._dirty = False
+
+    def load(self):
+        """Load the cache file, starting empty if it's missing or stale."""
+        if not self.cache_file:
+            return
+
+        try:
+            # marshal.load() reads a file object by object, reading it at once is much faster
+            with open(self.cache_file, 'rb') as f:
+                content = f.read()
+        except OSError:
+            return
+
+        # Loading creates a tuple per reference, which would run the garbage collector over and over
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            data = marshal.loads(content)
+        except (EOFError, ValueError, TypeError):
+            return
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        if isinstance(data, dict) and data.get('version') == self.VERSION:
+            self._entries = data.get('files', {})
+
+    def get(self, rel_path: str, size: int, mtime_ns: int) -> Optional[FileFacts]:
+        """Return the cached facts if the file's size and mtime are unchanged."""
+        entry = self._entries.get(rel_path)
+        if entry is None or entry[0] != size or entry[1] != mtime_ns:
+            return None
+
+        self.hits += 1
+        self._used[rel_path] = entry
+        return self._to_facts(entry[3])
+
+    def get_digest(self, rel_path: str, size: int) -> Optional[str]:
+        """Return the cached content hash of a file with the given size."""
+        entry = self._entries.get(rel_path)
+        if entry is None or entry[0] != size:
+            return None
+        return entry[2]
+
+    def get_by_digest(self, rel_path: str, size: int, digest: str) -> Optional[FileFacts]:
+        """Return the cached facts if the file's content is unchanged."""
+        entry = self._entries.get(rel_path)
+        if entry is None or entry[0] != size or entry[2] != digest:
+            return None
+
+        self.hits += 1
+        return self._to_facts(entry[3])
+
+    def get_previous(self, rel_path: str) -> Optional[FileFacts]:
+        """Return the facts a file had when the cache was last saved, whether or not it changed since."""
+        entry = self._entries.get(rel_path)
+        return self._to_facts(entry[3]) if entry is not None else None
+
+    def is_empty(self) -> bool:
+        return not self._entries
+
+    def put(self, rel_path: str, size: int, mtime_ns: int, digest: Optional[str], facts: FileFacts):
+        """Store the facts of a file that had to be (re)checked."""
+        self._used[rel_path] = [size, mtime_ns, digest, facts]
+        self._dirty = True
+
+    def discard(self, rel_path: str):
+        """Drop the entry of a file that was deleted."""
+        self._entries.pop(rel_path, None)
+        if self._used.pop(rel_path, None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """Write the entries used in this run, dropping files that are gone."""
+        if not self.cache_file:
+            return
+        if not self._dirty and len(self._used) == len(self._entries):
+            return
+
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            files = {rel_path: self._to_data(entry) for rel_path, entry in self._used.items()}
+            # A temporary file of its own, as the hook, a watching validator and the scripts can share the cache
+            fd, tmp_file = tempfile.mkstemp(prefix=f".{self.cache_file.name}.", suffix='.tmp', dir=self.cache_file.parent)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(marshal.dumps({'version': self.VERSION, 'files': files}))
+                os.replace(tmp_file, self.cache_file)
+            except BaseException:
+                os.unlink(tmp_file)
+                raise
+            self._entries = files
+            self._dirty = False
+        except OSError as e:
+            print(f"Could not write validation cache {self.cache_file}: {e}")
+
+    @staticmethod
+    def _to_facts(data: tuple) -> FileFacts:
+        return data if isinstance(data, FileFacts) else FileFacts._make(data)
+
+    @staticmethod
+    def _to_data(entry) -> tuple:
+        """An entry as plain tuples, which marshal can write, with the strings files share interned."""
+        size, mtime_ns, digest, facts = entry
+        if not isinstance(facts, FileFacts):
+            return tuple(entry)
+        intern = _intern_optional
+        return (size, mtime_ns, digest, (
+            intern(facts.uid),
+            facts.uid_line,
+            facts.has_inline_uid,
+            tuple((line, block, intern(type_name), intern(uid), intern(path)) for line, block, type_name, uid, path in facts.ext_resources),
+            tuple((intern(path), line, kind) for path, line, kind in facts.res_paths),
+            tuple((intern(uid), line, kind) for uid, line, kind in facts.uid_paths),
+        ))
+
+
+class PhaseStats:
+    """Counters of one phase of a validator run, in total and per file type."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.files = 0
+        self.bytes_read = 0
+        self.matches = 0
+        # suffix -> [files, bytes read, matches, seconds]
+        self.by_type: Dict[str, list] = defaultdict(lambda: [0, 0, 0, 0.0])
+
+
+class ValidatorStats:
+    """
+    Instrumentation of a validator run.
+
+    Records time, files, bytes read and matched references per phase and
+    per file type. Timing every file of the validate phase is only done with
+    time_files, for the slowest files report of --profile; parsing is always
+    timed per file, the time is taken where the file is parsed anyway.
+    """
+
+    def __init__(self, time_files: bool = False):
+        self.phases: Dict[str, PhaseStats] = {}
+        self.time_files = time_files
+        # (seconds, phase, path) of every timed file
+        self.file_times: List[Tuple[float, str, str]] = []
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[PhaseStats]:
+        stats = self.phases.setdefault(name, PhaseStats())
+        t0 = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds += time.perf_counter() - t0
+
+    def count_file(self, phase: str, rel_path: str, bytes_read: int = 0, matches: int = 0, seconds: Optional[float] = None):
+        self.count_files(phase, posixpath.splitext(rel_path)[1], 1, bytes_read, matches, seconds)
+        if seconds is not None and self.time_files:
+            self.file_times.append((seconds, phase, rel_path))
+
+    def count_files(self, phase: str, suffix: str, files: int, bytes_read: int = 0, matches: int = 0, seconds: Optional[float] = None):
+        """Count several files of one type at once, e.g. the ones taken from the cache."""
+        stats = self.phases.setdefault(phase, PhaseStats())
+        stats.files += files
+        stats.bytes_read += bytes_read
+        stats.matches += matches
+        by_type = stats.by_type[suffix]
+        by_type[0] += files
+        by_type[1] += bytes_read
+        by_type[2] += matches
+        if seconds is not None:
+            by_type[3] += seconds
+
+    def slowest_files(self, count: int) -> List[Tuple[float, str, str]]:
+        return sorted(self.file_times, reverse=True)[:count]
+
+    def print_report(self, top: int = 20):
+        print("\nPhase      Type           Files     Bytes read   Matches   Seconds")
+        for name, stats in self.phases.items():
+            print(f"{name:<10} {'(all)':<12} {stats.files:>7} {stats.bytes_read:>14} {stats.matches:>9} {stats.seconds:>9.4f}")
+            for suffix, (files, bytes_read, matches, seconds) in sorted(stats.by_type.items(), key=lambda item: -item[1][3]):
+                timed = f"{seconds:>9.4f}" if seconds else f"{'':>9}"
+                print(f"{'':<10} {suffix:<12} {files:>7} {bytes_read:>14} {matches:>9} {timed}")
+
+        slowest = self.slowest_files(top)
+        if slowest:
+            print(f"\nSlowest {len(slowest)} files:")
+            for seconds, phase, path in slowest:
+                print(f"  {seconds:9.4f}  {phase:<9} {path}")
+
+
+class Reference(NamedTuple):
+    """A reference from one project file to another, with UIDs resolved to paths."""
+    source: str
+    target: str
+    line: int
+    by_uid: bool
+
+
+class DependencyGraph:
+    """
+    The references between project files.
+
+    Files are res:// paths and numbered once. References are kept in a single
+    list and each path keeps the indices of its outgoing ones. References to
+    a path are found through the validator's reverse index (referrers, from
+    a res:// path or UID to the files referencing it), by the path and by the
+    UIDs resolved to it, and the paths below each directory are indexed, so
+    queries are linear in the references they touch. Paths that are
+    referenced but don't exist are part of the graph, but not existing.
+    """
+
+    def __init__(self, referrers: Callable[[str], Iterable[str]]):
+        self.paths: List[str] = []
+        self.existing: List[bool] = []
+        self._ids: Dict[str, int] = {}
+        self._references: List[Tuple[int, int, int, bool]] = []
+        self._outgoing: List[List[int]] = []
+        # The keys each path is referenced by: the path itself and the UIDs resolved to it
+        self._keys: List[Set[str]] = []
+        # Directory (without the trailing "/") to the paths below it
+        self._below: Dict[str, List[int]] = defaultdict(list)
+        self._referrers = referrers
+
+    def add_path(self, path: str, exists: bool = False) -> int:
+        path_id = self._ids.get(path)
+        if path_id is None:
+            path_id = self._ids[path] = len(self.paths)
+            self.paths.append(path)
+            self.existing.append(exists)
+            self._outgoing.append([])
+            self._keys.append({path})
+            slash = path.find('/')
+            while slash != -1:
+                self._below[path[:slash]].append(path_id)
+                slash = path.find('/', slash + 1)
+        elif exists:
+            self.existing[path_id] = True
+        return path_id
+
+    def add_reference(self, source_id: int, target: str, line: int, uid: Optional[str] = None):
+        """Add a reference by path, or by the UID that resolved to the target."""
+        target_id = self.add_path(target)
+        self._references.append((source_id, target_id, line, uid is not None))
+        self._outgoing[source_id].append(len(self._references) - 1)
+        if uid is not None:
+            self._keys[target_id].add(uid)
+
+    def reference_count(self) -> int:
+        return len(self._references)
+
+    def references_from(self, path: str) -> List[Reference]:
+        """The references in a file."""
+        path_id = self._ids.get(path)
+        return [self._reference(index) for index in self._outgoing[path_id]] if path_id is not None else []
+
+    def referrers(self, path: str) -> List[Reference]:
+        """The references to a file, or to anything inside a directory."""
+        return [self._reference(index) for path_id in self._matching_ids(path) for index in self._incoming(path_id)]
+
+    def impact(self, path: str, moved: bool = False) -> List[Reference]:
+        """
+        The references that break when a file or directory is deleted, or moved.
+
+        A deletion breaks the references from everywhere else. A move only
+        breaks references by path, including those from inside a moved
+        directory, while references by UID keep working.
+        """
+        ids = set(self._matching_ids(path))
+        broken = []
+        for path_id in ids:
+            for index in self._incoming(path_id):
+                source_id, _, _, by_uid = self._references[index]
+                if (not moved and source_id not in ids) or (moved and not by_uid):
+                    broken.append(self._reference(index))
+        return sorted(broken, key=lambda reference: (reference.source, reference.line))
+
+    def dependencies(self, path: str) -> List[str]:
+        """Everything a file (or the files in a directory) depends on, directly or through other files."""
+        start = self._matching_ids(path)
+        seen = set(start)
+        pending = list(start)
+        dependencies = []
+        while pending:
+            for index in self._outgoing[pending.pop()]:
+                target_id = self._references[index][1]
+                if target_id not in seen:
+                    seen.add(target_id)
+                    pending.append(target_id)
+                    dependencies.append(self.paths[target_id])
+        return sorted(dependencies)
+
+    def orphans(self, ignored_suffixes: Tuple[str, ...] = (), ignored_prefixes: Tuple[str, ...] = ()) -> List[str]:
+        """Existing files that no other file references, by path or UID."""
+        referenced = {target_id for source_id, target_id, _, _ in self._references if source_id != target_id}
+        return sorted(
+            path for path_id, path in enumerate(self.paths)
+            if self.existing[path_id] and path_id not in referenced
+            and not path.endswith(ignored_suffixes) and not path.startswith(ignored_prefixes)
+        )
+
+    def _incoming(self, path_id: int) -> List[int]:
+        """The indices of the references to a path, from the outgoing ones of the files referencing its keys."""
+        sources = {source for key in self._keys[path_id] for source in self._referrers(key)}
+        incoming = []
+        for source in sources:
+            source_id = self._ids.get(source)
+            if source_id is not None:
+                incoming.extend(index for index in self._outgoing[source_id] if self._references[index][1] == path_id)
+        return sorted(incoming)
+
+    def _matching_ids(self, path: str) -> List[int]:
+        path = path.rstrip('/')
+        path_id = self._ids.get(path)
+        # Directories aren't part of the graph, only the files inside them
+        return ([path_id] if path_id is not None else []) + self._below.get(path, [])
+
+    def _reference(self, index: int) -> Reference:
+        source_id, target_id, line, by_uid = self._references[index]
+        return Reference(self.paths[source_id], self.paths[target_id], line, by_uid)
+
 
 class GodotValidator:
-    def __init__(self, project_root: str, excluded_dirs: Set[str] = None):
+    def __init__(self, project_root: str, excluded_dirs: Set[str] = None, cache_file: Optional[Path] = None, jobs: int = 1,
+                 stats: Optional[ValidatorStats] = None, export_filter: Optional[ExportFilter] = None,
+                 require_lfs_objects: bool = False):
         self.project_root = Path(project_root)
+        # Prefix turning the relative paths used as keys below into paths that can be opened
+        self._root_dir = os.path.join(str(self.project_root), '')
         self.uid_to_path: Dict[str, str] = {}
         self.path_to_uid: Dict[str, str] = {}
         self.duplicate_uids: Dict[str, List[str]] = defaultdict(list)
-        self.errors: List[str] = []
+        self.errors: List[ValidationError] = []
+        # Called with every error as soon as it's found, e.g. to stream reports
+        self.on_error: Optional[Callable[[ValidationError], None]] = None
         self.warnings: List[str] = []
         self.excluded_dirs = excluded_dirs or {'.github', '.hooks', 'builds', '.godot', '.git', 'node_modules', '__pycache__', '.venv'}
+        # Validate the project as exported, without the files the export leaves out
+        self.export_filter = export_filter
+        # Directories Godot skips because of a .gdignore (or another project) in them
+        self.ignored_dirs: Set[str] = set()
+        # Git LFS objects that weren't pulled are warnings, unless the checkout is supposed to have them
+        self.require_lfs_objects = require_lfs_objects
+        # Imported assets small enough to be Git LFS pointers, from the walk, and the ones that are
+        self.lfs_candidates: Set[str] = set()
+        self.lfs_pointers: List[str] = []
+        self.contents = FileContentReader()
+        self.paths = PathIndex(self.project_root, export_filter)
+        self.cache = FactsCache(cache_file)
+        self.jobs = jobs
+        self.stats = stats or ValidatorStats()
+        # Files are keyed by their path relative to the project root in posix form, i.e. their res:// path without the prefix
+        self.files: Dict[str, List[str]] = {}
+        self.facts: Dict[str, FileFacts] = {}
+        self.read_errors: Dict[str, str] = {}
+        self.file_errors: Dict[str, List[ValidationError]] = {}
+        # Files referencing each res:// path or uid://, built on first use and shared with dependency_graph()
+        self._referrers: Optional[Dict[str, Set[str]]] = None
 
         # Regex patterns
-        # UID definition in .tscn
-        self.scene_uid_pattern = re.compile(
-            r'\[gd_scene[^]]*uid="(uid://[^"]*)"[^]]*\]'
-        )
-        # UID definition in .tres
-        self.resource_uid_pattern = re.compile(
-            r'\[gd_resource[^]]*uid="(uid://[^"]*)"[^]]*\]'
-        )
+        # .tscn and .tres files are parsed with tokenize_resource()
         # UID definition in .uid
         self.uid_file_pattern = re.compile(r'^(uid://[a-z0-9]+)$', re.MULTILINE)
         # UID definition in .import
         self.import_uid_pattern = re.compile(r'^uid="(uid://[^"]*)"', re.MULTILINE)
-
-        # Patterns for static paths only (not dynamically constructed)
-        self.res_path_pattern = re.compile(r'"(res://(?!\.godot)[^"{}%]*)"')  # Exclude paths with format strings
+        # Quoted references in other text files, scripts are parsed with tokenize_script()
+        self.res_path_pattern = re.compile(r'"(res://[^"]*)"')
         self.uid_path_pattern = re.compile(r'"(uid://[^"]*)"')
 
-        # External resources must have a valid UID and path
-        self.ext_resource_block_pattern = re.compile(
-            r'\[ext_resource([^]]*)\]', re.MULTILINE | re.DOTALL
-        )
-
-        # Extract individual attributes from ext_resource content
-        self.ext_resource_type_pattern = re.compile(r'type="([^"]*)"')
-        self.ext_resource_uid_pattern = re.compile(r'uid="(uid://[^"]*)"')
-        self.ext_resource_path_pattern = re.compile(r'path="([^"]*)"')
-
-    def scan_project(self):
-        """Scan the entire project for UID mappings and validate them."""
-        t0 = time.time()
-        files = self._get_godot_files()
-        print(f"\nScanning Godot project took {time.time() - t0} seconds")
+    def scan_project(self, changed_paths: Optional[Iterable[str]] = None):
+        """
+        Scan the entire project for UID mappings and validate them.
 
+        With changed_paths (relative to the project root, e.g. the staged
+        files), the UID mappings still come from the whole project, but only
+        the references of the changed files and of the files that depend on
+        them are validated. Unchanged files are taken from the cache.
+        """
         # First pass: collect all UID mappings
-        t0 = time.time()
-        self._collect_uid_mappings(files)
-        print(f"Collecting UIDs from {len(files)} files took {time.time() - t0} seconds")
+        self.load_project()
+        files = self.files
 
-        # Second pass: validate all references
-        t0 = time.time()
-        self._validate_references(files)
-        print(f"Validating references took {time.time() - t0} seconds")
+        previous_facts = None
+        if changed_paths is not None and not self.cache.is_empty():
+            # What the changed files defined before, references to their old UIDs have to be checked too
+            changed_paths = set(changed_paths)
+            previous_facts = [self.cache.get_previous(rel_path) for rel_path in changed_paths]
+        elif changed_paths is not None:
+            print("No cached facts of a previous run yet, validating every file")
 
-        # Check for duplicates
-        self._check_duplicate_uids()
+        # Second pass: validate all references
+        with self.stats.phase('validate') as stats:
+            if previous_facts is None:
+                self._validate_references(files)
+            else:
+                scope = self._dependent_files(changed_paths, previous_facts)
+                self._validate_references(files, scope)
+        if previous_facts is None:
+            print(f"Validating references took {stats.seconds} seconds")
+        else:
+            print(f"Validating references of {len(scope)} files affected by {len(changed_paths)} changed paths took {stats.seconds} seconds")
+        print(f"Existence checks: {self.paths.hits} answered from the project walk, {self.paths.misses} needed a stat")
 
-        # Sanity check: unique paths and unique UID's should be the same count
-        if len(self.uid_to_path) != len(self.path_to_uid):
-            self.errors.append(
-                f"There are {len(self.path_to_uid)} unique paths and "
-                 f"{len(self.uid_to_path)} UID definitions - These should be identical, as each of these paths should have a UID"
-            )
+        self._check_project_uids()
+        self.cache.save()
 
         return len(self.errors) == 0
 
-    def _collect_uid_mappings(self, files: List[Path]):
-        """Collect all UID to path mappings from the project."""
-        for file_path in files:
-            if file_path.suffix in ['.mesh']:
+    def load_project(self):
+        """Walk the project, extract the facts of every file and collect the UID mappings, without validating."""
+        with self.stats.phase('scan') as stats:
+            files = self.files = self._get_godot_files()
+            file_count = stats.files = sum(len(group) for group in files.values())
+        print(f"\nScanning Godot project took {stats.seconds} seconds")
+
+        # Extract the facts of every file, reusing the cache where possible
+        with self.stats.phase('parse') as stats:
+            self.cache.load()
+            self._parse_files(files)
+        print(f"Parsing {file_count} files took {stats.seconds} seconds ({self.cache.hits} from cache)")
+
+        with self.stats.phase('collect') as stats:
+            self._collect_uid_mappings(files)
+        print(f"Collecting UIDs from {file_count} files took {stats.seconds} seconds")
+
+    def refresh(self, changed_paths: Iterable[str]) -> Set[str]:
+        """
+        Update the results after paths changed on disk, e.g. in watch mode.
+
+        The paths are relative to the project root; a changed directory is
+        walked again. Only the changed files are parsed again, the UID mappings
+        are collected again from the facts in memory, and only the changed
+        files and the files referencing a path or UID whose meaning changed
+        are validated again. Returns the files that were validated again.
+        """
+        self._build_referrers()
+        self.paths.forget_stats()
+        removed: Set[str] = set()
+        added: Set[str] = set()
+        changed_files: Dict[str, List[str]] = defaultdict(list)
+
+        # A .gdignore that appears or goes away changes what is walked in its directory
+        changed_paths = {
+            posixpath.dirname(rel_path) if '/' in rel_path and posixpath.basename(rel_path) in DIRECTORY_IGNORE_MARKERS else rel_path
+            for rel_path in changed_paths
+        }
+        # Paths in directories Godot ignores aren't walked, but references to them are still checked with a stat
+        unwalked = {rel_path for rel_path in changed_paths if rel_path and not self._is_walked(rel_path)}
+        # Forget everything below the changed paths first, then walk what exists of them now
+        changed_paths = sorted(rel_path for rel_path in changed_paths if rel_path and self._is_walked(rel_path))
+        for rel_path in changed_paths:
+            removed.update(self.paths.remove(rel_path))
+            prefix = rel_path + '/'
+            below = {path for path in self.ignored_dirs if path == rel_path or path.startswith(prefix)}
+            self.ignored_dirs -= below
+            unwalked |= below
+        self.lfs_candidates -= removed
+
+        for rel_path in changed_paths:
+            file_path = self.project_root / rel_path
+            # Parents sort first, so paths below a changed directory were walked already
+            if rel_path in added or not os.path.lexists(file_path):
+                continue
+
+            self.paths.add(rel_path)
+            added.add(rel_path)
+            # Like the walk, don't descend into symlinked directories
+            if file_path.is_dir() and not file_path.is_symlink():
+                if file_path.name not in self.excluded_dirs and not (self.export_filter and self.export_filter.excludes_dir(rel_path)):
+                    added.update(self._walk_tree(str(file_path), rel_path + '/', changed_files))
+            else:
+                suffix = posixpath.splitext(rel_path)[1]
+                if suffix in GODOT_FILE_EXTENSIONS:
+                    changed_files[suffix].append(rel_path)
+                # An asset or its .import file changed, e.g. after git lfs pull
+                asset_rel_path = rel_path[:-len('.import')] if rel_path.endswith('.import') else rel_path
+                self.lfs_candidates.discard(asset_rel_path)
+                if self.paths.exists(asset_rel_path + '.import') and _is_lfs_pointer_size(self.project_root / asset_rel_path):
+                    self.lfs_candidates.add(asset_rel_path)
+
+        # Forget deleted files, and keep the order of the others so the errors stay in place
+        created = added - removed
+        gone = removed - added
+        for suffix, group in self.files.items():
+            if any(rel_path in gone for rel_path in group):
+                self.files[suffix] = [rel_path for rel_path in group if rel_path not in gone]
+        for rel_path in gone:
+            self._forget_file(rel_path)
+            self.cache.discard(rel_path)
+
+        for suffix, group in changed_files.items():
+            for rel_path in group:
+                if rel_path in created:
+                    self.files.setdefault(suffix, []).append(rel_path)
+                self._forget_file(rel_path)
+        self._parse_files(changed_files)
+        for rel_path in self._iter_files(changed_files, GODOT_FILE_EXTENSIONS):
+            if rel_path in self.facts:
+                self._index_references(rel_path, self.facts[rel_path])
+
+        # Collect the UID mappings again and see which of them changed
+        old_uid_to_path = self.uid_to_path
+        self.uid_to_path = {}
+        self.path_to_uid = {}
+        self.duplicate_uids = defaultdict(list)
+        self.errors = []
+        self.lfs_pointers = []
+        self._collect_uid_mappings(self.files)
+
+        changed_keys = {uid for uid, _ in old_uid_to_path.items() ^ self.uid_to_path.items()}
+        affected = set(self._iter_files(changed_files, GODOT_FILE_EXTENSIONS))
+        for rel_path in created | gone:
+            changed_keys.add(f"res://{rel_path}")
+            # A .tscn or .tres without an inline UID is only valid with its .uid file
+            if rel_path.endswith('.uid'):
+                affected.add(rel_path[:-len('.uid')])
+        for rel_path in unwalked:
+            key = f"res://{rel_path}"
+            changed_keys.update(other for other in self._referrers if other == key or other.startswith(key + '/'))
+        for key in changed_keys:
+            affected.update(self._referrers.get(key, ()))
+
+        text_extensions = tuple(ext for ext in GODOT_FILE_EXTENSIONS if ext not in BINARY_EXTENSIONS)
+        affected = {rel_path for rel_path in affected if rel_path.endswith(text_extensions) and rel_path not in gone}
+        for rel_path in affected:
+            if rel_path in self.facts or rel_path in self.read_errors:
+                self.file_errors[rel_path] = self._validate_file(rel_path)
+
+        for rel_path in self._iter_files(self.files, text_extensions):
+            self.errors.extend(self.file_errors.get(rel_path, ()))
+        self._check_project_uids()
+        self.cache.save()
+
+        return affected
+
+    def _dependent_files(self, changed_paths: Set[str], previous_facts: List[Optional[FileFacts]]) -> Set[str]:
+        """The changed files that still exist, and the files referencing their paths or their old or new UIDs."""
+        self._build_referrers()
+        files = set()
+        keys = set()
+        for rel_path, previous in zip(changed_paths, previous_facts):
+            keys.add(f"res://{rel_path}")
+            for facts in (previous, self.facts.get(rel_path)):
+                if facts is not None and facts.uid:
+                    keys.add(facts.uid)
+
+            if rel_path in self.facts or rel_path in self.read_errors:
+                files.add(rel_path)
+            # A .tscn or .tres without an inline UID is only valid with its .uid file
+            if rel_path.endswith('.uid'):
+                files.add(rel_path[:-len('.uid')])
+
+        for key in keys:
+            files.update(self._referrers.get(key, ()))
+        return files
+
+    def referrers(self, key: str) -> Set[str]:
+        """The files (relative to the project root) referencing a res:// path (normalized like existence checks) or a uid://, by path, UID or ext_resource."""
+        self._build_referrers()
+        return self._referrers.get(key, set())
+
+    def _build_referrers(self):
+        if self._referrers is None:
+            self._referrers = defaultdict(set)
+            for rel_path, facts in self.facts.items():
+                self._index_references(rel_path, facts)
+
+    def _forget_file(self, rel_path: str):
+        """Drop everything known about a file before it's parsed again or after it was deleted."""
+        facts = self.facts.pop(rel_path, None)
+        if facts is not None and self._referrers is not None:
+            for key in self._reference_keys(facts):
+                referrers = self._referrers.get(key)
+                if referrers is not None:
+                    referrers.discard(rel_path)
+        self.read_errors.pop(rel_path, None)
+        self.file_errors.pop(rel_path, None)
+
+    def _index_references(self, rel_path: str, facts: FileFacts):
+        for key in self._reference_keys(facts):
+            self._referrers[key].add(rel_path)
+
+    @staticmethod
+    def _reference_keys(facts: FileFacts) -> Iterator[str]:
+        """The res:// paths (normalized like existence checks) and UIDs a file's validation depends on."""
+        for res_path, _, _ in facts.res_paths:
+            yield GodotValidator._normalize_res_path(res_path)
+        for uid, _, _ in facts.uid_paths:
+            yield uid
+        for _, _, _, uid, _ in facts.ext_resources:
+            if uid:
+                yield uid
+
+    def _parse_files(self, files: Dict[str, List[str]]):
+        """Extract the facts of every file, only reading files that changed since the last run."""
+        pending = []
+        for suffix in GODOT_FILE_EXTENSIONS:
+            # Files taken from the cache are counted per type, this loop runs for every file of the project.
+            # They weren't matched in this run, their references are counted when they're validated.
+            hits = 0
+            for rel_path in files.get(suffix, ()):
                 try:
-                    self._process_binary_file(file_path)
+                    stat = os.stat(self._root_dir + rel_path)
                 except Exception as e:
-                    pass
-                    #print(f"Failed to read UID from {file_path}: {e}")
-                continue
+                    self.read_errors[rel_path] = str(e)
+                    continue
 
-            if file_path.suffix not in ['.uid', '.tscn', '.tres', '.import']:
+                facts = self.cache.get(rel_path, stat.st_size, stat.st_mtime_ns)
+                if facts is not None:
+                    self.facts[rel_path] = facts
+                    hits += 1
+                else:
+                    pending.append((rel_path, stat))
+            if hits:
+                self.stats.count_files('parse', suffix, hits)
+
+        tasks = [(rel_path, self.cache.get_digest(rel_path, stat.st_size)) for rel_path, stat in pending]
+        # Results come back in task order, so the outcome doesn't depend on the number of jobs
+        for (rel_path, stat), result in zip(pending, self._run_parse_tasks(tasks)):
+            error, digest, facts, seconds, bytes_read = result
+            if error is not None:
+                self.read_errors[rel_path] = error
+                self.stats.count_file('parse', rel_path, bytes_read, seconds=seconds)
                 continue
 
-            try:
-                with open(file_path, 'r', encoding='utf-8-sig') as f:
-                    content = f.read()
+            if facts is None:
+                facts = self.cache.get_by_digest(rel_path, stat.st_size, digest)
+            self.stats.count_file('parse', rel_path, bytes_read, self._match_count(facts), seconds)
 
-                rel_path = str(file_path.relative_to(self.project_root).as_posix())
+            self.cache.put(rel_path, stat.st_size, stat.st_mtime_ns, digest, facts)
+            self.facts[rel_path] = facts
 
-                if file_path.suffix == '.uid':
-                    self._process_uid_file(file_path, content)
-                elif file_path.suffix in ['.tscn', '.tres', '.import']:
-                    self._process_resource_file(file_path, content, rel_path)
+    def _run_parse_tasks(self, tasks: List[Tuple[str, Optional[str]]]):
+        """Parse files serially, or in a process pool when there are enough of them."""
+        workers = min(self.jobs, len(tasks) // MIN_FILES_PER_JOB)
+        if workers <= 1:
+            return [self._parse_file_task(task) for task in tasks]
 
-            except Exception as e:
-                self.errors.append(f"Error reading {file_path.as_posix()}: {e}")
+        # Only imported when there's enough to parse, as the import alone takes a noticeable part of a warm run
+        from concurrent.futures import ProcessPoolExecutor
 
-    def _process_uid_file(self, file_path: Path, content: str):
-        """Process a .uid file to extract UID mapping."""
-        lines = content.strip().split('\n')
-        uid_line = lines[0].strip() if lines else ""
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(workers, initializer=_init_parse_worker, initargs=(str(self.project_root),)) as executor:
+            return list(executor.map(_parse_file_worker, tasks, chunksize=chunksize))
+
+    def _parse_file_task(self, task: Tuple[str, Optional[str]]):
+        """
+        Parse a single file, returning (error, digest, facts, seconds, bytes read).
+
+        The facts are None when the content hash matches the cached one, in
+        which case the cached facts are still valid.
+        """
+        rel_path, cached_digest = task
+        t0 = time.perf_counter()
+        bytes_read = self.contents.bytes_read
+        error = digest = facts = None
+        try:
+            if rel_path.endswith(BINARY_EXTENSIONS):
+                # Binary files are only keyed by size and mtime, hashing them would mean reading them in full
+                facts = self._extract_binary_facts(self._root_dir + rel_path)
+            else:
+                content, digest = self.contents.read(self._root_dir + rel_path)
+                if digest != cached_digest:
+                    facts = self._extract_facts(rel_path, content)
+        except Exception as e:
+            error = str(e)
+        return error, digest, facts, time.perf_counter() - t0, self.contents.bytes_read - bytes_read
+
+    @staticmethod
+    def _match_count(facts: FileFacts) -> int:
+        """The number of UIDs and references found in a file."""
+        return bool(facts.uid) + len(facts.ext_resources) + len(facts.res_paths) + len(facts.uid_paths)
+
+    def _extract_facts(self, rel_path: str, content: str) -> FileFacts:
+        """Extract the UID definition and all references from a text file."""
+        directory, name = posixpath.split(rel_path)
+        suffix = posixpath.splitext(name)[1]
+        if suffix in RESOURCE_TEXT_EXTENSIONS:
+            return self._extract_resource_facts(rel_path, content)
+        if suffix in SCRIPT_EXTENSIONS:
+            return self._extract_script_facts(rel_path, content)
+        if name == 'project.godot':
+            return self._extract_project_facts(content)
+
+        uid = None
+        uid_line = ""
+        has_inline_uid = False
+
+        if suffix == '.uid':
+            lines = content.strip().split('\n')
+            uid_line = lines[0].strip() if lines else ""
+            match = self.uid_file_pattern.match(uid_line)
+            uid = match.group(1) if match else None
+
+        # Asset UIDs are defined in .import files
+        elif suffix == '.import':
+            import_match = self.import_uid_pattern.search(content)
+            uid = import_match.group(1) if import_match else None
+
+        lines = LineIndex(content)
+        res_paths = [
+            (match.group(1), lines.line_number(match.start()), None)
+            for match in self.res_path_pattern.finditer(content)
+            if self._is_static_res_path(match.group(1))
+        ]
+        if name == 'plugin.cfg':
+            res_paths.extend(self._plugin_script_paths(directory, content))
+        return FileFacts(
+            uid=uid,
+            uid_line=uid_line,
+            has_inline_uid=has_inline_uid,
+            ext_resources=[],
+            res_paths=res_paths,
+            uid_paths=[
+                (match.group(1), lines.line_number(match.start()), None)
+                for match in self.uid_path_pattern.finditer(content)
+            ],
+        )
+
+    def _extract_script_facts(self, rel_path: str, content: str) -> FileFacts:
+        """Extract the references in the code of a .gd/.cs file."""
+        res_paths = []
+        uid_paths = []
+        for kind, text, line_number in tokenize_script(content, posixpath.splitext(rel_path)[1]):
+            if text.startswith('uid://'):
+                uid_paths.append((text, line_number, kind))
+            elif self._is_static_res_path(text):
+                res_paths.append((text, line_number, kind))
+
+        return FileFacts(
+            uid=None,
+            uid_line="",
+            has_inline_uid=False,
+            ext_resources=[],
+            res_paths=res_paths,
+            uid_paths=uid_paths,
+        )
+
+    def _extract_project_facts(self, content: str) -> FileFacts:
+        """Extract the references in the project settings, including autoloads."""
+        res_paths = []
+        uid_paths = []
+        for section, values in parse_config_file(content).items():
+            kind = PROJECT_REFERENCE_KINDS.get(section)
+            for value in values.values():
+                for text in value.strings():
+                    # Autoloads that are singletons start with a "*"
+                    if kind == 'autoload':
+                        text = text.lstrip('*')
+                    if text.startswith('uid://'):
+                        uid_paths.append((text, value.line, kind))
+                    elif text.startswith('res://') and self._is_static_res_path(text):
+                        res_paths.append((text, value.line, kind))
+
+        return FileFacts(
+            uid=None,
+            uid_line="",
+            has_inline_uid=False,
+            ext_resources=[],
+            res_paths=res_paths,
+            uid_paths=uid_paths,
+        )
+
+    def _plugin_script_paths(self, rel_dir: str, content: str) -> List[Tuple[str, int, Optional[str]]]:
+        """The script of an editor plugin, which plugin.cfg names relative to its own directory unless it's a res:// path."""
+        value = parse_config_file(content).get('plugin', {}).get('script')
+        script = value.string() if value is not None else None
+        # res:// paths are found like in any other file
+        if not script or script.startswith('res://'):
+            return []
+        return [(self._normalize_res_path(f"res://{posixpath.join(rel_dir, script)}"), value.line, 'editor_plugin')]
+
+    def _extract_binary_facts(self, file_path: str) -> FileFacts:
+        """Extract the UID from a binary resource header."""
+        try:
+            uid = self._get_binary_uid(file_path)
+        except Exception as e:
+            uid = None
+            #print(f"Failed to read UID from {file_path}: {e}")
+
+        return FileFacts(uid=uid, uid_line="", has_inline_uid=False, ext_resources=[], res_paths=[], uid_paths=[])
+
+    def _extract_resource_facts(self, rel_path: str, content: str) -> FileFacts:
+        """Extract the UID definition, ext_resources and references of a .tscn/.tres file."""
+        uid_section = 'gd_scene' if rel_path.endswith('.tscn') else 'gd_resource'
+        uid = None
+        has_inline_uid = False
+        ext_resources = []
+        res_paths = []
+        uid_paths = []
+
+        is_static_res_path = self._is_static_res_path
+        for kind, text, line_number in tokenize_resource(content):
+            if kind == 'string':
+                if text.startswith('uid://'):
+                    uid_paths.append((text, line_number, None))
+                elif is_static_res_path(text):
+                    res_paths.append((text, line_number, None))
+
+            elif kind == 'ext_resource':
+                attributes = parse_header_attributes(text)
+                ext_uid = attributes.get('uid')
+                if ext_uid is not None and not ext_uid.startswith('uid://'):
+                    ext_uid = None
+                ext_resources.append((line_number, text, attributes.get('type'), ext_uid, attributes.get('path')))
+
+            elif not has_inline_uid:
+                # gd_scene or gd_resource, only the first one counts
+                header_uid = parse_header_attributes(text).get('uid', '')
+                if header_uid.startswith('uid://'):
+                    has_inline_uid = True
+                    if kind == uid_section:
+                        uid = header_uid
+
+        return FileFacts(
+            uid=uid,
+            uid_line="",
+            has_inline_uid=has_inline_uid,
+            ext_resources=ext_resources,
+            res_paths=res_paths,
+            uid_paths=uid_paths,
+        )
+
+    @staticmethod
+    def _is_static_res_path(res_path: str) -> bool:
+        """Check whether a res:// path can be validated, i.e. isn't ignored or constructed dynamically."""
+        # TODO: make ignoring certain files configurable :3 match the .gitignore?
+        if res_path == "res://override.cfg":
+            return False
 
-        match = self.uid_file_pattern.match(uid_line)
+        # Godot ignores hidden files and directories (like .godot), they're never resources.
+        # Only a path with "/." can have a part starting with a dot.
+        if '/.' in res_path and any(part.startswith('.') and part not in ('.', '..') for part in res_path[6:].split('/')):
+            return False
+
+        # Skip paths that look like they're constructed dynamically, including directory prefixes
+        return '{' not in res_path and '}' not in res_path and '%' not in res_path and not res_path.endswith('/')
+
+    def _collect_uid_mappings(self, files: Dict[str, List[str]]):
+        """Collect all UID to path mappings from the project."""
+        for suffix in UID_SOURCE_EXTENSIONS:
+            group = files.get(suffix, ())
+            if group:
+                self.stats.count_files('collect', suffix, len(group))
+            for rel_path in group:
+                if suffix in BINARY_EXTENSIONS:
+                    facts = self.facts.get(rel_path)
+                    if facts and facts.uid:
+                        self._process_binary_file(rel_path, facts)
+                    continue
+
+                try:
+                    if rel_path in self.read_errors:
+                        raise OSError(self.read_errors[rel_path])
 
-        if not match:
-            self.errors.append(f"Invalid UID file format: {file_path.as_posix()} (content: '{uid_line}')")
+                    facts = self.facts[rel_path]
+
+                    if suffix == '.uid':
+                        self._process_uid_file(rel_path, facts)
+                    elif suffix in ['.tscn', '.tres', '.import']:
+                        self._process_resource_file(rel_path, facts, suffix)
+
+                except Exception as e:
+                    self._report(ValidationError('read-error', rel_path, detail=str(e)))
+
+        # hack... can't read every binary file (e.g. unsupported compression or an LFS pointer)
+        # so if there's a binary resource path with a uid, register and trust it
+        # at least we can get uid mismatches
+        # A UID read from the header wins, so stale ext_resource UIDs are reported where they are
+        for rel_path in self._iter_files(files, RESOURCE_TEXT_EXTENSIONS):
+            facts = self.facts.get(rel_path)
+            for _, _, _, uid, path in facts.ext_resources if facts else ():
+                if uid and path and path.endswith(BINARY_EXTENSIONS) and not self._has_header_uid(path):
+                    self._add_uid_mapping(uid, path, rel_path)
+
+    def _has_header_uid(self, res_path: str) -> bool:
+        """Check whether the UID of a binary resource was read from its header."""
+        if not res_path.startswith('res://'):
+            return False
+        facts = self.facts.get(res_path[6:])
+        return facts is not None and facts.uid not in (None, "uid://<invalid>", LFS_POINTER_UID)
+
+    def _process_uid_file(self, rel_path: str, facts: FileFacts):
+        """Process a .uid file to extract UID mapping."""
+        if not facts.uid:
+            self._report(ValidationError('invalid-uid-file', rel_path, detail=facts.uid_line))
             return
 
-        uid = match.group(1)
+        uid = facts.uid
         # UID file corresponds to the file with the same name but different extension
-        resource_path = file_path.with_suffix('')
+        resource_rel_path = rel_path[:-len('.uid')]
 
-        if not resource_path.exists():
-            self.errors.append(f"UID file {file_path.as_posix()} has no corresponding resource file")
+        if not self.paths.exists(resource_rel_path):
+            self._report(ValidationError('uid-file-without-resource', rel_path, uid=uid))
             return
 
-        res_path = f"res://{resource_path.relative_to(self.project_root).as_posix()}"
-        self._add_uid_mapping(uid, res_path, str(file_path.as_posix()))
+        self._add_uid_mapping(uid, f"res://{resource_rel_path}", rel_path)
 
-    def _process_resource_file(self, file_path: Path, content: str, rel_path: str):
+    def _process_resource_file(self, rel_path: str, facts: FileFacts, suffix: str):
         """Process resource files to extract UID mappings."""
         res_path = f"res://{rel_path}"
+        uid = facts.uid
 
         # Check for import file UID (asset UIDs are defined in .import files)
-        if file_path.suffix == '.import':
-            import_match = self.import_uid_pattern.search(content)
-            if import_match:
-                uid = import_match.group(1)
+        if suffix == '.import':
+            if uid:
                 # Import files define UIDs for their corresponding asset
-                asset_path = file_path.with_suffix('')  # Remove .import extension
-                if asset_path.exists():
-                    asset_res_path = f"res://{asset_path.relative_to(self.project_root).as_posix()}"
-                    self._add_uid_mapping(uid, asset_res_path, str(file_path.as_posix()))
+                asset_rel_path = rel_path[:-len('.import')]
+                if self.paths.exists(asset_rel_path):
+                    self._add_uid_mapping(uid, f"res://{asset_rel_path}", rel_path)
+                    if asset_rel_path in self.lfs_candidates and is_lfs_pointer(self._root_dir + asset_rel_path):
+                        self._report_lfs_pointer(asset_rel_path, uid)
                 else:
-                    self.errors.append(f".import file {file_path.as_posix()} has no corresponding asset file")
+                    self._report(ValidationError('import-file-without-asset', rel_path, uid=uid))
 
         # Check for scene UID
-        elif file_path.suffix == '.tscn':
-            scene_match = self.scene_uid_pattern.search(content)
-            if scene_match:
-                uid = scene_match.group(1)
-                self._add_uid_mapping(uid, res_path, str(file_path.as_posix()))
+        elif suffix == '.tscn':
+            if uid:
+                self._add_uid_mapping(uid, res_path, rel_path)
             else:
-                self.errors.append(f".tscn file {file_path.as_posix()} has no UID")
+                self._report(ValidationError('resource-without-uid', rel_path))
 
         # Check for resource UID
-        elif file_path.suffix == '.tres':
-            resource_match = self.resource_uid_pattern.search(content)
-            if resource_match:
-                uid = resource_match.group(1)
-                self._add_uid_mapping(uid, res_path, str(file_path.as_posix()))
+        elif suffix == '.tres':
+            if uid:
+                self._add_uid_mapping(uid, res_path, rel_path)
             else:
-                self.errors.append(f".tres file {file_path.as_posix()} has no UID")
+                self._report(ValidationError('resource-without-uid', rel_path))
 
-    def _process_binary_file(self, file_path: Path):
-        rel_path = str(file_path.relative_to(self.project_root).as_posix())
-        uid = self._get_binary_uid(file_path)
+    def _process_binary_file(self, rel_path: str, facts: FileFacts):
+        uid = facts.uid
         if uid == "uid://<invalid>":
-            self.errors.append(f"Error reading UID from binary file {file_path.as_posix()}")
+            self._report(ValidationError('binary-uid-unreadable', rel_path))
+        elif uid == LFS_POINTER_UID:
+            # The UID is only known from a .uid file or the ext_resources referencing the resource
+            self._report_lfs_pointer(rel_path)
         else:
-            asset_res_path = f"res://{file_path.relative_to(self.project_root).as_posix()}"
-            self._add_uid_mapping(uid, asset_res_path, str(file_path.as_posix()))
+            self._add_uid_mapping(uid, f"res://{rel_path}", rel_path)
 
-    def _validate_ext_resources(self, file_path: Path, content: str):
-        """Validate all ext_resource blocks in a file."""
-        for match in self.ext_resource_block_pattern.finditer(content):
-            ext_resource_content = match.group(1)
-            line_number = content[:match.start()].count('\n') + 1
-
-            # Extract attributes
-            type_match = self.ext_resource_type_pattern.search(ext_resource_content)
-            uid_match = self.ext_resource_uid_pattern.search(ext_resource_content)
-            path_match = self.ext_resource_path_pattern.search(ext_resource_content)
+    def _report_lfs_pointer(self, rel_path: str, uid: Optional[str] = None):
+        if self.require_lfs_objects:
+            self._report(ValidationError('lfs-pointer', rel_path, uid=uid))
+        else:
+            self.lfs_pointers.append(rel_path)
 
-            resource_type = type_match.group(1) if type_match else None
-            uid = uid_match.group(1) if uid_match else None
-            path = path_match.group(1) if path_match else None
+    def _validate_ext_resources(self, rel_path: str, facts: FileFacts, errors: List[ValidationError]):
+        """Validate all ext_resource blocks in a file."""
+        uid_to_path = self.uid_to_path
+        for line_number, block, resource_type, uid, path in facts.ext_resources:
+            # Nearly all of them have a type and a UID that belongs to their path
+            if resource_type and path and uid_to_path.get(uid) == path:
+                continue
 
             # TODO: should we validate the type?
             if not resource_type:
-                self.errors.append(
-                    f"{file_path.relative_to(self.project_root).as_posix()}:{line_number}: "
-                    f"Missing type for ext_resource '{match.group()}'"
-                )
+                errors.append(ValidationError('ext-resource-missing-type', rel_path, line_number, uid, path, block))
 
             # We don't need to validate that the path is real because that is done in a later step
             if not path:
-                self.errors.append(
-                    f"{file_path.relative_to(self.project_root).as_posix()}:{line_number}: "
-                    f"Missing path for ext_resource '{match.group()}'"
-                )
+                errors.append(ValidationError('ext-resource-missing-path', rel_path, line_number, uid, path, block))
 
             if not uid:
-                self.errors.append(
-                    f"{file_path.relative_to(self.project_root).as_posix()}:{line_number}: "
-                    f"Missing UID for ext_resource '{match.group()}'"
-                )
-
-            # hack... can't read compressed binary file
-            # so if there's a mesh path with a uid, register and trust it
-            # at least we can get uid mismatches
-            if uid and os.path.splitext(path)[-1] in ['.mesh']:
-                self._add_uid_mapping(uid, path, str(file_path.as_posix()))
+                errors.append(ValidationError('ext-resource-missing-uid', rel_path, line_number, uid, path, block))
 
             # Validate that the UID->path mapping is consistent
-            if uid and path and uid in self.uid_to_path:
-                expected_path = self.uid_to_path[uid]
+            if uid and path and uid in uid_to_path:
+                expected_path = uid_to_path[uid]
                 if expected_path != path:
-                    self.errors.append(
-                        f"{file_path.relative_to(self.project_root).as_posix()}:{line_number}: "
-                        f"UID '{uid}' represents '{expected_path}', but the ext_resource thinks it's '{path}'"
-                    )
+                    errors.append(ValidationError('ext-resource-uid-mismatch', rel_path, line_number, uid, path, expected_path))
 
     def _add_uid_mapping(self, uid: str, path: str, source: str):
         """Add a UID to path mapping, tracking duplicates."""
@@ -242,201 +1651,331 @@ class GodotValidator:
         if path not in self.path_to_uid:
             self.path_to_uid[path] = uid
 
-    def _validate_references(self, files: List[Path]):
-        """Validate all res:// and uid:// references in the project."""
-
-        for file_path in files:
-            # these files don't reference other UID's
-            #if file_path.suffix in ['.uid', '.import']:
-            #    continue
-
-            if file_path.suffix in ['.mesh']:
-                continue
-
-            try:
-                with open(file_path, 'r', encoding='utf-8-sig') as f:
-                    content = f.read()
-
-                self._validate_ext_resources(file_path, content)
-                self._validate_res_paths(file_path, content)
-                self._validate_uid_paths(file_path, content)
-                self._check_file_has_uid(file_path, content)
-
-            except Exception as e:
-                self.errors.append(f"Error validating {file_path.as_posix()}: {e}")
-
-    def _validate_res_paths(self, file_path: Path, content: str):
+    def _validate_references(self, files: Dict[str, List[str]], scope: Optional[Set[str]] = None):
+        """Validate all res:// and uid:// references in the project, or only those of the files in scope."""
+        text_extensions = [ext for ext in GODOT_FILE_EXTENSIONS if ext not in BINARY_EXTENSIONS]
+        time_files = self.stats.time_files
+
+        for suffix in text_extensions:
+            # Unless files are timed for --profile, they're counted per type
+            validated = matches = 0
+            for rel_path in files.get(suffix, ()):
+                if scope is not None and rel_path not in scope:
+                    continue
+                t0 = time.perf_counter() if time_files else None
+                errors = self.file_errors[rel_path] = self._validate_file(rel_path)
+                facts = self.facts.get(rel_path)
+                if t0 is not None:
+                    self.stats.count_file('validate', rel_path, matches=self._match_count(facts) if facts else 0,
+                                          seconds=time.perf_counter() - t0)
+                else:
+                    validated += 1
+                    matches += self._match_count(facts) if facts else 0
+                for error in errors:
+                    self._report(error)
+            if validated:
+                self.stats.count_files('validate', suffix, validated, matches=matches)
+
+    def _report(self, error: ValidationError):
+        self.errors.append(error)
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def _validate_file(self, rel_path: str) -> List[ValidationError]:
+        """Validate the references of a single file, returning its errors."""
+        errors = []
+        try:
+            if rel_path in self.read_errors:
+                raise OSError(self.read_errors[rel_path])
+
+            facts = self.facts[rel_path]
+
+            self._validate_ext_resources(rel_path, facts, errors)
+            self._validate_res_paths(rel_path, facts, errors)
+            self._validate_uid_paths(rel_path, facts, errors)
+            self._check_file_has_uid(rel_path, facts, errors)
+
+        except Exception as e:
+            errors.append(ValidationError('validate-error', rel_path, detail=str(e)))
+
+        return errors
+
+    def _validate_res_paths(self, rel_path: str, facts: FileFacts, errors: List[ValidationError]):
         """Validate all res:// paths in a file."""
-        for match in self.res_path_pattern.finditer(content):
-            res_path = match.group(1)
-
-            # TODO: make ignoring certain files configurable :3 match the .gitignore?
-            if res_path == "res://override.cfg":
-                continue
-
-            # Skip paths that look like they're constructed dynamically
-            if any(marker in res_path for marker in ['{', '}', '%s', '%d', '%f']):
+        paths = self.paths
+        found = 0
+        for res_path, line_number, kind in facts.res_paths:
+            target = res_path[6:]  # Remove "res://"
+            # Most targets were seen by the walk as they are, count those without calling exists()
+            if target in paths.paths:
+                found += 1
                 continue
-
-            # Convert res:// path to actual file path
-            actual_path = self.project_root / res_path[6:]  # Remove "res://"
-
-            if actual_path.exists():
+            if paths.exists(target):
                 continue
-
-            lines = content.splitlines()
-            start_idx = match.start()
-            line_num = content.count("\n", 0, start_idx)
-            line = lines[line_num].strip()
-
-            if "FileAccess.file_exists" in line or "DirAccess.dir_exists" in line or line.startswith("#"):
+            # Editor plugins aren't needed by exports
+            if kind == 'editor_plugin' and self.export_filter is not None:
                 continue
 
-            self.errors.append(
-                f"{file_path.relative_to(self.project_root).as_posix()}: "
-                f"The file '{res_path}' does not exist"
-            )
+            errors.append(ValidationError('missing-file', rel_path, line_number, path=res_path, detail=kind))
+        paths.hits += found
 
-    def _validate_uid_paths(self, file_path: Path, content: str):
+    def _validate_uid_paths(self, rel_path: str, facts: FileFacts, errors: List[ValidationError]):
         """Validate all uid:// paths in a file."""
-        for match in self.uid_path_pattern.finditer(content):
-            uid_path = match.group(1)
-
+        for uid_path, line_number, kind in facts.uid_paths:
             if uid_path not in self.uid_to_path:
-                self.errors.append(
-                    f"{file_path.relative_to(self.project_root).as_posix()}: "
-                    f"The UID '{uid_path}' does not exist"
-                )
+                errors.append(ValidationError('missing-uid', rel_path, line_number, uid=uid_path, detail=kind))
 
-    def _check_file_has_uid(self, file_path: Path, content: str):
+    def _check_file_has_uid(self, rel_path: str, facts: FileFacts, errors: List[ValidationError]):
         """Check if files that should have UIDs actually have them."""
-        if file_path.suffix not in ['.tscn', '.tres']:
+        if not rel_path.endswith(RESOURCE_TEXT_EXTENSIONS):
             return
 
-        res_path = f"res://{file_path.relative_to(self.project_root).as_posix()}"
-
         # Check if file has a UID in its content or a corresponding .uid file
-        has_inline_uid = (self.scene_uid_pattern.search(content) or
-                         self.resource_uid_pattern.search(content))
-        has_uid_file = file_path.with_suffix(file_path.suffix + '.uid').exists()
-
-        if not has_inline_uid and not has_uid_file:
-            self.errors.append(
-                f"{file_path.relative_to(self.project_root).as_posix()}: "
-                f"The file has no UID defined"
-            )
+        if not facts.has_inline_uid and not self.paths.exists(rel_path + '.uid'):
+            errors.append(ValidationError('file-without-uid', rel_path))
 
-    def _get_binary_uid(self, file_path: Path) -> str:
+    def _get_binary_uid(self, file_path: str) -> str:
+        """Read the UID from the header of a binary resource, without reading the rest of the file."""
         with open(file_path, "rb") as f:
             header = f.read(4)
             if header == b"RSCC":
-                raise ValueError("Can't decompress Godot binary resource files.")
+                # Only the blocks holding the header get decompressed
+                f.seek(0)
+                compressed = CompressedFile(f)
+                if compressed.read(4) != b"RSRC":
+                    raise ValueError("Compressed file is not a binary Godot resource file.")
+                data = compressed.read(BINARY_HEADER_READ_SIZE)
             elif header == b"RSRC":
-                data = f.read()
+                data = f.read(BINARY_HEADER_READ_SIZE)
+            elif is_lfs_pointer(file_path):
+                return LFS_POINTER_UID
             else:
                 raise ValueError("Not a binary Godot resource file.")
 
-        offset = 0
-
-        def read(fmt: str, size: int):
-            nonlocal offset
-            val = struct.unpack(fmt, data[offset:offset+size])[0]
-            offset += size
-            return val
-
-        # big_endian (u32) + use_real64 (u32)
-        big_endian = read("<I", 4)
-        use_real64 = read("<I", 4)
-        endian = ">" if big_endian else "<"
+        return self._iuid_to_string(self._parse_binary_header_uid(data))
 
-        # version numbers
-        ver_major = read(endian + "I", 4)
-        ver_minor = read(endian + "I", 4)
-        ver_format = read(endian + "I", 4)
+    @staticmethod
+    def _parse_binary_header_uid(data: bytes) -> int:
+        """Parse the UID from the start of a binary resource, after the "RSRC" magic."""
+        try:
+            # big_endian (u32) + use_real64 (u32)
+            big_endian, use_real64 = struct.unpack_from("<II", data, 0)
+            endian = ">" if big_endian else "<"
 
-        # type string (Godot's ustring)
-        strlen = read(endian + "I", 4)
-        type_str = data[offset:offset+strlen].decode("utf-8", errors="ignore")
-        offset += strlen
+            # version numbers, then the type string (Godot's ustring)
+            ver_major, ver_minor, ver_format, strlen = struct.unpack_from(endian + "IIII", data, 8)
+            type_end = 24 + strlen
 
-        # metadata offset
-        metadata_offset = read(endian + "Q", 8)
+            # metadata offset, flags and UID
+            metadata_offset, flags, uid = struct.unpack_from(endian + "QIQ", data, type_end)
+        except struct.error:
+            raise ValueError("Binary resource header is truncated.") from None
 
-        # flags
-        flags = read(endian + "I", 4)
-
-        # UID
-        uid = read(endian + "Q", 8)
-
-        return self._iuid_to_string(uid)
+        # Resources saved without UIDs (e.g. by Godot 3) have no UID in this field
+        if not flags & BINARY_FLAG_UIDS:
+            return 0
+        return uid
 
+    @staticmethod
     def _iuid_to_string(uid: int) -> str:
         """
         Convert a Godot UID (64-bit integer) into its string form "uid://xxxx"
-        Uses base62 encoding like Godot.
+        Like ResourceUID::id_to_text, this uses base 34: the letters a-y, then the digits 0-8.
         """
-        alphabet = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
-        if uid == 0:
+        alphabet = "abcdefghijklmnopqrstuvwxy012345678"
+        # 0 is never assigned, and negative (as int64) IDs are invalid
+        if uid == 0 or uid >= 1 << 63:
             return "uid://<invalid>"
 
         chars = []
         while uid > 0:
-            uid, rem = divmod(uid, 62)
+            uid, rem = divmod(uid, len(alphabet))
             chars.append(alphabet[rem])
 
         return "uid://" + "".join(reversed(chars))
 
 
+    def dependency_graph(self) -> DependencyGraph:
+        """
+        Build the graph of references between project files, after load_project() or scan_project().
+
+        .uid and .import files add the file they describe, instead of adding
+        references of their own. References by UID are resolved to paths and
+        unknown UIDs are left out. The references to a file are looked up with
+        referrers(), so the graph is only valid until the next refresh().
+        """
+        graph = DependencyGraph(lambda key: (f"res://{rel_path}" for rel_path in self.referrers(key)))
+        for rel_path in self._iter_files(self.files, GODOT_FILE_EXTENSIONS):
+            if rel_path.endswith(('.uid', '.import')):
+                owner = posixpath.splitext(rel_path)[0]
+                if self.paths.exists(owner):
+                    graph.add_path(f"res://{owner}", exists=True)
+                continue
+
+            source_id = graph.add_path(f"res://{rel_path}", exists=True)
+            facts = self.facts.get(rel_path)
+            if facts is None:
+                continue
+
+            # An ext_resource with a known UID is loaded by its UID, the path is only a fallback
+            loaded_by_uid = {path for _, _, _, uid, path in facts.ext_resources if path and uid in self.uid_to_path}
+            for res_path, line_number, _ in facts.res_paths:
+                if res_path not in loaded_by_uid:
+                    graph.add_reference(source_id, self._normalize_res_path(res_path), line_number)
+            for uid, line_number, _ in facts.uid_paths:
+                target = self.uid_to_path.get(uid)
+                if target:
+                    graph.add_reference(source_id, target, line_number, uid)
+
+        return graph
+
+    @staticmethod
+    def _normalize_res_path(res_path: str) -> str:
+        """Normalize a res:// path like the existence checks do."""
+        return f"res://{posixpath.normpath(res_path[6:])}" if res_path[6:] else res_path
+
     def _check_duplicate_uids(self):
         """Check for duplicate UIDs in the project."""
         for uid, paths in self.duplicate_uids.items():
             if len(paths) > 1:
-                self.errors.append(
-                    f"Duplicate UID {uid} found in: {', '.join(set(paths))}"
-                )
+                self._report(ValidationError('duplicate-uid', uid=uid, detail=', '.join(sorted(set(paths)))))
 
-    def _get_godot_files(self) -> List[Path]:
-        """Get all relevant Godot files in the project."""
-        # Include more file types that can contain UIDs and resource references
-        extensions = {'.tscn', '.tres', '.gd', '.cs', '.uid', '.json', '.cfg', '.import', '.godot', '.mesh'}
-        files = []
+    def _check_project_uids(self):
+        """Checks over the UID mappings of the whole project, after all files were validated."""
+        # Check for duplicates
+        self._check_duplicate_uids()
 
+        # Sanity check: unique paths and unique UID's should be the same count
+        if len(self.uid_to_path) != len(self.path_to_uid):
+            self._report(ValidationError('uid-count-mismatch', detail=(
+                f"There are {len(self.path_to_uid)} unique paths and "
+                f"{len(self.uid_to_path)} UID definitions - These should be identical, as each of these paths should have a UID"
+            )))
+
+    def _is_walked(self, rel_path: str) -> bool:
+        """Check whether the walk would see a path, i.e. it isn't inside a pruned directory or left out of the export."""
+        parts = rel_path.split('/')
+        for depth in range(1, len(parts)):
+            if parts[depth - 1] in self.excluded_dirs or '/'.join(parts[:depth]) in self.ignored_dirs:
+                return False
+        return self.export_filter is None or not self.export_filter.excludes(rel_path)
+
+    def _get_godot_files(self) -> Dict[str, List[str]]:
+        """
+        Get all relevant Godot files in the project, grouped by suffix.
+
+        The tree is walked once and excluded directories are pruned before
+        they are entered, so caches like .godot/imported are never listed.
+        Directories Godot ignores and files the export leaves out are pruned
+        as well.
+        Every path seen on the way, including directories and files of other
+        types, is recorded in self.paths for existence checks.
+        """
+        files: Dict[str, List[str]] = defaultdict(list)
+        self._walk_tree(str(self.project_root), '', files)
+        return files
+
+    def _walk_tree(self, directory: str, rel_directory: str, files: Dict[str, List[str]]) -> List[str]:
+        """Walk a directory for _get_godot_files() or refresh(), returning the relative paths seen."""
+        export_filter = self.export_filter
+        seen = []
+        pending = [(directory, rel_directory)]
+
+        while pending:
+            directory, rel_directory = pending.pop()
+            try:
+                with os.scandir(directory) as scan:
+                    entries = list(scan)
+
+                # Like Godot, skip directories with a .gdignore, and other projects inside this one
+                if rel_directory and any(entry.name in DIRECTORY_IGNORE_MARKERS for entry in entries):
+                    self.ignored_dirs.add(rel_directory.rstrip('/'))
+                    continue
+
+                by_name = None
+                first_seen = len(seen)
+                for entry in entries:
+                    name = entry.name
+                    rel_path = rel_directory + name
+                    # Left out of the export, so it doesn't exist for the validation
+                    if export_filter is not None and export_filter.excludes(rel_path):
+                        continue
+                    seen.append(rel_path)
+
+                    # Like rglob, don't descend into symlinked directories
+                    if entry.is_dir(follow_symlinks=False):
+                        if name not in self.excluded_dirs and not (export_filter and export_filter.excludes_dir(rel_path)):
+                            pending.append((entry.path, rel_path + '/'))
+                        continue
+
+                    if not name.endswith(GODOT_FILE_EXTENSIONS):
+                        continue
+                    # Like os.path.splitext(), a hidden name like ".gd" has no suffix
+                    dot = name.rfind('.')
+                    if dot <= 0:
+                        continue
+                    suffix = name[dot:]
+                    files[suffix].append(rel_path)
+
+                    # Only imported assets that are small enough are read to check for Git LFS pointers
+                    if suffix == '.import':
+                        if by_name is None:
+                            by_name = {other.name: other for other in entries}
+                        asset = by_name.get(name[:-len('.import')])
+                        if asset is not None and _is_lfs_pointer_size(asset):
+                            self.lfs_candidates.add(rel_path[:-len('.import')])
+
+                self.paths.update(seen[first_seen:])
+                # Only trust misses in directories that were listed completely
+                self.paths.add_listed_dir(rel_directory.rstrip('/'))
+            except OSError as e:
+                self.warnings.append(f"Could not scan {Path(directory).as_posix()}: {e}")
+
+        return seen
+
+    @staticmethod
+    def _iter_files(files: Dict[str, List[str]], extensions):
+        """Iterate the grouped files for the given suffixes, in suffix order."""
         for ext in extensions:
-            files.extend(self.project_root.rglob(f'*{ext}'))
+            yield from files.get(ext, ())
 
-        # Filter out excluded directories
-        files = [f for f in files if not any(part in self.excluded_dirs for part in f.parts)]
-
-        # Convert to forward slashes
-        return [Path(f.as_posix()) for f in files]
+    def warning_messages(self) -> List[str]:
+        """Problems that don't fail the validation, like Git LFS objects that weren't pulled."""
+        messages = list(self.warnings)
+        if self.lfs_pointers:
+            shown = ', '.join(self.lfs_pointers[:5]) + (', ...' if len(self.lfs_pointers) > 5 else '')
+            messages.append(f"{len(self.lfs_pointers)} file(s) are Git LFS pointers, their content wasn't pulled (run git lfs pull): {shown}")
+        return messages
 
     def print_results(self):
         """Print validation results."""
-        if self.errors:
-            print("\nErrors:")
-            for error in self.errors:
-                print(f"  {error}")
-            print(f"\nFound {len(self.errors)} error(s)")
-        else:
-            print("\nAll UID and path validations passed!")
+        print_results(self.errors, len(self.uid_to_path))
+        for message in self.warning_messages():
+            print(f"Warning: {message}")
 
-        print(f"Found {len(self.uid_to_path)} unique UIDs")
 
+# Validator used by each parse worker process, see GodotValidator._run_parse_tasks
+_worker_validator: Optional[GodotValidator] = None
 
-def main():
-    """Main entry point for the pre-commit hook."""
-    import argparse
 
-    start_time = time.time()
+def _init_parse_worker(project_root: str):
+    global _worker_validator
+    _worker_validator = GodotValidator(project_root)
 
-    parser = argparse.ArgumentParser(description='Validate Godot 4 UIDs and resource paths')
-    parser.add_argument('--exclude', action='append', help='Directories to exclude (can be used multiple times)')
-    parser.add_argument('--project-root', help='Path to Godot project root (auto-detected if not specified)')
-    args = parser.parse_args()
 
-    # Find the project root (look for project.godot file)
-    if args.project_root:
-        project_root = Path(args.project_root)
+def _parse_file_worker(task: Tuple[str, Optional[str]]):
+    return _worker_validator._parse_file_task(task)
+
+
+def default_cache_file(project_root: Path) -> Path:
+    """The facts cache used when no --cache-file is given."""
+    return project_root / DEFAULT_CACHE_FILE
+
+
+def find_project_root(project_root_arg: Optional[str]) -> Optional[Path]:
+    """Use the given project root, or find the project.godot file from the current directory."""
+    if project_root_arg:
+        project_root = Path(project_root_arg)
     else:
         current_dir = Path.cwd()
         project_root = None
@@ -458,15 +1997,194 @@ def main():
                     break
 
     if not project_root or not project_root.exists():
+        return None
+    return project_root
+
+
+def get_staged_paths(project_root: Path) -> List[str]:
+    """
+    Get the paths in the project that are staged, relative to the project root.
+
+    Both sides of renames are included, and deleted paths too, so files that
+    still reference them are validated.
+    """
+    import subprocess
+
+    try:
+        output = subprocess.run(
+            ['git', 'diff', '--cached', '--name-status', '-z', '--relative', '--find-renames'],
+            cwd=project_root, check=True, capture_output=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Error: Could not get the staged files from git: {e}")
+        sys.exit(1)
+
+    paths = []
+    fields = iter(os.fsdecode(output).split('\0'))
+    for status in fields:
+        if not status:
+            continue
+        # Renames and copies list the old and the new path
+        paths.append(next(fields))
+        if status[0] in 'RC':
+            paths.append(next(fields))
+    return paths
+
+
+def get_project_paths(project_root: Path, file_names: List[str]) -> List[str]:
+    """Convert file names (e.g. from pre-commit, relative to the working directory) to paths relative to the project root."""
+    root = project_root.resolve()
+    paths = []
+    for file_name in file_names:
+        try:
+            paths.append(Path(file_name).resolve().relative_to(root).as_posix())
+        except ValueError:
+            # Outside of the Godot project
+            continue
+    return paths
+
+
+def main():
+    """Main entry point for the pre-commit hook."""
+    import argparse
+
+    start_time = time.time()
+
+    parser = argparse.ArgumentParser(description='Validate Godot 4 UIDs and resource paths')
+    parser.add_argument('files', nargs='*', help='Only validate these files and the files depending on them (the UIDs of all files are still checked)')
+    parser.add_argument('--staged', action='store_true', help='Only validate the files staged in git, and the files depending on them or on renamed and deleted files')
+    parser.add_argument('--exclude', action='append', help='Directories to exclude (can be used multiple times)')
+    parser.add_argument('--export-preset', metavar='NAME', help='Validate the project as exported with this preset: files its exclude_filter leaves out are skipped, and references to them are errors')
+    parser.add_argument('--require-lfs-objects', action='store_true', help='Report files that are Git LFS pointers as errors instead of warnings, for checkouts that ran git lfs pull')
+    parser.add_argument('--project-root', help='Path to Godot project root (auto-detected if not specified)')
+    parser.add_argument('--cache-file', help=CACHE_FILE_HELP)
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, help='Number of processes used to parse files (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true', help='Parse every file, ignoring and not writing the cache')
+    parser.add_argument('--fix', action='store_true', help='Give duplicate UIDs new ones and fix ext_resources whose UID and path disagree, then validate')
+    parser.add_argument('--dry-run', action='store_true', help='With --fix, only print the fixes')
+    parser.add_argument('--watch', action='store_true', help='Keep running, validate changed files as they are saved and answer --query')
+    parser.add_argument('--query', action='store_true', help='Get the results from a validator running with --watch, scan the project if none is running')
+    parser.add_argument('--socket', help='Socket of the watching validator (default: <project-root>/.godot/validate_godot_project.sock)')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between scans in watch mode when inotify is not available (default: 1)')
+    parser.add_argument('--poll', action='store_true', help='Poll for changes in watch mode, even if inotify is available')
+    parser.add_argument('--profile', metavar='FILE', help='Write a cProfile dump of the run to FILE (read it with pstats or snakeviz) and print statistics per phase and file type')
+    parser.add_argument('--profile-top', type=int, default=20, help='Number of slowest files listed with --profile (default: 20)')
+    parser.add_argument('--format', choices=['text', 'json', 'sarif'], default='text',
+                        help='Report errors as text, JSON Lines or SARIF; json and sarif are streamed to stdout as errors are found, progress goes to stderr')
+    args = parser.parse_args()
+    if args.fix and (args.watch or args.query):
+        parser.error("--fix can't be combined with --watch or --query")
+
+    output = sys.stdout
+    if args.format != 'text':
+        # Keep stdout for the report
+        sys.stdout = sys.stderr
+
+    project_root = find_project_root(args.project_root)
+    if not project_root:
         print("Error: Could not find project.godot file. Use --project-root to specify the location.")
         sys.exit(1)
 
     print(f"Found Godot project at: {project_root}")
 
     excluded_dirs = set(args.exclude) if args.exclude else None
-    validator = GodotValidator(str(project_root), excluded_dirs)
-    success = validator.scan_project()
-    validator.print_results()
+    export_filter = None
+    if args.export_preset:
+        try:
+            export_filter = ExportFilter.from_presets(project_root, args.export_preset)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"Validating the export of preset '{args.export_preset}', excluding: {', '.join(export_filter.filters) or 'nothing'}")
+    if args.no_cache:
+        cache_file = None
+    elif args.cache_file:
+        cache_file = Path(args.cache_file)
+    else:
+        cache_file = default_cache_file(project_root)
+
+    if args.format == 'json':
+        reporter = JsonReporter(output)
+    elif args.format == 'sarif':
+        reporter = SarifReporter(output, project_root)
+    else:
+        reporter = TextReporter(output)
+
+    socket_path = Path(args.socket) if args.socket else project_root / '.godot' / 'validate_godot_project.sock'
+    if args.query:
+        import godot_watch
+
+        response = godot_watch.query(socket_path)
+        if response is not None:
+            print("Results from the watching validator")
+            errors = [ValidationError(**error) for error in response['errors']]
+            for error in errors:
+                reporter.error(error)
+            reporter.finish(errors, response['uid_count'])
+            for message in response.get('warnings', []):
+                print(f"Warning: {message}")
+            if errors:
+                sys.exit(1)
+            print("\nSuccessfully validated")
+            return
+
+    def make_validator():
+        return GodotValidator(str(project_root), excluded_dirs, cache_file, max(1, args.jobs), export_filter=export_filter,
+                              require_lfs_objects=args.require_lfs_objects)
+
+    if args.watch:
+        import godot_watch
+
+        server = godot_watch.ValidationServer(make_validator, socket_path, args.poll_interval, args.poll)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
+    if args.fix:
+        import godot_fix
+
+        # Every UID has to be known to plan the fixes, so the whole project is validated first
+        validator = make_validator()
+        validator.scan_project()
+        plan = godot_fix.plan_fixes(validator)
+        godot_fix.print_plan(plan)
+        if not args.dry_run:
+            fix_errors = godot_fix.apply_fixes(plan, validator.project_root)
+            for error in fix_errors:
+                print(f"Error: {error}")
+            print(f"Rewrote {len(plan.edits) - len(fix_errors)} file(s)")
+
+    changed_paths = None
+    if args.staged:
+        changed_paths = get_staged_paths(project_root)
+    elif args.files:
+        changed_paths = get_project_paths(project_root, args.files)
+
+    validator = make_validator()
+    validator.on_error = reporter.error
+    if args.profile:
+        import cProfile
+
+        if validator.jobs > 1:
+            print("Files parsed in worker processes are timed, but not part of the profile, use --jobs 1 to include them")
+        validator.stats.time_files = True
+        profiler = cProfile.Profile()
+        success = profiler.runcall(validator.scan_project, changed_paths)
+        profiler.dump_stats(args.profile)
+    else:
+        success = validator.scan_project(changed_paths)
+    reporter.finish(validator.errors, len(validator.uid_to_path))
+    for message in validator.warning_messages():
+        print(f"Warning: {message}")
+
+    if args.profile:
+        validator.stats.print_report(args.profile_top)
+        print(f"\nWrote the profile to {args.profile}")
 
     print(f"Finished in {time.time() - start_time} seconds")
 
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the .tscn/.tres tokenizer of the Godot project validator.
+
+Generates a large synthetic scene and compares tokenize_resource() against the
+separate regex scans the validator used to run over every resource file. The
+default scene is about 11 MB, most of it an embedded mesh, the case the
+tokenizer is meant to be 3x faster for. Scenes without large arrays, like
+--mesh-bytes 200000, gain less since the work per reference dominates them.
+
+Usage: benchmark_resource_tokenizer.py [--ext-resources N] [--nodes N] [--mesh-bytes N] [--repeat N]
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / '.hooks'))
+
+from validate_godot_project import GodotValidator  # noqa: E402
+
+# The patterns the validator ran over each resource file before the tokenizer
+LEGACY_PATTERNS = {
+    'scene_uid': re.compile(r'\[gd_scene[^]]*uid="(uid://[^"]*)"[^]]*\]'),
+    'resource_uid': re.compile(r'\[gd_resource[^]]*uid="(uid://[^"]*)"[^]]*\]'),
+    'ext_resource_block': re.compile(r'\[ext_resource([^]]*)\]', re.MULTILINE | re.DOTALL),
+    'ext_resource_type': re.compile(r'type="([^"]*)"'),
+    'ext_resource_uid': re.compile(r'uid="(uid://[^"]*)"'),
+    'ext_resource_path': re.compile(r'path="([^"]*)"'),
+    'res_path': re.compile(r'"(res://(?!\.godot)[^"{}%]*)"'),
+    'uid_path': re.compile(r'"(uid://[^"]*)"'),
+}
+
+# The speedup over the legacy scans the tokenizer was asked for
+TARGET_SPEEDUP = 3.0
+
+
+def generate_scene(ext_resources: int, nodes: int, mesh_bytes: int) -> str:
+    """Generate a scene with ext_resources, a large embedded mesh and many instanced nodes."""
+    rng = random.Random(0)
+    parts = [f'[gd_scene load_steps={ext_resources + 2} format=3 uid="uid://bench0scene"]\n\n']
+    for i in range(ext_resources):
+        parts.append(
+            f'[ext_resource type="PackedScene" uid="uid://bench{i}" path="res://scenes/scene_{i}.tscn" id="{i}_ab"]\n'
+        )
+
+    data = ', '.join(str(rng.randint(0, 255)) for _ in range(mesh_bytes))
+    parts.append(
+        '\n[sub_resource type="ArrayMesh" id="ArrayMesh_1"]\n'
+        '_surfaces = [{\n"aabb": AABB(-1, -1, -1, 2, 2, 2),\n'
+        f'"vertex_data": PackedByteArray({data})\n}}]\n'
+    )
+
+    parts.append('\n[node name="Root" type="Node3D"]\n')
+    for i in range(nodes):
+        parts.append(
+            f'\n[node name="Instance{i}" parent="." instance=ExtResource("{i % max(ext_resources, 1)}_ab")]\n'
+            f'transform = Transform3D(1, 0, 0, 0, 1, 0, 0, 0, 1, {i}, 0, 0)\n'
+            f'editor_description = "instance number {i}"\n'
+        )
+    return ''.join(parts)
+
+
+def legacy_parse(content: str):
+    """Parse a resource file the way the validator did before the tokenizer."""
+    scene_uid = LEGACY_PATTERNS['scene_uid'].search(content)
+    resource_uid = LEGACY_PATTERNS['resource_uid'].search(content)
+
+    ext_resources = []
+    for match in LEGACY_PATTERNS['ext_resource_block'].finditer(content):
+        block = match.group(1)
+        line_number = content[:match.start()].count('\n') + 1
+        ext_resources.append((
+            line_number,
+            LEGACY_PATTERNS['ext_resource_type'].search(block),
+            LEGACY_PATTERNS['ext_resource_uid'].search(block),
+            LEGACY_PATTERNS['ext_resource_path'].search(block),
+        ))
+
+    res_paths = [match.group(1) for match in LEGACY_PATTERNS['res_path'].finditer(content)]
+    uid_paths = [match.group(1) for match in LEGACY_PATTERNS['uid_path'].finditer(content)]
+    return scene_uid, resource_uid, ext_resources, res_paths, uid_paths
+
+
+def best_time(func, repeat: int) -> float:
+    """Return the fastest of several runs, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the .tscn/.tres tokenizer against the legacy regex scans')
+    parser.add_argument('--ext-resources', type=int, default=300, help='Number of ext_resource entries')
+    parser.add_argument('--nodes', type=int, default=3000, help='Number of instanced nodes')
+    parser.add_argument('--mesh-bytes', type=int, default=2500000, help='Size of the embedded PackedByteArray')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, the fastest one is reported')
+    args = parser.parse_args()
+
+    content = generate_scene(args.ext_resources, args.nodes, args.mesh_bytes)
+    scene_path = 'benchmark.tscn'
+    validator = GodotValidator('.')
+
+    legacy = best_time(lambda: legacy_parse(content), args.repeat)
+    tokenizer = best_time(lambda: validator._extract_facts(scene_path, content), args.repeat)
+
+    print(f"Scene size: {len(content) / (1024 * 1024):.2f} MB, "
+          f"{args.ext_resources} ext_resources, {args.nodes} nodes")
+    print(f"Legacy regex scans: {legacy * 1000:.2f} ms")
+    print(f"Tokenizer:          {tokenizer * 1000:.2f} ms")
+    speedup = legacy / tokenizer
+    print(f"Speedup:            {speedup:.1f}x, "
+          f"{'meets' if speedup >= TARGET_SPEEDUP else 'misses'} the target of {TARGET_SPEEDUP:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
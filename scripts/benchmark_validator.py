@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Godot project validator on generated projects.
+
+Generates a synthetic Godot project (scenes with ext_resources, scripts with
+.uid files, assets with .import files, binary .mesh resources, some of them
+compressed, and a number of deliberately broken references), then times the
+phases of the validator with and without a warm cache.
+
+The warm run is checked against the 200 ms a run on an unchanged project
+should take, in the validator and as the hook's own process, which adds
+starting Python and the imports.
+
+Results are printed and can be saved as JSON, and compared to an earlier
+result to spot regressions between versions.
+
+Usage: benchmark_validator.py [--scenes N] [--ext-resources N] [--output results.json] [--compare baseline.json]
+"""
+
+import io
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import struct
+import argparse
+import platform
+import contextlib
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / '.hooks'))
+
+from validate_godot_project import GodotValidator, ValidatorStats, BINARY_FLAG_UIDS, default_cache_file  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+PHASES = ('scan', 'parse', 'collect', 'validate')
+# What a run on an unchanged project with a warm cache should take at most, in seconds
+WARM_TARGET = 0.2
+HOOK_SCRIPT = Path(__file__).resolve().parent.parent / '.hooks' / 'validate_godot_project.py'
+COMPRESSED_BLOCK_SIZE = 4096
+
+
+class ProjectGenerator:
+    """Writes a synthetic Godot project with known contents."""
+
+    def __init__(self, root: Path, seed: int):
+        self.root = root
+        self.rng = random.Random(seed)
+        self.uids = set()
+        self.broken_references = 0
+
+    def uid(self) -> str:
+        return GodotValidator._iuid_to_string(self.uid_value())
+
+    def uid_value(self) -> int:
+        while True:
+            value = self.rng.randrange(1, 1 << 63)
+            if value not in self.uids:
+                self.uids.add(value)
+                return value
+
+    def write(self, rel_path: str, content):
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, bytes):
+            path.write_bytes(content)
+        else:
+            path.write_text(content, encoding='utf-8', newline='\n')
+
+    def generate(self, scenes: int, ext_resources: int, scripts: int, assets: int, meshes: int,
+                 scene_bytes: int, broken: int):
+        """Generate the project, returning the resources as (type, res:// path, uid) tuples."""
+        resources = []
+        for i in range(scripts):
+            resources.append(self.script(f"scripts/group_{i % 10}/script_{i}.gd", scenes))
+        for i in range(assets):
+            resources.append(self.asset(f"assets/group_{i % 10}/texture_{i}.png"))
+        for i in range(meshes):
+            resources.append(self.mesh(f"meshes/mesh_{i}.mesh", compressed=i % 2 == 1))
+
+        scene_paths = [(f"scenes/group_{i % 10}/scene_{i}.tscn", self.uid()) for i in range(scenes)]
+        # Spread the broken references over the scenes
+        broken_per_scene = [0] * scenes
+        for _ in range(broken if scenes else 0):
+            broken_per_scene[self.rng.randrange(scenes)] += 1
+
+        for i, (rel_path, uid) in enumerate(scene_paths):
+            # Scenes only instance scenes generated before them, so there are no cycles
+            candidates = resources + [('PackedScene', f"res://{path}", scene_uid) for path, scene_uid in scene_paths[:i]]
+            self.scene(rel_path, uid, candidates, ext_resources, scene_bytes, broken_per_scene[i])
+
+        main_scene_uid = scene_paths[-1][1] if scene_paths else ''
+        self.write('project.godot', (
+            'config_version=5\n\n'
+            '[application]\n\n'
+            'config/name="Benchmark"\n'
+            f'run/main_scene="{main_scene_uid}"\n'
+        ))
+        return resources
+
+    def script(self, rel_path: str, scenes: int):
+        uid = self.uid()
+        lines = ['extends Node', '']
+        for i in range(self.rng.randint(0, 3)):
+            lines.append(f'const SCENE_{i} = preload("res://scenes/group_0/scene_0.tscn")' if scenes else '')
+        lines += [f'func method_{i}() -> void:\n\tprint("method {i}")\n' for i in range(20)]
+        self.write(rel_path, '\n'.join(lines))
+        self.write(rel_path + '.uid', f"{uid}\n")
+        return ('Script', f"res://{rel_path}", uid)
+
+    def asset(self, rel_path: str):
+        uid = self.uid()
+        self.write(rel_path, self.rng.randbytes(self.rng.randint(256, 4096)))
+        self.write(rel_path + '.import', (
+            '[remap]\n\n'
+            'importer="texture"\n'
+            'type="CompressedTexture2D"\n'
+            f'uid="{uid}"\n'
+            f'path="res://.godot/imported/{Path(rel_path).name}-{self.rng.getrandbits(64):016x}.ctex"\n\n'
+            '[deps]\n\n'
+            f'source_file="res://{rel_path}"\n'
+        ))
+        return ('Texture2D', f"res://{rel_path}", uid)
+
+    def mesh(self, rel_path: str, compressed: bool):
+        value = self.uid_value()
+        uid = GodotValidator._iuid_to_string(value)
+        type_name = b'ArrayMesh\0'
+        data = (
+            b'RSRC'
+            + struct.pack('<IIIIII', 0, 0, 4, 4, 6, len(type_name)) + type_name
+            + struct.pack('<QIQ', 0, BINARY_FLAG_UIDS, value)
+            + self.rng.randbytes(self.rng.randint(2048, 16384))
+        )
+        if compressed:
+            # Deflate, the one mode that only needs zlib to write
+            blocks = [zlib.compress(data[offset:offset + COMPRESSED_BLOCK_SIZE])
+                      for offset in range(0, len(data) // COMPRESSED_BLOCK_SIZE * COMPRESSED_BLOCK_SIZE + 1, COMPRESSED_BLOCK_SIZE)]
+            data = (b'RSCC' + struct.pack('<III', 1, COMPRESSED_BLOCK_SIZE, len(data))
+                    + b''.join(struct.pack('<I', len(block)) for block in blocks) + b''.join(blocks) + b'RSCC')
+        self.write(rel_path, data)
+        return ('ArrayMesh', f"res://{rel_path}", uid)
+
+    def scene(self, rel_path: str, uid: str, candidates, ext_resources: int, scene_bytes: int, broken: int):
+        references = self.rng.sample(candidates, min(ext_resources, len(candidates)))
+        parts = [f'[gd_scene load_steps={len(references) + broken + 2} format=3 uid="{uid}"]\n\n']
+        ids = []
+        for i, (resource_type, path, resource_uid) in enumerate(references):
+            ids.append(f"{i}_{self.rng.getrandbits(20):05x}")
+            parts.append(f'[ext_resource type="{resource_type}" uid="{resource_uid}" path="{path}" id="{ids[-1]}"]\n')
+        for i in range(broken):
+            self.broken_references += 1
+            if i % 2:
+                parts.append(f'[ext_resource type="Script" uid="{self.uid()}" path="res://missing/script_{i}.gd" id="broken_{i}"]\n')
+            else:
+                parts.append(f'[ext_resource type="Texture2D" path="res://missing/texture_{i}.png" id="broken_{i}"]\n')
+
+        data = ', '.join(str(self.rng.randrange(256)) for _ in range(scene_bytes // 4))
+        parts.append(
+            '\n[sub_resource type="ArrayMesh" id="ArrayMesh_1"]\n'
+            f'_surfaces = [{{\n"aabb": AABB(-1, -1, -1, 2, 2, 2),\n"vertex_data": PackedByteArray({data})\n}}]\n'
+        )
+        parts.append('\n[node name="Root" type="Node3D"]\n')
+        for i, resource_id in enumerate(ids):
+            parts.append(f'\n[node name="Child{i}" type="Node3D" parent="."]\nmetadata/resource = ExtResource("{resource_id}")\n')
+        self.write(rel_path, ''.join(parts))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished children, in MB."""
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return round(max(self_rss, children_rss) / (1024 * 1024), 1)
+
+
+def project_size(root: Path):
+    """Count the files the validator reads and their total size."""
+    validator = GodotValidator(str(root))
+    with contextlib.redirect_stdout(io.StringIO()):
+        validator.load_project()
+    paths = [path for group in validator.files.values() for path in group]
+    return len(paths), sum((root / path).stat().st_size for path in paths)
+
+
+def run_validator(root: Path, cache_file, jobs: int) -> dict:
+    """Run GodotValidator.scan_project(), with the time of each phase from its ValidatorStats."""
+    stats = ValidatorStats()
+    validator = GodotValidator(str(root), cache_file=cache_file, jobs=jobs, stats=stats)
+    # The validator reports its progress, the benchmark prints its own summary
+    with contextlib.redirect_stdout(io.StringIO()):
+        validator.scan_project()
+
+    times = {phase: stats.phases[phase].seconds for phase in PHASES}
+    return {
+        'phases': times,
+        'total': sum(times.values()),
+        'errors': len(validator.errors),
+        'cache_hits': validator.cache.hits,
+        'bytes_read': validator.contents.bytes_read,
+    }
+
+
+def best_run(root: Path, cache_file, jobs: int, repeat: int, warm: bool) -> dict:
+    """Return the fastest of several runs, with a cold or a warm cache."""
+    best = None
+    for _ in range(repeat):
+        if cache_file and not warm and cache_file.exists():
+            cache_file.unlink()
+        result = run_validator(root, cache_file if warm else None, jobs)
+        if best is None or result['total'] < best['total']:
+            best = result
+    return best
+
+
+def time_hook(root: Path, jobs: int, repeat: int) -> float:
+    """The fastest wall time of the hook as its own process, which includes starting Python and the imports."""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        # The generated project has broken references, so the exit code isn't checked
+        subprocess.run([sys.executable, str(HOOK_SCRIPT), '--project-root', str(root), '--jobs', str(jobs)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        seconds = time.perf_counter() - t0
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+def print_target(warm: dict, hook_seconds: float):
+    for name, seconds in (('Warm validator run', warm['total']), ('Warm hook process', hook_seconds)):
+        verdict = 'within' if seconds <= WARM_TARGET else 'over'
+        print(f"{name}: {seconds * 1000:.1f} ms, {verdict} the {WARM_TARGET * 1000:.0f} ms target")
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_run(name: str, run: dict, file_count: int, total_bytes: int):
+    total = run['total']
+    print(f"\n{name}: {total * 1000:.1f} ms, {file_count / total:.0f} files/s, "
+          f"{total_bytes / (1024 * 1024) / total:.1f} MB/s, {run['errors']} error(s), {run['cache_hits']} cache hits")
+    for phase in PHASES:
+        print(f"  {phase:<9} {run['phases'][phase] * 1000:9.1f} ms")
+
+
+def print_comparison(results: dict, baseline: dict):
+    print(f"\nCompared to {baseline.get('revision') or 'the baseline'}:")
+    for name in ('cold', 'warm'):
+        if name not in baseline.get('runs', {}):
+            continue
+        for phase in PHASES + ('total',):
+            new = results['runs'][name]['total'] if phase == 'total' else results['runs'][name]['phases'][phase]
+            old = baseline['runs'][name]['total'] if phase == 'total' else baseline['runs'][name]['phases'][phase]
+            change = (new - old) / old * 100 if old else 0.0
+            print(f"  {name} {phase:<9} {old * 1000:9.1f} ms -> {new * 1000:9.1f} ms ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Godot project validator on a generated project')
+    parser.add_argument('--scenes', type=int, default=500, help='Number of .tscn scenes')
+    parser.add_argument('--ext-resources', type=int, default=20, help='ext_resources per scene')
+    parser.add_argument('--scripts', type=int, default=500, help='Number of .gd scripts, each with a .uid file')
+    parser.add_argument('--assets', type=int, default=500, help='Number of assets, each with an .import file')
+    parser.add_argument('--meshes', type=int, default=200, help='Number of binary .mesh resources, half of them compressed')
+    parser.add_argument('--scene-bytes', type=int, default=20000, help='Approximate size of the embedded data in each scene')
+    parser.add_argument('--broken', type=int, default=50, help='Number of broken ext_resource references')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generated project')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='Number of processes used to parse files')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, the fastest one is reported')
+    parser.add_argument('--project-dir', help='Where to generate the project (default: a temporary directory that is removed afterwards)')
+    parser.add_argument('--output', help='Save the results as JSON')
+    parser.add_argument('--compare', help='Compare the results to ones saved earlier with --output')
+    args = parser.parse_args()
+
+    if args.project_dir:
+        root = Path(args.project_dir)
+        if root.exists() and any(root.iterdir()):
+            print(f"Error: {root} is not empty")
+            sys.exit(1)
+        temp_dir = None
+    else:
+        temp_dir = tempfile.mkdtemp(prefix='godot_validator_benchmark_')
+        root = Path(temp_dir)
+
+    try:
+        t0 = time.perf_counter()
+        generator = ProjectGenerator(root, args.seed)
+        generator.generate(args.scenes, args.ext_resources, args.scripts, args.assets, args.meshes,
+                           args.scene_bytes, args.broken)
+        file_count, total_bytes = project_size(root)
+        print(f"Generated {file_count} files ({total_bytes / (1024 * 1024):.1f} MB) "
+              f"with {generator.broken_references} broken references in {time.perf_counter() - t0:.1f} seconds")
+
+        cache_file = default_cache_file(root)
+        runs = {
+            'cold': best_run(root, cache_file, args.jobs, args.repeat, warm=False),
+        }
+        # Fill the cache once, then measure runs that can use it
+        run_validator(root, cache_file, args.jobs)
+        runs['warm'] = best_run(root, cache_file, args.jobs, args.repeat, warm=True)
+
+        hook_seconds = time_hook(root, args.jobs, args.repeat)
+
+        for name, run in runs.items():
+            print_run(f"{name.capitalize()} cache", run, file_count, total_bytes)
+        print()
+        print_target(runs['warm'], hook_seconds)
+
+        results = {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {key: value for key, value in vars(args).items() if key not in ('project_dir', 'output', 'compare')},
+            'project': {'files': file_count, 'bytes': total_bytes, 'broken_references': generator.broken_references},
+            'runs': {
+                name: dict(run, files_per_second=file_count / run['total'],
+                           mb_per_second=total_bytes / (1024 * 1024) / run['total'])
+                for name, run in runs.items()
+            },
+            'hook_seconds': hook_seconds,
+            'warm_target': WARM_TARGET,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        print(f"\nPeak RSS: {results['peak_rss_mb']} MB")
+
+        if args.compare:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                print_comparison(results, json.load(f))
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"Saved results to {args.output}")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Estimate the size of a release before exporting it, and check it against the itch.io limits.
+
+The project is walked and its references are resolved by the project
+validator (reusing its cache), and the resources reachable from the main
+scene and the autoloads are collected from the dependency graph. For each
+one the files its import made in .godot/imported are added up, since those
+are what an export packs, and other resources count with their own size.
+
+With --export-preset the preset's exclude_filter is applied. Presets that
+export all resources (or all but some) pack everything, not only what is
+reachable, so for those every exported resource is counted instead.
+
+The estimate doesn't know about compression or the export templates, so it
+doesn't replace test_release_size.py on the actual build, but it fails in
+seconds when a release can't fit.
+
+Usage: estimate_release_size.py [--project-root DIR] [--export-preset NAME] [--top N] [--json]
+"""
+
+import sys
+import json
+import argparse
+import contextlib
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / '.hooks'))
+
+from validate_godot_project import CACHE_FILE_HELP, ExportFilter, GodotValidator, default_cache_file, find_project_root, parse_config_file  # noqa: E402
+from test_release_size import ITCH_IO_MAX_SIZE_MB, ITCH_IO_MAX_SIZE_MB_PER_FILE, format_size  # noqa: E402
+
+# Project settings in [application] whose resources are loaded by the engine itself
+ROOT_SETTINGS = ('run/main_scene', 'config/icon', 'boot_splash/image')
+# Export modes that pack every resource except the excluded ones
+ALL_RESOURCES_MODES = ('all_resources', 'exclude', 'customized')
+# Resources that are exported without being imported
+RESOURCE_EXTENSIONS = ('.tscn', '.scn', '.tres', '.res', '.gd', '.cs', '.mesh', '.gdshader', '.gdshaderinc')
+# Importers whose resources are exported as the source file, or not at all
+KEEP_IMPORTER = 'keep'
+SKIP_IMPORTER = 'skip'
+
+
+def find_roots(validator: GodotValidator, export_filter: Optional[ExportFilter]) -> List[str]:
+    """The res:// paths a release starts loading from: the main scene, the autoloads and what the preset lists."""
+    with open(validator.project_root / 'project.godot', encoding='utf-8') as f:
+        settings = parse_config_file(f.read())
+
+    texts = [settings.get('application', {})[key].string() for key in ROOT_SETTINGS if key in settings.get('application', {})]
+    # Autoloads that are singletons start with a "*"
+    texts.extend(value.string().lstrip('*') for value in settings.get('autoload', {}).values() if value.string())
+    if export_filter and export_filter.export_mode not in ALL_RESOURCES_MODES:
+        texts.extend(export_filter.export_files)
+
+    roots = []
+    for text in filter(None, texts):
+        path = validator.uid_to_path.get(text) if text.startswith('uid://') else text
+        if path and path not in roots:
+            roots.append(path)
+    return roots
+
+
+def reachable_resources(validator: GodotValidator, roots: List[str]) -> Set[str]:
+    """
+    The existing roots and the files they depend on, directly or through other files.
+
+    The project settings are packed too, but aren't a root themselves, as
+    they also reference the editor plugins.
+    """
+    graph = validator.dependency_graph()
+    reachable = set(roots)
+    for root in roots:
+        reachable.update(graph.dependencies(root))
+    # References to directories are part of the graph, but not of a pack
+    reachable = {path for path in reachable if validator.paths.exists(path[6:]) and (validator.project_root / path[6:]).is_file()}
+    reachable.add('res://project.godot')
+    return reachable
+
+
+def exported_resources(validator: GodotValidator) -> Set[str]:
+    """Every resource an export of all resources packs: imported assets and resource files."""
+    resources = {'res://project.godot'}
+    for rel_path in validator.files.get('.import', ()):
+        owner = rel_path[:-len('.import')]
+        if validator.paths.exists(owner):
+            resources.add(f"res://{owner}")
+    for suffix in RESOURCE_EXTENSIONS:
+        for rel_path in validator.files.get(suffix, ()):
+            resources.add(f"res://{rel_path}")
+    return resources
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def resource_size(project_root: Path, res_path: str) -> Tuple[int, bool]:
+    """
+    The bytes a resource adds to a pack, and whether they're known.
+
+    An imported resource is packed as the files its import made, listed in
+    its .import file, plus the .import file itself. When those don't exist
+    (the project was never opened in the editor) the source is counted and
+    the size isn't known.
+    """
+    source = project_root / res_path[6:]
+    import_file = source.with_name(source.name + '.import')
+    if not import_file.is_file():
+        return _file_size(source), True
+
+    try:
+        with open(import_file, encoding='utf-8') as f:
+            sections = parse_config_file(f.read())
+    except (OSError, UnicodeDecodeError):
+        return _file_size(source), False
+
+    remap = sections.get('remap', {})
+    importer = remap['importer'].string() if 'importer' in remap else None
+    size = _file_size(import_file)
+    if importer == SKIP_IMPORTER:
+        return size, True
+    if importer == KEEP_IMPORTER:
+        return size + _file_size(source), True
+
+    deps = sections.get('deps', {})
+    if 'dest_files' in deps:
+        dest_files = deps['dest_files'].strings()
+    else:
+        dest_files = [value.string() for key, value in remap.items() if key == 'path' or key.startswith('path.')]
+    imported = [project_root / path[6:] for path in dest_files if path and path.startswith('res://')]
+    if not imported or not all(path.is_file() for path in imported):
+        return size + _file_size(source), False
+    return size + sum(map(_file_size, imported)), True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estimate the size of a release before exporting it, and check it against the itch.io limits')
+    parser.add_argument('--project-root', help='Path to Godot project root (auto-detected if not specified)')
+    parser.add_argument('--cache-file', help=CACHE_FILE_HELP)
+    parser.add_argument('--export-preset', metavar='NAME', help='Estimate what this preset of export_presets.cfg exports')
+    parser.add_argument('--top', type=int, default=15, help='Number of largest resources listed (default: 15)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    project_root = find_project_root(args.project_root)
+    if not project_root:
+        print("Error: Could not find project.godot file. Use --project-root to specify the location.")
+        sys.exit(1)
+
+    export_filter = None
+    if args.export_preset:
+        try:
+            export_filter = ExportFilter.from_presets(project_root, args.export_preset)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    cache_file = Path(args.cache_file) if args.cache_file else default_cache_file(project_root)
+    validator = GodotValidator(str(project_root), cache_file=cache_file, export_filter=export_filter)
+    # Keep stdout clean for the results
+    with contextlib.redirect_stdout(sys.stderr):
+        validator.load_project()
+        validator.cache.save()
+
+    if export_filter and export_filter.export_mode in ALL_RESOURCES_MODES:
+        basis = f"all resources exported by {args.export_preset}"
+        resources = exported_resources(validator)
+    else:
+        basis = "resources reachable from the main scene and autoloads"
+        resources = reachable_resources(validator, find_roots(validator, export_filter))
+
+    sizes: Dict[str, int] = {}
+    not_imported = []
+    for path in sorted(resources):
+        sizes[path], known = resource_size(project_root, path)
+        if not known:
+            not_imported.append(path)
+    total = sum(sizes.values())
+
+    errors = []
+    # The pack is a single file, so it has to fit the limit per file as well
+    if total > ITCH_IO_MAX_SIZE_MB_PER_FILE:
+        errors.append(f"The estimated pack size {format_size(total)} exceeds the itch.io limit of {format_size(ITCH_IO_MAX_SIZE_MB_PER_FILE)} per file")
+    if total > ITCH_IO_MAX_SIZE_MB:
+        errors.append(f"The estimated pack size {format_size(total)} exceeds the itch.io limit of {format_size(ITCH_IO_MAX_SIZE_MB)} in total")
+
+    largest = sorted(sizes.items(), key=lambda item: (-item[1], item[0]))[:args.top]
+    if args.json:
+        print(json.dumps({
+            'basis': basis,
+            'total': total,
+            'resources': len(sizes),
+            'largest': [{'path': path, 'size': size} for path, size in largest],
+            'not_imported': not_imported,
+            'errors': errors,
+        }, indent=2))
+    else:
+        print(f"{len(sizes)} {basis}: {format_size(total)} "
+              f"({total / ITCH_IO_MAX_SIZE_MB_PER_FILE * 100:.1f}% of the itch.io limit per file)")
+        print("\nLargest resources:")
+        for path, size in largest:
+            print(f"  {format_size(size):>12}  {path}")
+        if len(sizes) > args.top:
+            print(f"  ... and {len(sizes) - args.top} more")
+        if not_imported:
+            print(f"\nWARNING: {len(not_imported)} resource(s) have no imported files, their source size is counted. "
+                  f"Open the project in the editor to import them.")
+            for path in not_imported[:args.top]:
+                print(f"  {path}")
+            if len(not_imported) > args.top:
+                print(f"  ... and {len(not_imported) - args.top} more")
+        for error in errors:
+            print(f"ERROR: {error}")
+
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
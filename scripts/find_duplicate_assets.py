@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Find files with the same content in a Godot project, e.g. copies of textures or sounds.
+
+The files are taken from the project validator's walk, so directories Godot
+ignores (and with --export-preset, files the export leaves out) aren't
+checked. Files are compared by size first, and files of a unique size are
+never read. Of files of the same size only the first and last block are
+hashed, and only when those match are the files hashed completely, reading
+them in chunks.
+
+Every copy is listed with its UID and the files referencing it, so the
+references can be moved to one of them before the others are deleted.
+
+Usage: find_duplicate_assets.py [--project-root DIR] [--export-preset NAME] [--min-size BYTES] [--json]
+"""
+
+import os
+import sys
+import json
+import stat
+import hashlib
+import argparse
+import contextlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / '.hooks'))
+
+from validate_godot_project import CACHE_FILE_HELP, ExportFilter, GodotValidator, default_cache_file, find_project_root  # noqa: E402
+from test_release_size import format_size  # noqa: E402
+
+# Bytes hashed at the start and the end of files of the same size
+EDGE_BLOCK_SIZE = 64 * 1024
+# Bytes read at a time when hashing whole files
+CHUNK_SIZE = 1024 * 1024
+# Files describing another file, copies of an asset have their own
+SIDECAR_SUFFIXES = ('.import', '.uid')
+
+
+def _edge_digest(path: str, size: int) -> str:
+    """Hash the first and last block of a file, which is the whole file if it's small."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read(EDGE_BLOCK_SIZE))
+        if size > EDGE_BLOCK_SIZE:
+            f.seek(max(EDGE_BLOCK_SIZE, size - EDGE_BLOCK_SIZE))
+            digest.update(f.read(EDGE_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def _full_digest(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _split(groups: Iterable[List[str]], key) -> List[List[str]]:
+    """Split groups of paths by key, dropping the paths that end up alone."""
+    result = []
+    for paths in groups:
+        buckets: Dict[str, List[str]] = defaultdict(list)
+        for path in paths:
+            try:
+                buckets[key(path)].append(path)
+            except OSError as e:
+                print(f"Could not read {path}: {e}", file=sys.stderr)
+        result.extend(bucket for bucket in buckets.values() if len(bucket) > 1)
+    return result
+
+
+def find_duplicates(project_root: Path, rel_paths: Iterable[str], min_size: int = 1) -> List[List[str]]:
+    """Group the files (relative to the project root) that have the same content, largest files first."""
+    by_size: Dict[int, List[str]] = defaultdict(list)
+    for rel_path in rel_paths:
+        try:
+            info = os.stat(project_root / rel_path)
+        except OSError:
+            continue
+        if stat.S_ISREG(info.st_mode) and info.st_size >= min_size:
+            by_size[info.st_size].append(rel_path)
+
+    groups = []
+    for size, paths in by_size.items():
+        if len(paths) < 2:
+            continue
+        candidates = _split([paths], lambda path: _edge_digest(str(project_root / path), size))
+        # The edge blocks cover small files completely
+        if size > 2 * EDGE_BLOCK_SIZE:
+            candidates = _split(candidates, lambda path: _full_digest(str(project_root / path)))
+        groups.extend(sorted(group) for group in candidates)
+
+    return sorted(groups, key=lambda group: (-os.path.getsize(project_root / group[0]), group))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find files with the same content in a Godot project')
+    parser.add_argument('--project-root', help='Path to Godot project root (auto-detected if not specified)')
+    parser.add_argument('--cache-file', help=CACHE_FILE_HELP)
+    parser.add_argument('--export-preset', metavar='NAME', help='Only check the files this preset of export_presets.cfg exports')
+    parser.add_argument('--min-size', type=int, default=1024, metavar='BYTES', help='Ignore files smaller than this (default: 1024)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    project_root = find_project_root(args.project_root)
+    if not project_root:
+        print("Error: Could not find project.godot file. Use --project-root to specify the location.")
+        sys.exit(1)
+
+    export_filter = None
+    if args.export_preset:
+        try:
+            export_filter = ExportFilter.from_presets(project_root, args.export_preset)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    cache_file = Path(args.cache_file) if args.cache_file else default_cache_file(project_root)
+    validator = GodotValidator(str(project_root), cache_file=cache_file, export_filter=export_filter)
+    # Keep stdout clean for the results
+    with contextlib.redirect_stdout(sys.stderr):
+        validator.load_project()
+        validator.cache.save()
+    graph = validator.dependency_graph()
+
+    # Directories the walk didn't enter (like .godot) are in the paths too, but not below them
+    rel_paths = (
+        path for path in validator.paths.paths
+        if path and path not in validator.paths.listed_dirs and not path.endswith(SIDECAR_SUFFIXES)
+    )
+    groups = find_duplicates(project_root, rel_paths, args.min_size)
+
+    results = []
+    for group in groups:
+        copies = []
+        for rel_path in group:
+            res_path = f"res://{rel_path}"
+            referrers = sorted({reference.source for reference in graph.referrers(res_path) if reference.source != res_path})
+            copies.append({'path': res_path, 'uid': validator.path_to_uid.get(res_path), 'referenced_by': referrers})
+        size = (project_root / group[0]).stat().st_size
+        results.append({'size': size, 'wasted': size * (len(group) - 1), 'copies': copies})
+    wasted = sum(result['wasted'] for result in results)
+
+    if args.json:
+        print(json.dumps({'wasted': wasted, 'duplicates': results}, indent=2))
+    else:
+        print(f"{len(results)} file(s) have copies with the same content, taking {format_size(wasted)} more than needed")
+        for result in results:
+            print(f"\n{format_size(result['size'])}, {len(result['copies'])} copies:")
+            for copy in result['copies']:
+                print(f"  {copy['path']} ({copy['uid'] or 'no UID'})")
+                for referrer in copy['referenced_by']:
+                    print(f"    referenced by {referrer}")
+                if not copy['referenced_by']:
+                    print("    not referenced")
+
+
+if __name__ == "__main__":
+    main()
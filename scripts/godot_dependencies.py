@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Query the dependency graph of a Godot project, as seen by the project validator.
+
+  impact PATH [--move]  References that break when PATH (a file or directory) is deleted or moved
+  orphans               Files that nothing references by path or UID
+  deps PATH             Everything PATH depends on, directly or through other files
+
+PATH can be a res:// path, a uid:// or a path relative to the project root.
+Scripts that are only used through their class_name, and files that are only
+loaded by dynamically built paths, are listed as orphans too.
+
+Usage: godot_dependencies.py [--project-root DIR] [--json] {impact,orphans,deps} ...
+"""
+
+import sys
+import json
+import argparse
+import contextlib
+import posixpath
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / '.hooks'))
+
+from validate_godot_project import CACHE_FILE_HELP, GodotValidator, default_cache_file, find_project_root  # noqa: E402
+
+# Project settings, export presets, plugin configs and GDExtensions are where references start, nothing references them
+ORPHAN_IGNORED_SUFFIXES = ('.godot', '.cfg', '.gdextension')
+
+
+def resolve_path(validator: GodotValidator, path: str) -> str:
+    """Turn the PATH argument into the res:// path used by the graph."""
+    if path.startswith('uid://'):
+        if path not in validator.uid_to_path:
+            print(f"Error: Unknown UID {path}")
+            sys.exit(1)
+        return validator.uid_to_path[path]
+
+    if path.startswith('res://'):
+        path = path[6:]
+    path = posixpath.normpath(path.replace('\\', '/'))
+    return 'res://' if path == '.' else f"res://{path}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the dependency graph of a Godot project')
+    parser.add_argument('--project-root', help='Path to Godot project root (auto-detected if not specified)')
+    parser.add_argument('--cache-file', help=CACHE_FILE_HELP)
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    impact_parser = subparsers.add_parser('impact', help='References that break when a file or directory is deleted or moved')
+    impact_parser.add_argument('path')
+    impact_parser.add_argument('--move', action='store_true', help='Only report what breaks when moving, references by UID keep working')
+
+    orphans_parser = subparsers.add_parser('orphans', help='Files that nothing references')
+    orphans_parser.add_argument('--ignore', action='append', default=[], help='Ignore files under this res:// path (can be used multiple times)')
+
+    deps_parser = subparsers.add_parser('deps', help='Everything a file or directory depends on')
+    deps_parser.add_argument('path')
+    args = parser.parse_args()
+
+    project_root = find_project_root(args.project_root)
+    if not project_root:
+        print("Error: Could not find project.godot file. Use --project-root to specify the location.")
+        sys.exit(1)
+
+    cache_file = Path(args.cache_file) if args.cache_file else default_cache_file(project_root)
+    validator = GodotValidator(str(project_root), cache_file=cache_file)
+    # Keep stdout clean for the results
+    with contextlib.redirect_stdout(sys.stderr):
+        validator.load_project()
+        validator.cache.save()
+    graph = validator.dependency_graph()
+
+    if args.command == 'impact':
+        path = resolve_path(validator, args.path)
+        references = graph.impact(path, args.move)
+        if args.json:
+            print(json.dumps({
+                'path': path,
+                'moved': args.move,
+                'broken': [reference._asdict() for reference in references],
+            }, indent=2))
+        else:
+            action = 'Moving' if args.move else 'Deleting'
+            print(f"{action} {path} breaks {len(references)} reference(s)")
+            for reference in references:
+                via = 'UID' if reference.by_uid else 'path'
+                print(f"  {reference.source}:{reference.line} -> {reference.target} (by {via})")
+
+    elif args.command == 'orphans':
+        ignored_prefixes = tuple(resolve_path(validator, path).rstrip('/') + '/' for path in args.ignore)
+        orphans = graph.orphans(ORPHAN_IGNORED_SUFFIXES, ignored_prefixes)
+        if args.json:
+            print(json.dumps({'orphans': orphans}, indent=2))
+        else:
+            print(f"{len(orphans)} file(s) are not referenced by any other file")
+            for path in orphans:
+                print(f"  {path}")
+
+    elif args.command == 'deps':
+        path = resolve_path(validator, args.path)
+        dependencies = graph.dependencies(path)
+        if args.json:
+            print(json.dumps({'path': path, 'dependencies': dependencies}, indent=2))
+        else:
+            print(f"{path} depends on {len(dependencies)} file(s)")
+            for dependency in dependencies:
+                print(f"  {dependency}")
+
+
+if __name__ == "__main__":
+    main()
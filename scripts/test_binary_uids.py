@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Regression tests for reading the UIDs of binary resources, run them with
+this script or with pytest.
+
+A corpus of synthetic resource headers is read through the validator's
+GodotValidator._get_binary_uid: little and big endian RSRC headers,
+headers without FORMAT_FLAG_UIDS, truncated ones, Git LFS pointers and RSCC
+compressed resources with deflate, gzip and Zstandard. The Zstandard frames
+are fixed data made by the zstd command line tool, so the pure Python
+decoder of godot_compression.py is tested without a Zstandard package.
+
+Usage: test_binary_uids.py [-v]
+"""
+
+import sys
+import zlib
+import base64
+import random
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / '.hooks'))
+
+from godot_compression import MODE_DEFLATE, MODE_GZIP, MODE_ZSTD, CompressedFile, decompress_block, zstd_decompress  # noqa: E402
+from validate_godot_project import BINARY_FLAG_UIDS, LFS_POINTER_UID, GodotValidator  # noqa: E402
+
+TEST_UID = 0x123456789ABCDEF0
+TEST_UID_TEXT = "uid://sxovuclgrkd1"
+INVALID_UID_TEXT = "uid://<invalid>"
+
+# header_payload() compressed with zstd -19: a block with Huffman coded literals and FSE compressed tables
+ZSTD_HEADER_FRAME = base64.b64decode("""
+    KLUv/WRxDOUXALpFkAgfsGk6LEgezAnT1UAczoFPJCXqSCmlTClFnU7EqRG6A5IAewB5AFQVUUXS1ykTR8Rjpaia0MNRzK6Vpai8
+    EltTn6ANZY/Tgjavj6Ias1PRkrJi1N3aeo0rYjVEQlUckkgydqRBtPaXzkfMasfKT+ZnVuNbsiiSXJpgdBr3RmrML4byiJNGRfZC
+    to5QmWzw2HIDK7ACEhwgPDhEYCBwBhIoVLBwAYCDBw4JJjR4eDgwQEAABgQKFigIw2oEfVX76yNyZ4LTEg4RTb7M5hvGS2RSQhIx
+    tBlXQnhGOESqlBe5VlNWrjMRKs49nMQUY1VRn4hDEpmSCYnH3ONSdB892fTWplOnEUnRLU7jsWYpGkX9MXtfqq6aIO4TF6ruZvwU
+    vdDcHFrM7Kv4SInYH5Ey7jAqNsIyQfKTn45NmSJXuZIkybY1joZurW4ZaTYJ1UymViF7VC1mmtufzEg9cWzeRTiEI4nbWMSS1ew0
+    QqZMxYgnQxKVecKl+xry2J5jHcvqfHxbeWSnorOZ+vBlRDaWjN2IP4rorurMh6PyKp0eEnlUERMvGZqjtqOZ02YRBw1B5dSrdgb9
+    ptfzEeJc3oji4mH38ZO9xz9RZfqZzM+THZWdzAopl1NE8h8cjqPuLhbi/jBJjHJXLlO71irXY5rTrX8yz0t09TUS6lozNKWrK6nQ
+    yFR0o81vTCvmso1J2yBGWYpttHrtin+VT5wiMYYSFVcYlpJgG4HHqBHgNLtMmwHRK3TSVELC+P3/3zfvcpgIsebEQDr7YgX9OKdi
+    PA1115Mt2zkxIZ2+2AKPixXsk1UJnxkxn8kQ4zBkynZd3rSneBchgV3ZkcvNdhWWGVzTIMl0O3NFWvYDNE/fflxOLjd3Hpfb2y3A
+    nn3z5GVnr/cLvJPrZQS54AjJ/r6LInHvDdzy+3b5vVsL3GrSaLHxcLja3ouuqgLc2vcf9XgX8CbXW+Q96nLpdZ1HuZ5cJLqYSYgk
+    bT7h3VKcBPFClcovr1haAIQQivYYHtofa1IUaQ==
+""")
+# two_block_payload() compressed with zstd -1: the first block uses the predefined tables, the second
+# reuses the Huffman table of the first ("treeless" literals)
+ZSTD_TWO_BLOCK_FRAME = base64.b64decode("""
+    KLUv/aTACwIALCgAirvgEwngOSntlgUDCpw8ATsBOAFgyddPXoBzpW5pxBztKxvAak1k7GDFA9PGaCFIwejAwdo0gEE8vD7sAQ7w
+    vSD7JojYNMqQIE94zhhIXplA1maEeVgDqxvZAc5nvCvY9ENaoir/iwxYNinF2D7fJA6bYNw+j1oPhQ3gAEb2TjraZmwhzVizS19n
+    0PkT0AUV8oHQjACOdxKGhzYj24FnBADoUysLPzBgzwzg4guswhiQ7pa1Qs5gW1rKHp2v0WicPVGQlIKlqQIjBH2gIqFBwCYy6Oss
+    aHGOeMhtNhWYUt/56aOIOkbQL51myTxRGQ3DVXRLtmtYzUDmVgx1Y4nDOGNvEQQI7KMYAw2OYDhsISBo0xgF3nWAMMLawAyWZmSf
+    Iia7BmwFMKKxUYn5g5FtMQ9kAjMDzBqxAIdnlA4cZTMLzTdsLADpJoNKF/PIZ8I/p2WdZ7yk/yEcCni+yHWYBmxiBq/EgiMr1Jkx
+    fRx/6tiHvU3kFJF/02CVoKt8EBNp6A5X9vtYJHbH0a01LTwIubeQTBIKOT58KNnGmUz4Eb9eTCWGoXgLt44GO3Qqo2HotI79YRxt
+    cv5Wxf1ELxOsIIPU0BU3UypLSBqHGbw4vgp4M6oWlBlvHIy6+dGITRTWvtTsje1k5LBkECGawgPRgd8oiXhhwBDRZhuJTQa3pTFR
+    fodNvBAAMDPnzBAmDI98IpIIL8DBUTyzYTDHxL7QoZTQJSmOkZl90sS5ZTBZVKILCp6Lifj8nka9Ti/dvecQsoZIOKB5CQTjx4xx
+    KkONNxMfWbTOfoBW84h8Oiy0dSKHxsATAcJCYoH5diElQMkXI5h3E4EEZ0OJAWnceaJ/P91AoDDiGJ8/J2siD3060yVIkwCtG1km
+    OiPxmI/Dj2PCG1xebzozGBhsD2vxaqUACGzVyPYo4+OcP6KDb4yB2KDcyaALdQic4+MeoOYY2RXbbH5BjBvugAzILbesmPnQXawJ
+    id7xCYDnYYhMBAX2BmY7GVtFFVyBGIF9H4DppF5U5tpMYMNZ+BOcm76jXBPaV7GDrTGSeQQeAwnvBDYtBNPGVvDL5n7I3nly5SDL
+    PB2j0XY7SDDfWQ9ax+XiJ9TFqwSnsWrDZP24nQ3858uB7lFiNs4TgX0Uj0/8YO2FL+aGtZ9XuwHJmWwvrtw7zxuOWhTBS0MvpLZd
+    fVK0csAGmCgfYWZjai9NAMNDhv1MJJuHB3e8UGfMbOmCvHvmHYAejJvK3cRGAebUid10JmIJ6QDmXuOoacvJu+qi3jRnggDaA3YT
+    8mrDyiOF+BlxTY+wcbEbBhacfS68mbyPLJOBYDpbqHc1YN/sHwNsM/JIGGCuaehaEWEU9RCRGXShrhvul/UjH4zpUJnzQzkSNgtE
+    LpBMYSD1qz77ZNABiTcjcs2YZDmskriToX1bNa3jYdlYwgf2PKQjJcqsrkGBBWEkOI1cPNq2rpN4xCT7/smW6cj4i2FFE1vuKNOq
+    iYGRESvI5YvmQeCgMNvje88YyqJaF32Uk7USjfDK+UUmBp85LQgEP8HVh5lZYvJz0gVFswUikqIrpJ4BfDuMt5CCcECLBdSknohZ
+    6lk81Bg4xulgMIFv4FrEKTdzC81iuIgYB7bagfdnMJtcgiy8P2QGMvXGBUG8B2cA22W0iop9O8RJx+aFKIw1H88NjSXSB1JMEyUZ
+    8yY4i2mmftvqmMw3JgEAuCui310O1YUKACeeNzYANwA2AGFOGWUISMeMvhBSGYk2WpHoQYAMMAHAcxmpCbw/IjCNIH2HXGIg3JiB
+    SsOOcUiE3PH39nQYE60nKjARBhvqyjDeAA+A+CIwE2XEBMMe+aMQMBEBh4hgBw7wmPgI29+8R6Ah7xTghUuIxxASngZ3ZxzQOywn
+    iIOV6WUm5CBszIVzTi0SMiBx98KJKEQIf7FZ4GUEBKBtI6YQIgNkDIBhhP20EPIhhw5E0DMf+tEBhozpiVYsM7bE+XriEgcB4DmV
+    aacQFAABCQOBn8o4YmxgaRCp8PAYQgfAf0Ag4et/DiAHmSVf8iVf8iVf8iVf8iVf8qUB8SWv5Eu+5Eu+5CCzNCC+NCC+5CAd4ku+
+    5GvJBwBUYaQDYmLJl3zJl3zJQWbJQWbJl3zJl3zJQQXEg8qSL/mSL/mSg8ySL/mSL/nSgPiSjyUfAFBWQaOvH/A=
+""")
+
+
+def rsrc_header(uid: int, big_endian: bool = False, flags: int = BINARY_FLAG_UIDS, type_name: bytes = b'ArrayMesh') -> bytes:
+    """The start of a binary resource, up to and including the UID."""
+    endian = '>' if big_endian else '<'
+    # The endianness flag itself is always little endian
+    return (b'RSRC' + struct.pack('<II', int(big_endian), 0)
+            + struct.pack(endian + 'IIII', 4, 4, 6, len(type_name)) + type_name
+            + struct.pack(endian + 'QIQ', 0, flags, uid))
+
+
+def header_payload() -> bytes:
+    """A resource header followed by text that compresses well, the content of ZSTD_HEADER_FRAME."""
+    rng = random.Random(9)
+    body = b''.join(b'vertex %d %.3f %.3f\n' % (i, rng.random(), rng.random()) for i in range(150))
+    return rsrc_header(TEST_UID) + b'\0' * 44 + body
+
+
+def two_block_payload() -> bytes:
+    """A full 128 KiB Zstandard block of repetitions and a short second one, the content of ZSTD_TWO_BLOCK_FRAME."""
+    rng = random.Random(0)
+    unit = bytes(rng.choice(b'abcdefgh  \n') for _ in range(3000))
+    first = (unit * 60)[:131072]
+    second = b''.join(unit[i:i + 40] + bytes(rng.choice(b'abcdefgh') for _ in range(8)) for i in range(0, 3000, 48))
+    return first + second
+
+
+def rscc(mode: int, payload: bytes, block_size: int, compress) -> bytes:
+    """A file compressed like FileAccessCompressed writes it, with every block compressed on its own."""
+    blocks = [compress(payload[start:start + block_size]) for start in range(0, len(payload) + 1, block_size)]
+    return (b'RSCC' + struct.pack('<III', mode, block_size, len(payload))
+            + struct.pack(f'<{len(blocks)}I', *map(len, blocks)) + b''.join(blocks))
+
+
+def zstd_frame(blocks: bytes, content_size: int, checksum: bool = False) -> bytes:
+    """A single segment Zstandard frame around already encoded blocks."""
+    descriptor = 0x20 | (0x04 if checksum else 0)
+    return struct.pack('<IBB', 0xFD2FB528, descriptor, content_size) + blocks + (b'\0' * 4 if checksum else b'')
+
+
+def zstd_block(block_type: int, size: int, data: bytes, last: bool) -> bytes:
+    return (size << 3 | block_type << 1 | int(last)).to_bytes(3, 'little') + data
+
+
+class UidTextTest(unittest.TestCase):
+    def test_base_34(self):
+        self.assertEqual(GodotValidator._iuid_to_string(1), "uid://b")
+        self.assertEqual(GodotValidator._iuid_to_string(34), "uid://ba")
+        self.assertEqual(GodotValidator._iuid_to_string(TEST_UID), TEST_UID_TEXT)
+
+    def test_invalid(self):
+        self.assertEqual(GodotValidator._iuid_to_string(0), INVALID_UID_TEXT)
+        self.assertEqual(GodotValidator._iuid_to_string(1 << 63), INVALID_UID_TEXT)
+
+
+class BinaryUidTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.validator = GodotValidator(self.directory.name, cache_file=None)
+
+    def uid_of(self, data: bytes) -> str:
+        file_path = Path(self.directory.name) / 'test.res'
+        file_path.write_bytes(data)
+        return self.validator._get_binary_uid(file_path)
+
+    def test_little_endian(self):
+        self.assertEqual(self.uid_of(rsrc_header(TEST_UID) + b'\0' * 64), TEST_UID_TEXT)
+
+    def test_big_endian(self):
+        self.assertEqual(self.uid_of(rsrc_header(TEST_UID, big_endian=True) + b'\0' * 64), TEST_UID_TEXT)
+
+    def test_header_at_end_of_file(self):
+        self.assertEqual(self.uid_of(rsrc_header(TEST_UID)), TEST_UID_TEXT)
+
+    def test_without_uids_flag(self):
+        self.assertEqual(self.uid_of(rsrc_header(TEST_UID, flags=0)), INVALID_UID_TEXT)
+
+    def test_truncated(self):
+        header = rsrc_header(TEST_UID)
+        for size in range(4, len(header)):
+            with self.subTest(size=size), self.assertRaises(ValueError):
+                self.uid_of(header[:size])
+
+    def test_not_a_resource(self):
+        with self.assertRaises(ValueError):
+            self.uid_of(b'GDSC' + b'\0' * 64)
+
+    def test_lfs_pointer(self):
+        pointer = b'version https://git-lfs.github.com/spec/v1\noid sha256:' + b'0' * 64 + b'\nsize 123\n'
+        self.assertEqual(self.uid_of(pointer), LFS_POINTER_UID)
+
+    def test_deflate(self):
+        self.assertEqual(self.uid_of(rscc(MODE_DEFLATE, header_payload(), 4096, zlib.compress)), TEST_UID_TEXT)
+
+    def test_deflate_header_across_blocks(self):
+        self.assertEqual(self.uid_of(rscc(MODE_DEFLATE, header_payload(), 16, zlib.compress)), TEST_UID_TEXT)
+
+    def test_gzip(self):
+        def gzip(data):
+            compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+            return compressor.compress(data) + compressor.flush()
+
+        self.assertEqual(self.uid_of(rscc(MODE_GZIP, header_payload(), 4096, gzip)), TEST_UID_TEXT)
+
+    def test_zstd(self):
+        data = rscc(MODE_ZSTD, header_payload(), 4096, lambda block: ZSTD_HEADER_FRAME if block else zstd_frame(b'', 0))
+        self.assertEqual(self.uid_of(data), TEST_UID_TEXT)
+
+    def test_compressed_without_resource(self):
+        with self.assertRaises(ValueError):
+            self.uid_of(rscc(MODE_DEFLATE, b'GDSC' + b'\0' * 64, 4096, zlib.compress))
+
+    def test_compressed_truncated(self):
+        data = rscc(MODE_DEFLATE, header_payload(), 4096, zlib.compress)
+        with self.assertRaises(ValueError):
+            self.uid_of(data[:40])
+
+    def test_only_needed_blocks_are_decompressed(self):
+        file_path = Path(self.directory.name) / 'test.res'
+        file_path.write_bytes(rscc(MODE_DEFLATE, header_payload(), 64, zlib.compress))
+        with open(file_path, 'rb') as f:
+            compressed = CompressedFile(f)
+            self.assertEqual(compressed.read(100), header_payload()[:100])
+            self.assertEqual(compressed._block_index, 1)
+
+
+class ZstdDecoderTest(unittest.TestCase):
+    """The pure Python decoder, which is used when no Zstandard package is available."""
+
+    def test_compressed_block(self):
+        self.assertEqual(zstd_decompress(ZSTD_HEADER_FRAME), header_payload())
+
+    def test_treeless_literals(self):
+        self.assertEqual(zstd_decompress(ZSTD_TWO_BLOCK_FRAME), two_block_payload())
+
+    def test_raw_and_rle_blocks(self):
+        blocks = zstd_block(0, 5, b'hello', last=False) + zstd_block(1, 4, b'!', last=True)
+        self.assertEqual(zstd_decompress(zstd_frame(blocks, 9)), b'hello!!!!')
+        self.assertEqual(zstd_decompress(zstd_frame(blocks, 9, checksum=True)), b'hello!!!!')
+
+    def test_skippable_and_concatenated_frames(self):
+        skippable = struct.pack('<II', 0x184D2A50, 3) + b'abc'
+        frame = zstd_frame(zstd_block(0, 2, b'hi', last=True), 2)
+        self.assertEqual(zstd_decompress(skippable + frame + frame), b'hihi')
+
+    def test_not_zstd(self):
+        with self.assertRaises(ValueError):
+            zstd_decompress(b'\0' * 16)
+
+    def test_block_is_cut_to_size(self):
+        self.assertEqual(decompress_block(MODE_ZSTD, ZSTD_HEADER_FRAME, 100), header_payload()[:100])
+
+
+if __name__ == '__main__':
+    unittest.main()
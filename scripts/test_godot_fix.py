@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tests for the repairs of UID errors of the project validator (--fix), run
+them with this script or with pytest.
+
+Small projects are written to a temporary directory and validated, then
+the planned fixes are applied and the files checked byte for byte: the
+path keeping a duplicate UID, the new UID written where the other path
+defines it, ext_resources whose UID and path disagree, unknown UIDs, files
+that changed after the validation, CRLF line endings and line separators
+other than '\n' inside strings.
+
+Usage: test_godot_fix.py [-v]
+"""
+
+import io
+import sys
+import tempfile
+import unittest
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / '.hooks'))
+
+from godot_fix import TextEdit, apply_fixes, plan_fixes, rewrite_file  # noqa: E402
+from validate_godot_project import GodotValidator  # noqa: E402
+
+PROJECT_GODOT = '[application]\n\nrun/main_scene="res://main.tscn"\n'
+
+
+def scene(uid: str, *ext_resources: str) -> str:
+    """A .tscn with the given UID and ext_resources, each given as its type, UID and path separated by spaces."""
+    lines = [f'[gd_scene load_steps={len(ext_resources) + 1} format=3 uid="{uid}"]', '']
+    for number, ext_resource in enumerate(ext_resources, 1):
+        type_name, ext_uid, path = ext_resource.split(' ')
+        lines.append(f'[ext_resource type="{type_name}" uid="{ext_uid}" path="{path}" id="{number}"]')
+    lines += ['', '[node name="Root" type="Node"]', '']
+    return '\n'.join(lines)
+
+
+def import_file(uid: str) -> str:
+    return f'[remap]\n\nimporter="texture"\ntype="CompressedTexture2D"\nuid="{uid}"\npath="res://.godot/imported/texture.ctex"\n'
+
+
+class FixTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        self.write('project.godot', PROJECT_GODOT)
+
+    def write(self, rel_path: str, content: str, newline: str = '\n'):
+        with open(self.root / rel_path, 'w', encoding='utf-8', newline=newline) as f:
+            f.write(content)
+
+    def read(self, rel_path: str) -> str:
+        with open(self.root / rel_path, encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def validate(self) -> GodotValidator:
+        validator = GodotValidator(str(self.root), cache_file=None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            validator.scan_project()
+        return validator
+
+    def fix(self):
+        """Plan and apply the fixes, and return the plan."""
+        plan = plan_fixes(self.validate())
+        self.assertEqual(plan.unfixable, [])
+        self.assertEqual(apply_fixes(plan, self.root), [])
+        return plan
+
+    def assertNoUidErrors(self):
+        validator = self.validate()
+        codes = {error.code for error in validator.errors}
+        self.assertFalse(codes & {'ext-resource-uid-mismatch', 'missing-uid'}, validator.errors)
+        self.assertFalse({uid: paths for uid, paths in validator.duplicate_uids.items() if len(set(paths)) > 1})
+
+    def test_duplicate_uid_in_scene(self):
+        self.write('kept.tscn', scene('uid://shared'))
+        self.write('renamed.tscn', scene('uid://shared'))
+        # Two ext_resources expect kept.tscn and one renamed.tscn
+        self.write('main.tscn', scene('uid://main', 'PackedScene uid://shared res://kept.tscn',
+                                      'PackedScene uid://shared res://renamed.tscn'))
+        self.write('other.tscn', scene('uid://other', 'PackedScene uid://shared res://kept.tscn'))
+
+        self.fix()
+
+        self.assertEqual(self.read('kept.tscn'), scene('uid://shared'))
+        new_uid = GodotValidator(str(self.root))._extract_facts('renamed.tscn', self.read('renamed.tscn')).uid
+        self.assertNotIn(new_uid, (None, 'uid://shared'))
+        self.assertEqual(self.read('renamed.tscn'), scene(new_uid))
+        self.assertEqual(self.read('main.tscn'), scene('uid://main', 'PackedScene uid://shared res://kept.tscn',
+                                                       f'PackedScene {new_uid} res://renamed.tscn'))
+        self.assertEqual(self.read('other.tscn'), scene('uid://other', 'PackedScene uid://shared res://kept.tscn'))
+        self.assertNoUidErrors()
+
+    def test_duplicate_uid_in_import_and_uid_files(self):
+        self.write('kept.png', '')
+        self.write('kept.png.import', import_file('uid://shared'))
+        self.write('renamed.png', '')
+        self.write('renamed.png.import', import_file('uid://shared'))
+        self.write('script.gd', 'extends Node\n')
+        self.write('script.gd.uid', 'uid://shared\n')
+        self.write('main.tscn', scene('uid://main', 'Texture2D uid://shared res://kept.png'))
+
+        self.fix()
+
+        self.assertEqual(self.read('kept.png.import'), import_file('uid://shared'))
+        import_uid = self.validate().path_to_uid['res://renamed.png']
+        self.assertEqual(self.read('renamed.png.import'), import_file(import_uid))
+        script_uid = self.read('script.gd.uid').strip()
+        self.assertNotIn(script_uid, ('uid://shared', import_uid))
+        self.assertTrue(script_uid.startswith('uid://'))
+        self.assertEqual(self.read('main.tscn'), scene('uid://main', 'Texture2D uid://shared res://kept.png'))
+        self.assertNoUidErrors()
+
+    def test_mismatched_uid_gets_its_path(self):
+        self.write('target.tscn', scene('uid://target'))
+        self.write('other.tscn', scene('uid://other'))
+        self.write('main.tscn', scene('uid://main', 'PackedScene uid://target res://other.tscn'))
+
+        plan = self.fix()
+
+        self.assertEqual(len(plan.changes), 1)
+        self.assertEqual(self.read('main.tscn'), scene('uid://main', 'PackedScene uid://target res://target.tscn'))
+        self.assertNoUidErrors()
+
+    def test_unknown_uid_gets_the_uid_of_its_path(self):
+        self.write('target.tscn', scene('uid://target'))
+        self.write('main.tscn', scene('uid://main', 'PackedScene uid://unknown res://target.tscn'))
+
+        self.fix()
+
+        self.assertEqual(self.read('main.tscn'), scene('uid://main', 'PackedScene uid://target res://target.tscn'))
+        self.assertNoUidErrors()
+
+    def test_changed_file_is_left_alone(self):
+        self.write('target.tscn', scene('uid://target'))
+        self.write('main.tscn', scene('uid://main', 'PackedScene uid://unknown res://target.tscn'))
+        plan = plan_fixes(self.validate())
+
+        # Edited after the validation, the ext_resource moved down a line
+        changed = scene('uid://main', 'PackedScene uid://unknown res://target.tscn').replace('\n\n', '\n\n\n', 1)
+        self.write('main.tscn', changed)
+
+        errors = apply_fixes(plan, self.root)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('main.tscn', errors[0])
+        self.assertEqual(self.read('main.tscn'), changed)
+        with self.assertRaises(ValueError):
+            rewrite_file(self.root / 'main.tscn', plan.edits['main.tscn'])
+        self.assertEqual(self.read('main.tscn'), changed)
+        self.assertEqual([path.name for path in self.root.iterdir() if path.suffix == '.tmp'], [])
+
+    def test_crlf_is_kept(self):
+        self.write('target.tscn', scene('uid://target'), newline='\r\n')
+        self.write('main.tscn', scene('uid://main', 'PackedScene uid://unknown res://target.tscn'), newline='\r\n')
+
+        self.fix()
+
+        expected = scene('uid://main', 'PackedScene uid://target res://target.tscn').replace('\n', '\r\n')
+        self.assertEqual(self.read('main.tscn'), expected)
+
+    def test_only_newlines_count_as_line_breaks(self):
+        # A form feed or a line separator in a string doesn't start a line for the tokenizer
+        content = scene('uid://main', 'Texture2D uid://missing res://odd\u2028name\x0c.png',
+                        'PackedScene uid://unknown res://target.tscn')
+        self.write('target.tscn', scene('uid://target'))
+        self.write('main.tscn', content)
+
+        self.fix()
+
+        self.assertEqual(self.read('main.tscn'), content.replace('uid://unknown', 'uid://target'))
+
+    def test_rewrite_file(self):
+        self.write('file.txt', 'a = 1\nb = 1\nc = 1')
+        rewrite_file(self.root / 'file.txt', [TextEdit(2, '1', '2'), TextEdit(None, 'c = 1', 'c = 3')])
+        self.assertEqual(self.read('file.txt'), 'a = 1\nb = 2\nc = 3')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,24 +1,298 @@
+#!/usr/bin/env python3
+"""
+Check a release build against the itch.io size limits, and show what takes the space.
+
+Every file of the build directory is checked against the per-file and total
+limits. The directory index of each Godot pack in it, a .pck or one embedded
+in an executable, is read (without reading the packed files themselves),
+and the bytes of imported and exported files are attributed to the res://
+path they were made from, e.g. the .ctex of an imported texture to its .png.
+The result is aggregated by asset, directory and file type.
+
+With --save-baseline the sizes are written to a JSON file, which a later
+run can --compare against to see which assets grew, and --max-growth fails
+the run when the pack grew too much.
+
+Usage: test_release_size.py BUILD [--top N] [--depth N] [--compare FILE] [--save-baseline FILE]
+
+BUILD is the build directory, or a single .pck or executable with an
+embedded pack.
+"""
+
+import re
 import sys
+import json
+import struct
+import argparse
+import posixpath
+from collections import defaultdict
 from pathlib import Path
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple
 
 ITCH_IO_MAX_SIZE_MB_PER_FILE = 200 * 1024 * 1024  # Maximum size for itch.io release in MB per file
 ITCH_IO_MAX_SIZE_MB = 500 * 1024 * 1024  # Maximum size for itch.io release in MB total
 
-def test_release_size(build_directory: Path) -> None:
+PACK_HEADER_MAGIC = 0x43504447  # "GDPC"
+# Godot 4.0 to 4.3 write version 2, 4.4 and later version 3
+PACK_FORMAT_VERSIONS = (2, 3)
+PACK_DIR_ENCRYPTED = 1
+PACK_REL_FILEBASE = 2
+PACK_FILE_ENCRYPTED = 1
+PACK_FILE_REMOVAL = 2
+# Files that point to the imported or exported files made from the file they're named after
+REMAP_SUFFIXES = ('.import', '.remap')
+REMAP_PATH_PATTERN = re.compile(r'^path(?:\.\w+)?="([^"]+)"', re.MULTILINE)
+# Remap files are tiny, anything larger isn't one
+MAX_REMAP_SIZE = 64 * 1024
+
+
+class PackError(Exception):
+    pass
+
+
+class NotAPackError(PackError):
+    """The file neither is a pack nor has one embedded."""
+
+
+class PackEntry(NamedTuple):
+    """A file in a pack, with its offset from the start of the file containing the pack."""
+    path: str
+    offset: int
+    size: int
+    encrypted: bool
+
+
+def _read(f: BinaryIO, fmt: str):
+    size = struct.calcsize(fmt)
+    data = f.read(size)
+    if len(data) != size:
+        raise PackError("Unexpected end of file")
+    return struct.unpack(fmt, data)
+
+
+def _find_pack_start(f: BinaryIO) -> int:
+    """Find the pack at the start of the file, or at the end of a self-contained executable."""
+    f.seek(0)
+    if f.read(4) == struct.pack('<I', PACK_HEADER_MAGIC):
+        return 0
+
+    # Embedded packs end with their size and the magic
+    f.seek(0, 2)
+    end = f.tell()
+    if end < 12:
+        raise NotAPackError("Not a Godot pack")
+    f.seek(end - 12)
+    pack_size, magic = _read(f, '<QI')
+    start = end - 12 - pack_size
+    if magic != PACK_HEADER_MAGIC or start < 0:
+        raise NotAPackError("Not a Godot pack, and no pack is embedded in it")
+    f.seek(start)
+    if _read(f, '<I')[0] != PACK_HEADER_MAGIC:
+        raise PackError("The embedded pack has no valid header")
+    return start
+
+
+def read_pack_index(f: BinaryIO) -> Tuple[Tuple[int, int, int], List[PackEntry]]:
+    """
+    Read the Godot version that made a pack and its directory.
+
+    Only the header and the directory are read, with the file positioned at
+    the start of each, so even packs of several GB take a few reads.
+    """
+    start = _find_pack_start(f)
+    version, major, minor, patch, pack_flags, file_base = _read(f, '<5IQ')
+    if version not in PACK_FORMAT_VERSIONS:
+        raise PackError(f"Unsupported pack format version {version} (Godot {major}.{minor}), expected one of {PACK_FORMAT_VERSIONS}")
+    if pack_flags & PACK_DIR_ENCRYPTED:
+        raise PackError("The pack directory is encrypted")
+
+    if version >= 3 or pack_flags & PACK_REL_FILEBASE:
+        file_base += start
+    if version >= 3:
+        # The directory is at the end, after the files
+        f.seek(_read(f, '<Q')[0] + start)
+    else:
+        # The directory follows the reserved part of the header
+        _read(f, '<16I')
+
+    entries = []
+    for _ in range(_read(f, '<I')[0]):
+        path_length = _read(f, '<I')[0]
+        # Paths are padded with zeros to a multiple of 4 bytes
+        path = f.read(path_length).rstrip(b'\0').decode('utf-8')
+        offset, size = _read(f, '<QQ')
+        f.seek(16, 1)  # MD5
+        flags = _read(f, '<I')[0]
+        if flags & PACK_FILE_REMOVAL:
+            continue
+        # Since version 3 the paths are stored without res://
+        if '://' not in path:
+            path = 'res://' + path
+        entries.append(PackEntry(path, file_base + offset, size, bool(flags & PACK_FILE_ENCRYPTED)))
+
+    return (major, minor, patch), entries
+
+
+def attribute_sizes(f: BinaryIO, entries: List[PackEntry]) -> Dict[str, int]:
+    """
+    Add up the bytes in the pack per source res:// path.
+
+    A .import or .remap file names the imported or exported files made from
+    its source, so those, and the remap file itself, count for the source.
+    Only remap files are read, the other files are attributed by the index.
+    """
+    owners: Dict[str, str] = {}
+    for entry in entries:
+        if not entry.path.endswith(REMAP_SUFFIXES) or entry.encrypted or entry.size > MAX_REMAP_SIZE:
+            continue
+        source = entry.path.rsplit('.', 1)[0]
+        owners[entry.path] = source
+        f.seek(entry.offset)
+        content = f.read(entry.size).decode('utf-8', errors='replace')
+        for target in REMAP_PATH_PATTERN.findall(content):
+            owners[target] = source
+
+    sizes: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        sizes[owners.get(entry.path, entry.path)] += entry.size
+    return dict(sizes)
+
+
+def group_sizes(sizes: Dict[str, int], depth: int) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Aggregate the sizes by directory, up to depth levels below res://, and by file type."""
+    by_directory: Dict[str, int] = defaultdict(int)
+    by_type: Dict[str, int] = defaultdict(int)
+    for path, size in sizes.items():
+        scheme, _, rel_path = path.partition('://')
+        directory = '/'.join(posixpath.dirname(rel_path).split('/')[:depth])
+        by_directory[f"{scheme}://{directory}"] += size
+        by_type[posixpath.splitext(rel_path)[1] or '(none)'] += size
+    return dict(by_directory), dict(by_type)
+
+
+def format_size(size: int) -> str:
+    """Format a size in bytes as KB below a megabyte and as MB above."""
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+def _print_table(title: str, sizes: Dict[str, int], total: int, top: int):
+    print(f"\n{title}:")
+    for name, size in sorted(sizes.items(), key=lambda item: (-item[1], item[0]))[:top]:
+        share = size / total * 100 if total else 0.0
+        print(f"  {format_size(size):>12} {share:5.1f}%  {name}")
+    if len(sizes) > top:
+        print(f"  ... and {len(sizes) - top} more")
+
+
+def analyze_pack(pack_path: Path, top: int, depth: int) -> Dict[str, int]:
+    """Print what takes the space in a pack, and return the size per source res:// path."""
+    with open(pack_path, 'rb') as f:
+        (major, minor, patch), entries = read_pack_index(f)
+        sizes = attribute_sizes(f, entries)
+
+    file_size = pack_path.stat().st_size
+    total = sum(sizes.values())
+    print(f"\n{pack_path.name}: {len(entries)} files from Godot {major}.{minor}.{patch}, "
+          f"{format_size(total)} of {format_size(file_size)} ({total / ITCH_IO_MAX_SIZE_MB_PER_FILE * 100:.1f}% of the itch.io limit per file)")
+    by_directory, by_type = group_sizes(sizes, depth)
+    _print_table("Largest assets", sizes, total, top)
+    _print_table("By directory", by_directory, total, top)
+    _print_table("By type", by_type, total, top)
+    return sizes
+
+
+def compare_to_baseline(baseline: Dict[str, Dict[str, int]], current: Dict[str, Dict[str, int]], top: int) -> int:
+    """Print the changes per pack and asset since the baseline, and return the growth of all packs in bytes."""
+    growth = 0
+    for pack_name in sorted(set(baseline) | set(current)):
+        old = baseline.get(pack_name, {})
+        new = current.get(pack_name, {})
+        delta = sum(new.values()) - sum(old.values())
+        growth += delta
+        print(f"\n{pack_name}: {'+' if delta >= 0 else '-'}{format_size(abs(delta))} since the baseline "
+              f"({format_size(sum(old.values()))} -> {format_size(sum(new.values()))})")
+
+        changes = [
+            (new.get(path, 0) - old.get(path, 0), path)
+            for path in set(old) | set(new)
+            if new.get(path, 0) != old.get(path, 0)
+        ]
+        for change, path in sorted(changes, key=lambda item: (-abs(item[0]), item[1]))[:top]:
+            status = ' (new)' if path not in old else ' (removed)' if path not in new else ''
+            print(f"  {('+' if change >= 0 else '-') + format_size(abs(change)):>13}  {path}{status}")
+        if len(changes) > top:
+            print(f"  ... and {len(changes) - top} more")
+    return growth
+
+
+def test_release_size(build: Path, top: int = 15, depth: int = 2, baseline_path: Optional[Path] = None,
+                      save_baseline_path: Optional[Path] = None, max_growth: Optional[float] = None) -> bool:
+    files = sorted(path for path in build.iterdir() if path.is_file()) if build.is_dir() else [build]
+
+    success = True
     found_large_files = False
     total_size = 0
-    for file in build_directory.glob("*"):
-        print(file.stat().st_size, file.name)
-        total_size += file.stat().st_size
-        if file.stat().st_size > ITCH_IO_MAX_SIZE_MB_PER_FILE:  # 200 MB
-            print(f"ERROR: {file.name} exceeds 100 MB with size {file.stat().st_size / (1024 * 1024):.2f} MB")
+    packs: Dict[str, Dict[str, int]] = {}
+    for file in files:
+        size = file.stat().st_size
+        print(size, file.name)
+        total_size += size
+        if size > ITCH_IO_MAX_SIZE_MB_PER_FILE:
+            print(f"ERROR: {file.name} exceeds {format_size(ITCH_IO_MAX_SIZE_MB_PER_FILE)} with size {format_size(size)}")
             found_large_files = True
+
+    for file in files:
+        try:
+            packs[file.name] = analyze_pack(file, top, depth)
+        except (PackError, UnicodeDecodeError) as e:
+            # Other files of a build directory hold a pack when it was embedded in the executable
+            if isinstance(e, NotAPackError) and file.suffix != '.pck' and build.is_dir():
+                continue
+            print(f"ERROR: Could not read the pack index of {file.name}: {e}")
+            success = False
+
     if found_large_files:
         print("ERROR: One or more files exceed the maximum size for itch.io releases.")
+        success = False
+    if total_size > ITCH_IO_MAX_SIZE_MB:
+        print(f"ERROR: Total size of files exceeds {format_size(ITCH_IO_MAX_SIZE_MB)} with total size {format_size(total_size)}")
+        success = False
+
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)['packs']
+        growth = compare_to_baseline(baseline, packs, top)
+        if max_growth is not None and growth > max_growth * 1024 * 1024:
+            print(f"ERROR: The packs grew by {format_size(growth)} since the baseline, more than the allowed {max_growth} MB")
+            success = False
+
+    if save_baseline_path:
+        with open(save_baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({'packs': packs}, f, indent=1, sort_keys=True)
+        print(f"\nWrote the baseline to {save_baseline_path}")
+
+    return success
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check a release build against the itch.io size limits, and show what takes the space')
+    parser.add_argument('build', type=Path, help='Build directory, or a .pck or executable with an embedded pack')
+    parser.add_argument('--top', type=int, default=15, help='Number of assets, directories and types listed (default: 15)')
+    parser.add_argument('--depth', type=int, default=2, help='Directory levels below res:// to aggregate by (default: 2)')
+    parser.add_argument('--compare', type=Path, metavar='FILE', help='Show the changes since a baseline written with --save-baseline')
+    parser.add_argument('--save-baseline', type=Path, metavar='FILE', help='Write the sizes per asset to FILE')
+    parser.add_argument('--max-growth', type=float, metavar='MB', help='With --compare, fail when the packs grew by more than this')
+    args = parser.parse_args()
+
+    if not args.build.exists():
+        print(f"ERROR: {args.build} does not exist")
+        sys.exit(1)
+
+    if not test_release_size(args.build, args.top, args.depth, args.compare, args.save_baseline, args.max_growth):
         sys.exit(1)
-    if total_size > ITCH_IO_MAX_SIZE_MB:  # 500 MB
-        print(f"ERROR: Total size of files exceeds 500 MB with total size {total_size / (1024 * 1024):.2f} MB")
 
 
 if __name__ == "__main__":
-    test_release_size(Path(sys.argv[1]))
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for the lexer of the project validator that finds the res:// and uid://
+strings in GDScript and C# files, run them with this script or with pytest.
+
+Covers references in comments and multi-line strings, which aren't
+references, escaped quotes, the lines references are reported on, the
+calls they're passed to and C# generic calls and verbatim strings.
+
+Usage: test_script_tokenizer.py [-v]
+"""
+
+import io
+import sys
+import tempfile
+import unittest
+import contextlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / '.hooks'))
+
+from validate_godot_project import GodotValidator, ScriptString, tokenize_script  # noqa: E402
+
+
+def tokens(content: str, suffix: str = '.gd'):
+    return list(tokenize_script(content, suffix))
+
+
+class GDScriptTest(unittest.TestCase):
+    def test_comments_are_ignored(self):
+        content = (
+            '# preload("res://commented.tscn")\n'
+            'var a = 1  # load("res://trailing.tscn")\n'
+            'var b = load("res://real.tscn")\n'
+        )
+        self.assertEqual(tokens(content), [ScriptString('load', 'res://real.tscn', 3)])
+
+    def test_multi_line_strings_are_ignored(self):
+        content = (
+            '"""\n'
+            'preload("res://in_docstring.tscn")\n'
+            '"""\n'
+            "var help = '''\n"
+            "load('res://in_single_quotes.tscn') # \"res://also.tscn\"\n"
+            "'''\n"
+            'var scene = preload("res://real.tscn")\n'
+        )
+        self.assertEqual(tokens(content), [ScriptString('preload', 'res://real.tscn', 7)])
+
+    def test_hash_inside_a_string_is_not_a_comment(self):
+        content = 'var a = "#"; var b = load("res://real.tscn")\n'
+        self.assertEqual(tokens(content), [ScriptString('load', 'res://real.tscn', 1)])
+
+    def test_escaped_quotes_dont_end_a_string(self):
+        content = (
+            'var a = "say \\"res://not_a_path.tscn\\" here"\n'
+            "var b = 'it\\'s \"res://neither.tscn\"'\n"
+            'var c = load("res://with \\"quote\\".tscn")\n'
+            'var d = preload("res://real.tscn")\n'
+        )
+        self.assertEqual(tokens(content), [
+            ScriptString('load', 'res://with \\"quote\\".tscn', 3),
+            ScriptString('preload', 'res://real.tscn', 4),
+        ])
+
+    def test_triple_quoted_reference(self):
+        content = 'var a = """\n"""\nvar b = load("""res://real.tscn""")\n'
+        self.assertEqual(tokens(content), [ScriptString('load', 'res://real.tscn', 3)])
+
+    def test_call_kinds(self):
+        content = (
+            'var a = preload("res://a.tscn")\n'
+            'var b = load("uid://b")\n'
+            'var c = ResourceLoader.load("res://c.tscn")\n'
+            'var d = "res://d.tscn"\n'
+            'var e = FileAccess.file_exists("res://e.cfg")\n'
+            'var f = ResourceLoader.exists("res://f.tscn")\n'
+        )
+        self.assertEqual(tokens(content), [
+            ScriptString('preload', 'res://a.tscn', 1),
+            ScriptString('load', 'uid://b', 2),
+            ScriptString('ResourceLoader', 'res://c.tscn', 3),
+            ScriptString('other', 'res://d.tscn', 4),
+        ])
+
+    def test_unterminated_quote(self):
+        content = "var a = \"it's\"\nvar b = 'unterminated\nvar c = load(\"res://real.tscn\")\n"
+        self.assertEqual(tokens(content), [ScriptString('load', 'res://real.tscn', 3)])
+
+    def test_no_references(self):
+        self.assertEqual(tokens('extends Node\n# res:// in a comment only\n'), [])
+
+
+class CSharpTest(unittest.TestCase):
+    def test_generic_load(self):
+        content = (
+            'var scene = GD.Load<PackedScene>("res://scene.tscn");\n'
+            'var texture = ResourceLoader.Load<Texture2D>("res://icon.png");\n'
+        )
+        self.assertEqual(tokens(content, '.cs'), [
+            ScriptString('load', 'res://scene.tscn', 1),
+            ScriptString('ResourceLoader', 'res://icon.png', 2),
+        ])
+
+    def test_verbatim_strings(self):
+        content = (
+            'var a = @"C:\\temp\\""res://not_a_path.tscn""";\n'
+            'var b = GD.Load<PackedScene>(@"res://verbatim.tscn");\n'
+            'var c = @"\n'
+            'res://multi_line.tscn\n'
+            '";\n'
+            'var d = GD.Load(@"res://with ""quotes"".tscn");\n'
+        )
+        self.assertEqual(tokens(content, '.cs'), [
+            ScriptString('load', 'res://verbatim.tscn', 2),
+            ScriptString('load', 'res://with ""quotes"".tscn', 6),
+        ])
+
+    def test_comments_and_escapes(self):
+        content = (
+            '// GD.Load("res://line_comment.tscn");\n'
+            '/* GD.Load("res://block\n'
+            'comment.tscn"); */\n'
+            'var a = "\\"res://escaped.tscn\\"";\n'
+            "var b = '\"';\n"
+            'var c = GD.Load<PackedScene>("res://real.tscn");\n'
+        )
+        self.assertEqual(tokens(content, '.cs'), [ScriptString('load', 'res://real.tscn', 6)])
+
+    def test_raw_strings(self):
+        content = 'var a = """\n"res://in_raw.tscn"\n""";\nvar b = GD.Load("""res://raw.tscn""");\n'
+        self.assertEqual(tokens(content, '.cs'), [ScriptString('load', 'res://raw.tscn', 4)])
+
+
+class ValidatorTest(unittest.TestCase):
+    def test_missing_preload_is_reported_on_its_line(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / 'project.godot').write_text('[application]\n', encoding='utf-8')
+            (root / 'player.gd').write_text(
+                'extends Node\n'
+                '"""\n'
+                'preload("res://in_docstring")\n'
+                '"""\n'
+                '# preload("res://in_comment")\n'
+                'const Missing = preload("res://missing")\n',
+                encoding='utf-8',
+            )
+            validator = GodotValidator(str(root), cache_file=None)
+            with contextlib.redirect_stdout(io.StringIO()):
+                validator.scan_project()
+
+        missing = [error for error in validator.errors if error.code == 'missing-file']
+        self.assertEqual([(error.file, error.line, error.path, error.detail) for error in missing],
+                         [('player.gd', 6, 'res://missing', 'preload')])
+
+
+if __name__ == '__main__':
+    unittest.main()